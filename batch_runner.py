@@ -0,0 +1,195 @@
+import argparse
+import os
+import sys
+import warnings
+
+import pandas as pd
+
+import compute_pool
+import share_tracking as share
+
+
+def find_portfolios(source):
+    """
+    Portfolio CSV files to run: every *.csv file in a directory, or the files listed in a
+    manifest (one path per line, relative to the manifest; blank lines and # comments ignored).
+    Returns a dict of portfolio name (file name without extension) -> path.
+    """
+    if os.path.isdir(source):
+        paths = [
+            os.path.join(source, name)
+            for name in sorted(os.listdir(source))
+            if name.lower().endswith(".csv")
+        ]
+    else:
+        base = os.path.dirname(os.path.abspath(source))
+        with open(source) as f:
+            lines = [line.strip() for line in f]
+        paths = [os.path.join(base, line) for line in lines if line and not line.startswith("#")]
+
+    portfolios = {}
+    for path in paths:
+        name = os.path.splitext(os.path.basename(path))[0]
+        if name in portfolios:
+            raise ValueError(f"Duplicate portfolio name '{name}': {portfolios[name]} and {path}")
+        portfolios[name] = path
+    return portfolios
+
+
+def summarise_portfolio(merged_portfolio, index, date=None, currency=None, fx_rates=None):
+    """
+    process_data() and stock_summaries() for one merged portfolio, converted to currency first
+    if given. fx_rates (see share_tracking.fetch_fx_rates) avoids downloading FX again.
+    Returns {"basic": ..., "total": ...} summary tables without styles.
+    """
+    portfolio = share.process_data(merged_portfolio)
+    if currency:
+        portfolio = share.convert_currency(portfolio, target_currency=currency, fx_rates=fx_rates)
+    return share.stock_summaries(portfolio, index, date=date, styles=False)
+
+
+def _write_summaries(name, merged_portfolio, index, out_dir, date, currency, fx_rates):
+    """Summarise one portfolio and write <out_dir>/<name>_<method>.csv for each method."""
+    summaries = summarise_portfolio(merged_portfolio, index, date=date, currency=currency, fx_rates=fx_rates)
+    paths = []
+    for method, summary in summaries.items():
+        path = os.path.join(out_dir, f"{name}_{method}.csv")
+        summary.to_csv(path, index=False)
+        paths.append(path)
+    return paths
+
+
+def run_batch(source, index, out_dir, date=None, currency=None, workers=None, use_cache=True):
+    """
+    Summarise many portfolio CSVs, fetching each ticker's market data only once.
+
+    The tickers of all portfolios (and the benchmark) are fetched together through the price
+    cache from the earliest portfolio start date, and FX rates once for all of them. Every
+    portfolio is then merged with the shared histories and summarised on its own, in parallel
+    on the compute_pool process pool.
+
+    Parameters
+    ----------
+    source : str
+        Directory of portfolio CSV files, or a manifest file listing them (see find_portfolios).
+    index : str
+        Benchmark ticker, eg "SPY".
+    out_dir : str
+        Directory the summary CSV files are written to (created if needed).
+    date : str, optional
+        Start date for the summaries, as for stock_summary(). The default is None.
+    currency : str, optional
+        Report currency-dependent metrics in this currency. The default is None.
+    workers : int, optional
+        Number of processes summarising portfolios. None uses compute_pool.WORKERS and 0 every
+        core. The default is None.
+    use_cache : bool, optional
+        Read and update the on-disk price cache. The default is True.
+
+    Returns
+    -------
+    written : dict
+        Portfolio name -> list of summary CSV paths.
+    errors : dict
+        Portfolio name -> exception for portfolios that could not be read or summarised.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    written = {}
+    errors = {}
+
+    portfolios = {}
+    for name, path in find_portfolios(source).items():
+        try:
+            portfolios[name] = share.get_userdata(path)
+        except Exception as exc:
+            errors[name] = exc
+    if not portfolios:
+        return written, errors
+
+    # One fetch for the union of all portfolios' tickers
+    tickers = list(dict.fromkeys(
+        ticker for portfolio in portfolios.values() for ticker in share.portfolio_tickers(portfolio, index)
+    ))
+    start_date = min(portfolio.index.min() for portfolio in portfolios.values())
+    price_histories = share.fetch_price_histories(tickers, start_date, use_cache=use_cache)
+
+    merged = {}
+    for name, portfolio in portfolios.items():
+        try:
+            merged[name] = share.merge_pricedata(portfolio, index, price_histories=price_histories)
+        except Exception as exc:
+            errors[name] = exc
+
+    fx_rates = {}
+    if currency and merged:
+        dates = pd.bdate_range(
+            min(frame.index.min() for frame in merged.values()),
+            max(frame.index.max() for frame in merged.values()),
+        )
+        fx_rates, fx_messages = share.fetch_fx_rates(tickers, currency, dates)
+        for message in fx_messages:
+            warnings.warn(message, RuntimeWarning)
+
+    def _jobs():
+        for name, frame in merged.items():
+            companies = set(frame.columns.get_level_values("Company"))
+            rates = {ticker: rate for ticker, rate in fx_rates.items() if ticker in companies}
+            yield name, (name, frame, index, out_dir, date, currency, rates)
+
+    workers = min(compute_pool.resolve_workers(workers), len(merged))
+    if workers > 1:
+        executor = compute_pool.get_executor(workers)
+        futures = {name: executor.submit(_write_summaries, *args) for name, args in _jobs()}
+        for name, future in futures.items():
+            try:
+                written[name] = future.result()
+            except Exception as exc:
+                errors[name] = exc
+    else:
+        for name, args in _jobs():
+            try:
+                written[name] = _write_summaries(*args)
+            except Exception as exc:
+                errors[name] = exc
+
+    return written, errors
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(
+        description="Write stock summaries for many portfolio CSV files, fetching shared tickers once."
+    )
+    parser.add_argument("source", help="Directory of portfolio CSV files, or a manifest listing them")
+    parser.add_argument("--index", default="SPY", help="Benchmark ticker (default SPY)")
+    parser.add_argument("--out", default="summaries", help="Output directory (default ./summaries)")
+    parser.add_argument("--date", default=None, help="Summary start date, eg 2020-01-01")
+    parser.add_argument("--currency", default=None, help="Report currency, eg AUD")
+    parser.add_argument(
+        "--workers", type=int, default=None, help="Worker processes (default CALC_WORKERS, 0 = every core)"
+    )
+    parser.add_argument("--no-cache", action="store_true", help="Do not read or update the price cache")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_args()
+    written, errors = run_batch(
+        args.source,
+        args.index,
+        args.out,
+        date=args.date,
+        currency=args.currency,
+        workers=args.workers,
+        use_cache=not args.no_cache,
+    )
+    print(f"Wrote summaries for {len(written)} portfolio(s) to {args.out}")
+    if errors:
+        print(f"{len(errors)} portfolio(s) failed:")
+        for name, exc in errors.items():
+            print(f"  - {name}: {type(exc).__name__}: {exc}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
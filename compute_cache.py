@@ -0,0 +1,160 @@
+import hashlib
+import os
+import pickle
+import sys
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+# Memory budget of the process-wide cache in MB. Override with COMPUTE_CACHE_MB (0 disables it).
+MAX_MB = float(os.getenv("COMPUTE_CACHE_MB", "256"))
+
+
+def fingerprint(*parts):
+    """
+    Content hash of the arguments. DataFrames and Series are hashed by their values, index,
+    labels and dtypes, containers element by element and anything else by repr().
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    for part in parts:
+        _update_digest(digest, part)
+    return digest.hexdigest()
+
+
+def _update_digest(digest, obj):
+    if isinstance(obj, (pd.DataFrame, pd.Series)):
+        digest.update(type(obj).__name__.encode())
+        digest.update(pd.util.hash_pandas_object(obj, index=True).to_numpy().tobytes())
+        if isinstance(obj, pd.DataFrame):
+            digest.update(repr((list(obj.columns), list(obj.columns.names), obj.dtypes.astype(str).tolist())).encode())
+        else:
+            digest.update(repr((obj.name, str(obj.dtype))).encode())
+    elif isinstance(obj, (list, tuple)):
+        digest.update(f"{type(obj).__name__}[{len(obj)}]".encode())
+        for item in obj:
+            _update_digest(digest, item)
+    elif isinstance(obj, dict):
+        digest.update(f"dict[{len(obj)}]".encode())
+        for key in sorted(obj, key=repr):
+            digest.update(repr(key).encode())
+            _update_digest(digest, obj[key])
+    else:
+        digest.update(repr(obj).encode())
+
+
+def _size_of(value):
+    """Approximate memory held by a cached value, in bytes."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(deep=True).sum())
+    if isinstance(value, pd.Series):
+        return int(value.memory_usage(deep=True))
+    if isinstance(getattr(value, "data", None), pd.DataFrame):
+        # pandas Styler
+        return _size_of(value.data)
+    if isinstance(value, dict):
+        return sum(_size_of(item) for item in value.values())
+    if isinstance(value, (list, tuple)):
+        return sum(_size_of(item) for item in value)
+    try:
+        return len(pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL))
+    except Exception:
+        return sys.getsizeof(value)
+
+
+class ComputeCache:
+    """
+    Thread-safe LRU cache of computed results, bounded by the approximate memory they hold.
+    Concurrent requests for the same missing key compute it once.
+    """
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    def _lookup(self, key):
+        """Return (True, value) and mark the entry as recently used, or (False, None)."""
+        with self._lock:
+            if key not in self._entries:
+                return False, None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key][0]
+
+    def _store(self, key, value):
+        size = _size_of(value)
+        with self._lock:
+            if size > self.max_bytes:
+                return
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted) = self._entries.popitem(last=False)
+                self._bytes -= evicted
+
+    def get_or_compute(self, key, compute):
+        """
+        Return the cached value for a hashable key, calling compute() to create it on a miss.
+        Cached values are shared between callers and must not be modified.
+        """
+        found, value = self._lookup(key)
+        if found:
+            return value
+
+        with self._lock:
+            flight = self._inflight.setdefault(key, threading.Lock())
+        with flight:
+            # Another caller may have computed it while we waited
+            found, value = self._lookup(key)
+            if found:
+                return value
+            try:
+                with self._lock:
+                    self.misses += 1
+                value = compute()
+                self._store(key, value)
+            finally:
+                with self._lock:
+                    self._inflight.pop(key, None)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+# Shared by every session (and rerun) served by this process
+_cache = ComputeCache(max_bytes=int(MAX_MB * 2**20))
+
+
+def get_or_compute(key, compute):
+    """Look up key in the process-wide cache, see ComputeCache.get_or_compute()."""
+    return _cache.get_or_compute(key, compute)
+
+
+def clear():
+    """Drop every entry from the process-wide cache."""
+    _cache.clear()
+
+
+def stats():
+    """Entry count, memory use and hit/miss counters of the process-wide cache."""
+    return _cache.stats()
@@ -0,0 +1,144 @@
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from multiprocessing import shared_memory
+
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_numeric_dtype
+
+# Default number of worker processes for the column-parallel DWR series in performance_calcs. 1
+# keeps every calculation in the calling process. Override with CALC_WORKERS (0 uses every core).
+WORKERS = int(os.getenv("CALC_WORKERS", "1"))
+
+# forkserver is safe to start from a multi-threaded process such as the Streamlit server
+_START_METHOD = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+
+_executor = None
+_executor_size = 0
+_executor_lock = threading.Lock()
+
+
+def resolve_workers(workers=None):
+    """Number of worker processes for a workers= argument, None means WORKERS and 0 every core."""
+    workers = WORKERS if workers is None else int(workers)
+    if workers < 1:
+        return os.cpu_count() or 1
+    return workers
+
+
+def get_executor(workers):
+    """Return the shared process pool, growing it if fewer than `workers` processes are running."""
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor is None or _executor_size < workers:
+            if _executor is not None:
+                # Work already submitted to the old pool still completes
+                _executor.shutdown(wait=False)
+            context = multiprocessing.get_context(_START_METHOD)
+            if _START_METHOD == "forkserver":
+                # Import numpy/pandas once in the server instead of in every worker
+                context.set_forkserver_preload([__name__])
+            _executor = ProcessPoolExecutor(max_workers=workers, mp_context=context)
+            _executor_size = workers
+        return _executor
+
+
+def _discard_executor(executor):
+    global _executor, _executor_size
+    with _executor_lock:
+        if _executor is executor:
+            _executor, _executor_size = None, 0
+
+
+def can_split(frames, workers):
+    """
+    True if the frames can be computed in column chunks on `workers` processes: at least two
+    numeric columns, unique labels, and the same index and columns in every frame.
+    """
+    first = frames[0]
+    if workers < 2 or not all(isinstance(frame, pd.DataFrame) for frame in frames):
+        return False
+    if first.shape[1] < 2 or not first.columns.is_unique:
+        return False
+    return all(
+        frame.index.equals(first.index)
+        and frame.columns.equals(first.columns)
+        and all(is_numeric_dtype(dtype) for dtype in frame.dtypes)
+        for frame in frames
+    )
+
+
+def _attach(name):
+    try:
+        # Python 3.13+: the creating process owns the segment, do not track it here as well
+        return shared_memory.SharedMemory(name=name, track=False)
+    except TypeError:
+        return shared_memory.SharedMemory(name=name)
+
+
+def _run_chunk(func, shm_name, shape, cols, index, columns, kwargs):
+    """Worker side of map_columns: copy this chunk's columns out of shared memory and run func."""
+    shm = _attach(shm_name)
+    try:
+        block = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        frames = [pd.DataFrame(block[k][:, cols], index=index, columns=columns) for k in range(shape[0])]
+        del block
+    finally:
+        shm.close()
+    return func(*frames, **kwargs)
+
+
+def map_columns(func, frames, n_chunks, **kwargs):
+    """
+    Run func(*frames, **kwargs) on column chunks of the frames across the process pool.
+
+    The frame values are copied once into a shared-memory block that every worker reads its
+    own columns from, so only the index, the column labels and the results are pickled.
+
+    Parameters
+    ----------
+    func : callable
+        Module-level function run in the workers. It receives one DataFrame per frame holding
+        only the chunk's columns.
+    frames : list of pandas.DataFrame
+        Numeric frames with identical index and columns, see can_split().
+    n_chunks : int
+        Number of column chunks, one per worker process.
+    **kwargs
+        Passed unchanged to every call.
+
+    Returns
+    -------
+    results : list
+        func's return value for each chunk. Columns are dealt to the chunks round-robin so
+        that long and short histories are spread evenly over the workers.
+    """
+    columns = frames[0].columns
+    n_chunks = max(1, min(n_chunks, len(columns)))
+    positions = [np.arange(i, len(columns), n_chunks) for i in range(n_chunks)]
+    shape = (len(frames), len(frames[0]), len(columns))
+
+    shm = shared_memory.SharedMemory(create=True, size=max(int(np.prod(shape)) * 8, 1))
+    try:
+        block = np.ndarray(shape, dtype=float, buffer=shm.buf)
+        for k, frame in enumerate(frames):
+            block[k] = frame.to_numpy(dtype=float)
+        del block
+
+        executor = get_executor(n_chunks)
+        futures = [
+            executor.submit(_run_chunk, func, shm.name, shape, cols, frames[0].index, columns[cols], kwargs)
+            for cols in positions
+        ]
+        try:
+            results = [future.result() for future in futures]
+        except BrokenProcessPool:
+            _discard_executor(executor)
+            raise
+    finally:
+        shm.close()
+        shm.unlink()
+    return results
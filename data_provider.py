@@ -67,7 +67,7 @@ def set_data_provider(provider: str):
         with open(env_path, 'w') as f:
             f.write(f"DATA_PROVIDER={provider}\n")
 
-def merge_pricedata(portfolio, index):
+def merge_pricedata(portfolio, index, progress=None):
     """
     Get stock data using the configured data provider.
     
@@ -77,6 +77,9 @@ def merge_pricedata(portfolio, index):
         portfolio dataframe generated by get_userdata().
     index : string
         stock ticker to compare portfolio performance.
+    progress : callable, optional
+        Called as progress(ticker, status) as each ticker's prices are resolved, see the
+        provider modules for the statuses. The default is None.
         
     Returns
     -------
@@ -86,10 +89,10 @@ def merge_pricedata(portfolio, index):
     provider = get_data_provider()
     
     if provider == 'yfinance':
-        return share.merge_pricedata(portfolio, index)
+        return share.merge_pricedata(portfolio, index, progress=progress)
     elif provider == 'alpha_vantage':
-        return av.merge_pricedata(portfolio, index)
+        return av.merge_pricedata(portfolio, index, progress=progress)
     elif provider == 'finnhub':
-        return fh.merge_pricedata(portfolio, index)
+        return fh.merge_pricedata(portfolio, index, progress=progress)
     else:
         raise ValueError(f"Unknown data provider: {provider}") 
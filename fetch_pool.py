@@ -0,0 +1,119 @@
+import os
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+# Maximum number of concurrent requests. Override with the FETCH_MAX_WORKERS environment variable.
+MAX_WORKERS = int(os.getenv("FETCH_MAX_WORKERS", "8"))
+
+# Maximum requests per second sent to a single host. Override with FETCH_RATE_LIMIT (0 disables).
+RATE_LIMIT = float(os.getenv("FETCH_RATE_LIMIT", "4"))
+
+# Seconds a single ticker's fetch may run before it is abandoned. Override with FETCH_DEADLINE.
+DEADLINE = float(os.getenv("FETCH_DEADLINE", "45"))
+
+# Host key used for all Yahoo Finance requests
+YAHOO = "yahoo"
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+class RateLimiter:
+    """
+    Spaces out calls so that at most `rate` calls per second are started, across all threads.
+    """
+
+    def __init__(self, rate):
+        self.interval = 1.0 / rate if rate and rate > 0 else 0.0
+        self._next_slot = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        """Block until the caller may send its next request."""
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def get_rate_limiter(host):
+    """Return the shared rate limiter for a host, creating it on first use."""
+    with _limiters_lock:
+        if host not in _limiters:
+            _limiters[host] = RateLimiter(RATE_LIMIT)
+        return _limiters[host]
+
+
+def throttle(host=YAHOO):
+    """Wait for the host's rate limiter. Call immediately before each network request."""
+    get_rate_limiter(host).wait()
+
+
+def fetch_all(func, keys, max_workers=None, deadline=None):
+    """
+    Run func(key) for every key on a bounded thread pool.
+
+    Parameters
+    ----------
+    func : callable
+        Called once per key. Network requests inside func should call throttle() so the
+        per-host rate limit is shared with every other fetch in the process.
+    keys : iterable
+        Hashable keys, typically tickers or currency pairs. Duplicates are fetched once.
+    max_workers : int, optional
+        Maximum concurrent calls. The default is MAX_WORKERS.
+    deadline : float, optional
+        Seconds a single call may run before it is abandoned and reported as a TimeoutError.
+        The default is DEADLINE.
+
+    Returns
+    -------
+    results : dict
+        key -> return value of func for calls that completed.
+    errors : dict
+        key -> exception for calls that raised or missed their deadline.
+    """
+    keys = list(dict.fromkeys(keys))
+    results = {}
+    errors = {}
+    if not keys:
+        return results, errors
+
+    max_workers = max(1, min(max_workers or MAX_WORKERS, len(keys)))
+    deadline = DEADLINE if deadline is None else deadline
+    started = {}
+
+    def _run(key):
+        started[key] = time.monotonic()
+        return func(key)
+
+    executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fetch")
+    futures = {executor.submit(_run, key): key for key in keys}
+    pending = set(futures)
+    try:
+        while pending:
+            done, pending = wait(pending, timeout=0.25, return_when=FIRST_COMPLETED)
+            for future in done:
+                key = futures[future]
+                try:
+                    results[key] = future.result()
+                except Exception as exc:
+                    errors[key] = exc
+
+            # Abandon calls that have been running longer than the deadline
+            now = time.monotonic()
+            for future in list(pending):
+                key = futures[future]
+                if key in started and now - started[key] > deadline:
+                    pending.discard(future)
+                    errors[key] = TimeoutError(f"no response within {deadline:g}s")
+    finally:
+        # Do not wait on abandoned calls, they finish (or time out) in the background
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    return results, errors
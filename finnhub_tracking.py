@@ -15,7 +15,7 @@ load_dotenv()
 # Initialize Finnhub client
 finnhub_client = finnhub.Client(api_key=os.getenv('FINNHUB_API_KEY'))
 
-def merge_pricedata(portfolio, index):
+def merge_pricedata(portfolio, index, progress=None):
     """
     Reads portfolio dataframe generated by get_userdata(), and extracts a list of stock tickers in
     the portfolio. Uses Finnhub API to get time series stock price data for the stocks listed and 
@@ -29,6 +29,9 @@ def merge_pricedata(portfolio, index):
     index : string
         stock ticker to compare portfolio performance. Typically this would be the ticker
         of an ETF that tracks an index, eg "SPY" which tracks the S&P 500 index.
+    progress : callable, optional
+        Called as progress(ticker, status) after each ticker, with status "fetched" or
+        "failed". The default is None.
 
     Returns
     -------
@@ -49,6 +52,7 @@ def merge_pricedata(portfolio, index):
     print("\nAPI call in progress...\n")
     fetched_tickers = []
     failed_tickers = {}
+    blocks = []
 
     # Extract list of portfolio tickers
     tickers = list(portfolio.columns.levels[1]) + [index]
@@ -71,18 +75,22 @@ def merge_pricedata(portfolio, index):
                 
                 df.columns = cols
                 
-                # Merge portfolio and prices dataframes
-                portfolio = pd.merge(
-                    portfolio, df, how="outer", left_index=True, right_index=True
-                ).drop_duplicates()
+                # Collect price blocks, they are aligned onto the portfolio in one pass below
+                blocks.append(df[~df.index.duplicated(keep="last")])
                 fetched_tickers.append(i)
+                if progress is not None:
+                    progress(i, "fetched")
             else:
                 print(f"Error: No data available for stock ticker {i}. Skipping...")
                 failed_tickers[i] = f"status={candle_data.get('s')}"
+                if progress is not None:
+                    progress(i, "failed")
                 
         except Exception as e:
             print(f"Error fetching data for {i}: {str(e)}")
             failed_tickers[i] = f"{type(e).__name__}: {e}"
+            if progress is not None:
+                progress(i, "failed")
             continue
 
     print("API call complete\n")
@@ -91,6 +99,14 @@ def merge_pricedata(portfolio, index):
         for ticker, reason in failed_tickers.items():
             print(f"  - {ticker}: {reason}")
 
+    # Align all price blocks onto one business-day index with a single concat
+    if blocks:
+        frames = [portfolio] + blocks
+        bday_index = pd.bdate_range(
+            min(f.index.min() for f in frames), max(f.index.max() for f in frames)
+        )
+        portfolio = pd.concat([f.reindex(bday_index) for f in frames], axis=1)
+
     # Set to 'Business day' datetime frequency
     portfolio = portfolio.sort_index().asfreq(freq="B")
     portfolio.attrs["price_fetch"] = {
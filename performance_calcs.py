@@ -2,8 +2,13 @@ import numpy as np
 import pandas as pd
 import numpy_financial as npf
 
+import compute_pool
+
 
 def _resolve_dwr_resample_freq(val, resample_freq, base_rows):
+    if resample_freq in ["exact", "W-FRI", "BME", "BQE"]:
+        # Already resolved, e.g. by the caller of a column chunk
+        return resample_freq
     if resample_freq == "auto":
         num_rows = len(val)
         if isinstance(val, pd.DataFrame):
@@ -18,14 +23,374 @@ def _resolve_dwr_resample_freq(val, resample_freq, base_rows):
         if work_units <= base_rows * 30:
             return "BME"
         return "BQE"
-    if resample_freq not in ["W", "M", "Q"]:
-        raise ValueError("resample_freq must be 'auto', 'W', 'M', or 'Q'")
+    if resample_freq not in ["B", "W", "M", "Q"]:
+        raise ValueError("resample_freq must be 'auto', 'exact', 'B', 'W', 'M', or 'Q'")
+    if resample_freq == "B":
+        return "B"
     if resample_freq == "W":
         return "W-FRI"
     if resample_freq == "M":
         return "BME"
     return "BQE"
 
+
+def _irr_sign_changes(coef):
+    """
+    Count sign changes between consecutive non-zero coefficients of each row.
+    Rows with no sign change have no IRR (Descartes' rule of signs).
+    """
+    signs = np.sign(coef)
+    nonzero = signs != 0
+    cols = np.arange(coef.shape[1])
+    last_nonzero = np.maximum.accumulate(np.where(nonzero, cols, -1), axis=1)
+    prev_idx = np.concatenate(
+        [np.full((coef.shape[0], 1), -1), last_nonzero[:, :-1]], axis=1
+    )
+    prev_sign = np.where(
+        prev_idx >= 0, np.take_along_axis(signs, np.maximum(prev_idx, 0), axis=1), 0
+    )
+    return (nonzero & (prev_sign != 0) & (signs != prev_sign)).sum(axis=1)
+
+
+def _irr_bracket(coef, tau):
+    """
+    Bounds on the log growth rate w that contain every real root of
+    sum(coef * exp(w * tau)). Beyond the bounds the earliest (w > 0) or the latest
+    (w < 0) cash flow dominates the sum.
+    """
+    nonzero = coef != 0
+    abs_sum = np.abs(coef).sum(axis=1)
+
+    def _dominant_bound(order_tau):
+        first = np.argmax(np.where(nonzero, order_tau, -np.inf), axis=1)
+        first_tau = np.take_along_axis(order_tau, first[:, None], axis=1)[:, 0]
+        first_coef = np.take_along_axis(coef, first[:, None], axis=1)[:, 0]
+        masked = np.where(nonzero, order_tau, -np.inf)
+        np.put_along_axis(masked, first[:, None], -np.inf, axis=1)
+        gap = first_tau - masked.max(axis=1)
+        gap = np.where(np.isfinite(gap) & (gap > 0), gap, np.inf)
+        with np.errstate(divide="ignore", invalid="ignore"):
+            bound = np.log(abs_sum / np.abs(first_coef)) / gap
+        return np.nan_to_num(bound, nan=0.0, posinf=0.0) * 1.01 + 1e-9, first_coef
+
+    upper, upper_coef = _dominant_bound(tau)
+    lower, lower_coef = _dominant_bound(-tau)
+    # Keep exp(w * tau) inside the float64 range.
+    tau_max = np.maximum(np.abs(tau).max(axis=1), 1e-12)
+    upper = np.minimum(upper, 700.0 / tau_max)
+    lower = -np.minimum(lower, 700.0 / tau_max)
+    return lower, upper, np.sign(lower_coef), np.sign(upper_coef)
+
+
+def _irr_npv(coef, tau, w):
+    """sum(coef * exp(w * tau)) of every row at the log growth rate w (one value per row)."""
+    return (coef * np.exp(np.clip(w[:, None] * tau, -700.0, 700.0))).sum(axis=1)
+
+
+def _solve_irr_terms(coef, tau, seed=None, tol=1e-12, maxiter=100, bracket=None):
+    """
+    Vectorized safeguarded Newton solve of sum(coef * exp(w * tau)) = 0 for each row.
+
+    coef/tau are 2-D (problems x cash flows) with columns in chronological order and tau
+    the time from each cash flow to the end of its stream. w is the log growth rate per
+    unit of tau, so the periodic IRR is exp(w) - 1. Where the root is bracketed Newton
+    falls back to bisection, otherwise it runs undamped from the seed. bracket optionally
+    gives per-row (lower, upper) bounds to search instead of the bounds on every root.
+
+    Returns (w, resolved): w is NaN where no root was found; resolved is False only for
+    rows that failed to converge (rows without a sign change are resolved as NaN).
+    """
+    coef = np.asarray(coef, dtype=float)
+    tau = np.asarray(tau, dtype=float)
+    num_rows = coef.shape[0]
+    w_out = np.full(num_rows, np.nan)
+    resolved = np.ones(num_rows, dtype=bool)
+    if num_rows == 0:
+        return w_out, resolved
+
+    finite = np.isfinite(coef).all(axis=1)
+    has_root = finite & (_irr_sign_changes(np.where(np.isfinite(coef), coef, 0.0)) > 0)
+    rows = np.flatnonzero(has_root)
+    if rows.size == 0:
+        return w_out, resolved
+
+    coef = coef[rows]
+    tau = tau[rows]
+    if bracket is None:
+        lower, upper, lower_sign, upper_sign = _irr_bracket(coef, tau)
+    else:
+        lower, upper = (np.asarray(bound, dtype=float)[rows] for bound in bracket)
+        lower_sign = np.sign(_irr_npv(coef, tau, lower))
+        upper_sign = np.sign(_irr_npv(coef, tau, upper))
+    bracketed = lower_sign * upper_sign < 0
+
+    if seed is None:
+        # Modified-Dietz estimate of the growth over the stream as a closed-form seed.
+        horizon = np.maximum(tau.max(axis=1), 1e-12)
+        weighted_capital = (-coef * tau).sum(axis=1) / horizon
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dietz = coef.sum(axis=1) / weighted_capital
+        dietz = np.where(np.isfinite(dietz) & (weighted_capital > 0), dietz, 0.0)
+        w = np.log1p(np.clip(dietz, -0.99, None)) / horizon
+    else:
+        w = np.nan_to_num(np.asarray(seed, dtype=float)[rows], nan=0.0)
+    w = np.clip(w, lower, upper)
+
+    # Bracket ends where the stream value is negative / positive.
+    neg_end = np.where(lower_sign < 0, lower, upper)
+    pos_end = np.where(lower_sign < 0, upper, lower)
+    prev_step = upper - lower
+    converged = np.zeros(rows.size, dtype=bool)
+    active = np.arange(rows.size)
+
+    for _ in range(maxiter):
+        c = coef[active]
+        t = tau[active]
+        wa = w[active]
+        terms = c * np.exp(np.clip(wa[:, None] * t, -700.0, 700.0))
+        f = terms.sum(axis=1)
+        df = (terms * t).sum(axis=1)
+        scale = np.abs(terms).sum(axis=1)
+
+        br = bracketed[active]
+        neg_end[active] = np.where(br & (f < 0), wa, neg_end[active])
+        pos_end[active] = np.where(br & (f > 0), wa, pos_end[active])
+
+        with np.errstate(divide="ignore", invalid="ignore"):
+            w_new = wa - f / df
+        lo = np.minimum(neg_end[active], pos_end[active])
+        hi = np.maximum(neg_end[active], pos_end[active])
+        # Bisect when Newton leaves the bracket or is not at least halving the step.
+        slow = np.abs(2.0 * f) > np.abs(prev_step[active] * df)
+        outside = ~np.isfinite(w_new) | (w_new <= lo) | (w_new >= hi) | slow
+        w_new = np.where(br & outside, 0.5 * (lo + hi), w_new)
+        w_new = np.where(~br, np.clip(w_new, lower[active], upper[active]), w_new)
+
+        step = np.abs(w_new - wa)
+        prev_step[active] = step
+        done = (f == 0) | (step <= tol * (1.0 + np.abs(wa)))
+        done &= np.abs(f) <= 1e-9 * np.maximum(scale, 1e-300)
+        done |= br & (hi - lo <= tol * (1.0 + np.abs(wa)))
+        w[active] = np.where(f == 0, wa, w_new)
+        converged[active[done]] = True
+        active = active[~done & np.isfinite(w_new)]
+        if active.size == 0:
+            break
+
+    w_out[rows[converged]] = w[converged]
+    resolved[rows[~converged]] = False
+    return w_out, resolved
+
+
+def batched_irr(cash_flows, tol=1e-12, maxiter=100, times=None):
+    '''
+    Periodic internal rate of return of many cash streams at once, a vectorized replacement for
+    calling numpy_financial.irr on each stream.
+
+    Every row of cash_flows is one stream of equally spaced cash flows, in chronological order.
+    Only the non-zero flows of each row enter the NPV sums, so long sparse streams (e.g. daily
+    flows with a handful of trades and dividends) are solved as quickly as short ones. The roots
+    are found with a safeguarded Newton iteration that falls back to bisection wherever the root
+    is bracketed. A stream with several roots gets the one closest to zero, as from
+    numpy_financial.irr, and the DWR series (_prefix_irr) picks its roots the same way so its
+    last row matches the *_endpoint functions. Leading zeros do not change a stream's IRR, so
+    streams of different lengths can be stacked by zero-padding them at the front.
+
+    Parameters
+    ----------
+    cash_flows : array-like
+        2-D array (streams x periods) of cash flows, or a single 1-D stream.
+    times : array-like, optional
+        Date of every cash flow (e.g. day numbers), 1-D shared by all streams or the same shape
+        as cash_flows, for an XIRR-style solve with irregular spacing. Each stream is
+        discounted to the time of its last column and the rates are per unit of times. The
+        default is equally spaced periods.
+    tol : float, optional
+        Convergence tolerance on the log growth rate per period. The default is 1e-12.
+    maxiter : int, optional
+        Maximum number of Newton/bisection iterations. The default is 100.
+
+    Returns
+    -------
+    irr : numpy.ndarray or float
+        Periodic IRR of every stream (a float for a 1-D input). NaN where the stream has no
+        root: no sign change, non-finite flows, or no convergence within maxiter.
+    '''
+    flows = np.asarray(cash_flows, dtype=float)
+    single = flows.ndim == 1
+    flows = np.atleast_2d(flows)
+    n_streams, n_periods = flows.shape
+    periodic = times is None
+    if periodic:
+        times = np.arange(n_periods, dtype=float)
+    times = np.broadcast_to(np.asarray(times, dtype=float), flows.shape)
+
+    # Pack the non-zero flows of every row to the left, with their time to the end of the stream
+    rows, cols = np.nonzero(flows != 0)
+    values = flows[rows, cols]
+    to_end = times[rows, -1] - times[rows, cols]
+    if periodic or not len(rows):
+        counts = np.bincount(rows, minlength=n_streams)
+    else:
+        # Flows at the same time are one term; the root bracket assumes distinct times
+        order = np.lexsort((-to_end, rows))
+        rows, values, to_end = rows[order], values[order], to_end[order]
+        starts = np.flatnonzero(np.r_[True, (np.diff(rows) != 0) | (np.diff(to_end) != 0)])
+        values = np.add.reduceat(values, starts)
+        keep = values != 0
+        rows, values, to_end = rows[starts][keep], values[keep], to_end[starts][keep]
+        counts = np.bincount(rows, minlength=n_streams)
+    slot = np.arange(len(rows)) - np.repeat(np.cumsum(counts) - counts, counts)
+    width = max(int(counts.max(initial=0)), 1)
+    coef = np.zeros((n_streams, width))
+    tau = np.zeros((n_streams, width))
+    coef[rows, slot] = values
+    tau[rows, slot] = to_end
+
+    w, _ = _irr_root_nearest_zero(coef, tau, tol=tol, maxiter=maxiter)
+    rates = np.expm1(w)
+    return float(rates[0]) if single else rates
+
+
+# Growth over the whole stream (log scale) at which the NPV is sampled to locate the root closest
+# to a zero rate, from 0.0001 % up to the exp(700) float limit on either side of zero.
+_IRR_SCAN_GROWTH = np.geomspace(1e-6, 700.0, 48)
+
+
+def _irr_root_nearest_zero(coef, tau, tol=1e-12, maxiter=100):
+    """
+    Log growth rate w of the root closest to a zero IRR in every row, the root numpy_financial.irr
+    returns for streams with several. Rows with a single sign change have one root and are solved
+    directly. For the others the NPV is sampled on a grid either side of w = 0, the nearest sign
+    change on each side is solved within its bracket and the smaller rate is kept; rows without a
+    sign change on the grid are solved from the closed-form seed.
+
+    Returns (w, resolved) as _solve_irr_terms() does.
+    """
+    coef = np.asarray(coef, dtype=float)
+    tau = np.asarray(tau, dtype=float)
+    w = np.full(coef.shape[0], np.nan)
+    resolved = np.ones(coef.shape[0], dtype=bool)
+    multi_root = _irr_sign_changes(np.where(np.isfinite(coef), coef, 0.0)) > 1
+
+    single = np.flatnonzero(~multi_root)
+    if single.size:
+        w[single], resolved[single] = _solve_irr_terms(coef[single], tau[single], tol=tol, maxiter=maxiter)
+    multi = np.flatnonzero(multi_root)
+    if multi.size:
+        w[multi], resolved[multi] = _scan_irr_root_nearest_zero(coef[multi], tau[multi], tol=tol, maxiter=maxiter)
+    return w, resolved
+
+
+def _scan_irr_root_nearest_zero(coef, tau, tol=1e-12, maxiter=100):
+    """Grid scan of _irr_root_nearest_zero() for rows that may have several roots."""
+    n_rows = coef.shape[0]
+    lower, upper, _, _ = _irr_bracket(coef, tau)
+    horizon = np.maximum(tau.max(axis=1, initial=0.0), 1e-12)
+    growth = np.concatenate([-_IRR_SCAN_GROWTH[::-1], [0.0], _IRR_SCAN_GROWTH])
+    grid = np.clip(growth[None, :] / horizon[:, None], lower[:, None], upper[:, None])
+    signs = np.sign(np.column_stack([_irr_npv(coef, tau, grid[:, k]) for k in range(grid.shape[1])]))
+
+    zero = len(_IRR_SCAN_GROWTH)
+    change = (signs[:, :-1] * signs[:, 1:] < 0) | (signs[:, :-1] == 0)
+    cols = np.arange(change.shape[1])
+    right = np.where(change & (cols >= zero), cols, change.shape[1]).min(axis=1)
+    left = np.where(change & (cols < zero), cols, -1).max(axis=1)
+
+    candidates = []
+    for side, found in [(right, right < change.shape[1]), (left, left >= 0)]:
+        k = np.clip(side, 0, change.shape[1] - 1)
+        bounds = (grid[np.arange(n_rows), k], grid[np.arange(n_rows), k + 1])
+        w = np.full(n_rows, np.nan)
+        rows = np.flatnonzero(found)
+        if rows.size:
+            w[rows], _ = _solve_irr_terms(
+                coef[rows], tau[rows], tol=tol, maxiter=maxiter, bracket=(bounds[0][rows], bounds[1][rows])
+            )
+        candidates.append(w)
+    right_w, left_w = candidates
+    w = np.where(np.isnan(right_w) | (np.abs(np.expm1(left_w)) < np.abs(np.expm1(right_w))), left_w, right_w)
+
+    resolved = np.ones(n_rows, dtype=bool)
+    unscanned = np.flatnonzero(np.isnan(w))
+    if unscanned.size:
+        w[unscanned], resolved[unscanned] = _solve_irr_terms(coef[unscanned], tau[unscanned], tol=tol, maxiter=maxiter)
+    return w, resolved
+
+
+def _prefix_irr(flows, terminal, tol=1e-12, max_terms=2_000_000, times=None):
+    """
+    Periodic IRR of every prefix cash stream [flows[0], ..., flows[k], terminal[k]].
+
+    Gives the same result as calling npf.irr once per period, but all prefixes are solved
+    together over a 2-D (prefix x non-zero cash flow) NPV matrix. The root is picked by
+    _irr_root_nearest_zero(), as in batched_irr(), so a prefix with several roots gets the one
+    closest to zero. Single-root prefixes the closed-form seed cannot resolve are warm-started
+    from the previous period's rate, and npf.irr is only used for streams neither pass
+    converges on.
+
+    With times (e.g. day numbers) flow k is dated times[k] and terminal[k] is valued on the
+    same date instead of one period later, and the rates are per unit of times.
+    """
+    flows = np.asarray(flows, dtype=float)
+    terminal = np.asarray(terminal, dtype=float)
+    num_periods = len(flows)
+    log_rates = np.full(num_periods, np.nan)
+    if num_periods == 0:
+        return log_rates
+
+    if times is None:
+        flow_time = np.arange(num_periods, dtype=float)
+        end_time = flow_time + 1
+    else:
+        flow_time = end_time = np.asarray(times, dtype=float)
+
+    flow_pos = np.flatnonzero(flows != 0)
+    flow_val = flows[flow_pos]
+    invalid = (np.cumsum(np.isnan(flows)) > 0) | np.isnan(terminal)
+    block = max(1, max_terms // (len(flow_pos) + 1))
+
+    for start in range(0, num_periods, block):
+        k = np.arange(start, min(start + block, num_periods))
+        n_used = np.searchsorted(flow_pos, k[-1], side="right")
+        pos = flow_pos[:n_used]
+        if times is None:
+            paid = pos[None, :] <= k[:, None]
+            final = terminal[k]
+        else:
+            # A flow on the valuation date shares its tau with the terminal value; merge them
+            paid = pos[None, :] < k[:, None]
+            final = terminal[k] + flows[k]
+        coef = np.column_stack([np.where(paid, flow_val[None, :n_used], 0.0), final])
+        tau = np.column_stack(
+            [end_time[k][:, None] - flow_time[pos][None, :], np.zeros(len(k))]
+        )
+        w, resolved = _irr_root_nearest_zero(coef, tau, tol=tol)
+
+        if not resolved.all():
+            # Warm start from the previous period's rate. Only safe where the root is unique,
+            # other streams go to npf.irr.
+            previous = pd.Series(np.concatenate([log_rates[:start], w])).ffill().shift(1)
+            seed = previous.to_numpy()[start:]
+            single_root = _irr_sign_changes(np.nan_to_num(coef)) == 1
+            retry = np.flatnonzero(~resolved & ~np.isnan(seed) & single_root)
+            if retry.size:
+                w_retry, resolved_retry = _solve_irr_terms(
+                    coef[retry], tau[retry], seed=seed[retry], tol=tol
+                )
+                w[retry] = w_retry
+                resolved[retry] = resolved_retry
+
+        # npf.irr needs equally spaced periods
+        for i in np.flatnonzero(~resolved & ~invalid[k] & (times is None)):
+            period_end = k[i]
+            rate = npf.irr(np.concatenate([flows[: period_end + 1], [terminal[period_end]]]))
+            w[i] = np.log1p(rate) if pd.notna(rate) and rate > -1 else np.nan
+        log_rates[k] = w
+
+    log_rates[invalid] = np.nan
+    return np.expm1(log_rates)
+
 def prepare_data(*args, date=None):
         """
         Helper function
@@ -53,28 +418,124 @@ def prepare_data(*args, date=None):
         return prepared_data
     
 
-def _elapsed_years_from_first_nonzero(val, periods_per_year=261):
+def _column_workers(workers, *frames):
+    """Number of processes to split the frames' columns over, 0 to compute in this process."""
+    workers = compute_pool.resolve_workers(workers)
+    return workers if compute_pool.can_split(frames, workers) else 0
+
+
+def _map_columns(func, frames, n_workers, **kwargs):
+    """Run func on column chunks in the process pool and reassemble the results in column order."""
+    results = compute_pool.map_columns(func, frames, n_workers, **kwargs)
+    combined = pd.concat(results, axis=1)
+    return combined.reindex(frames[0].columns.rename(combined.columns.name), axis=1)
+
+
+def _elapsed_years_from_first_nonzero(val, periods_per_year=261, calendar_days=False):
     """
     Compute elapsed years from the first non-zero value.
     Uses a minimum elapsed period of 1/periods_per_year to avoid zero-year exponents.
+    With calendar_days=True the elapsed time is counted in actual days between the index
+    dates (365.25 per year) instead of index rows, with the first day counting as one day.
     """
+    if not isinstance(val, (pd.Series, pd.DataFrame)):
+        raise TypeError("Input must be pandas Series or DataFrame")
+
+    # First non-zero row of every column, all-zero columns keep 1 year throughout
+    nonzero = val.to_numpy().reshape(len(val), -1) != 0
+    start = nonzero.argmax(axis=0)
+    held = nonzero.any(axis=0)
+
+    if calendar_days:
+        days = pd.DatetimeIndex(val.index).to_numpy(dtype='datetime64[D]').astype(np.int64)
+        steps = days[:, None] - days[start] + 1
+        per_year = 365.25
+    else:
+        steps = np.arange(len(val))[:, None] - start + 1
+        per_year = periods_per_year
+
+    elapsed = np.where(held & (steps > 0), steps / per_year, 1.0)
+
     if isinstance(val, pd.Series):
-        if (val == 0).all():
-            return pd.Series(1.0, index=val.index, name=val.name)
+        return pd.Series(elapsed[:, 0], index=val.index, name=val.name)
+    return pd.DataFrame(elapsed, index=val.index, columns=val.columns)
 
-        start_index = val[val != 0].index[0]
-        elapsed = pd.Series(1.0, index=val.index, name=val.name, dtype=float)
-        elapsed_steps = (np.arange(len(val.loc[start_index:])) + 1) / periods_per_year
-        elapsed.loc[start_index:] = elapsed_steps
-        return elapsed
 
-    if isinstance(val, pd.DataFrame):
-        elapsed_df = pd.DataFrame(index=val.index, columns=val.columns, dtype=float)
-        for col in val.columns:
-            elapsed_df[col] = _elapsed_years_from_first_nonzero(val[col], periods_per_year)
-        return elapsed_df
+def _modified_dietz_arrays(v, c, divs, use_initial_CF=False):
+    """
+    Modified-Dietz return arrays for 2-D val/cash flow arrays, one per entry of divs (None for a
+    price-only return). Each column starts from its first non-zero value; the arrays are cleaned
+    (0/0 -> 0, -1 and pre-start rows -> NaN) but not yet forward filled.
+    Also returns the held mask and first non-zero row of every column.
+    """
+    n_rows, n_cols = v.shape
+
+    # First non-zero row of each column and the step count since then
+    nonzero = v != 0
+    held = nonzero.any(axis=0)
+    start = nonzero.argmax(axis=0)
+    t = (np.arange(n_rows)[:, None] - start).astype(float)
+    after_start = t > 0
+
+    # Only use the val column for intial val/cost base if use_initial_CF == False
+    # and the first row is non-zero (i.e. there are no holdings at the start date)
+    # Otherwise the first cash flow can be used as the intial portfolio val (V0)
+    # This matches the methodology used for Basic Return calc.
+    cols = np.arange(n_cols)
+    if use_initial_CF != False:
+        V0 = c[start, cols]
+    else:
+        V0 = np.where(v[0] == 0, c[start, cols], v[start, cols])
+
+    flows = np.where(after_start, c, 0.0)
+    CF_sum = np.cumsum(flows, axis=0)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        CF_time = -1 * np.cumsum(flows * t, axis=0) / t + CF_sum
+
+    returns = []
+    for d in divs:
+        numerator = v - V0 - CF_sum
+        if d is not None:
+            numerator = numerator + np.cumsum(np.where(t >= 0, d, 0.0), axis=0)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            mdr = numerator / (V0 + CF_time)
+
+        # The start row has no time-weighted cash flows, 0/0 periods count as no return
+        mdr = np.where(after_start, mdr, 0.0)
+        mdr[np.isnan(mdr)] = 0
+        # Treat a 100 % loss as accum = 0 rather than share price = 0
+        # and Forward fill the previous return
+        mdr[mdr == -1] = np.nan
+        mdr[t < 0] = np.nan
+        returns.append(mdr)
+
+    return returns, held, start
+
+
+def _modified_dietz_returns(val, cash_flows, div=None, use_initial_CF=False):
+    """
+    Modified-Dietz return for every column of ``val`` computed in a single matrix pass.
+    Each column starts from its first non-zero value; rows before that are NaN and columns
+    with no holdings are 0.
+    """
+    columns = val.columns
+    if len(columns) == 0:
+        return pd.DataFrame([])
+
+    v = val.to_numpy(dtype=float)
+    c = cash_flows[columns].to_numpy(dtype=float)
+    d = None if div is None else div[columns].to_numpy(dtype=float)
+    (mdr,), held, start = _modified_dietz_arrays(v, c, [d], use_initial_CF=use_initial_CF)
+
+    MDR = pd.DataFrame(mdr, index=val.index, columns=columns).ffill()
+    if not held.all():
+        MDR.iloc[:, ~held] = 0
+        MDR = MDR.astype({col: 'int64' for col in columns[~held]})
+    else:
+        # Returns only begin once the earliest holding starts
+        MDR = MDR.iloc[start.min():]
 
-    raise TypeError("Input must be pandas Series or DataFrame")
+    return MDR
 
 
 def average_price(cash_flows, shares, date=None):
@@ -115,6 +576,69 @@ def average_price(cash_flows, shares, date=None):
     return avg_price
 
 
+def positions_asof(positions, events, date_col='Date', ticker_col='Ticker', fill_value=0.0):
+    '''
+    Look up each ticker's position as of each event date, eg the shares held on a dividend
+    ex-date. The positions are reshaped into one long (date, ticker, position) table and
+    every event is resolved with a single as-of join.
+
+    Parameters
+    ----------
+    positions : pandas.DataFrame
+        Time series indexed positions, one column per stock, eg the accumulated shares.
+    events : pandas.DataFrame
+        One row per event, with the stock ticker in ticker_col and the event date in date_col
+        (anything pandas.to_datetime() accepts).
+    date_col : str, optional
+        Column of events holding the event date. The default is 'Date'.
+    ticker_col : str, optional
+        Column of events holding the ticker. The default is 'Ticker'.
+    fill_value : float, optional
+        Position for events with no date, before the first row of positions, on a missing
+        position or for a ticker not in positions. The default is 0.0.
+
+    Returns
+    -------
+    held : pandas.Series
+        Position on the last row of positions on or before each event date, aligned to
+        events.index.
+
+    '''
+    held = pd.Series(fill_value, index=events.index, dtype=float)
+    if events.empty or positions.empty:
+        return held
+
+    dates = pd.to_datetime(events[date_col], errors='coerce')
+    tickers = events[ticker_col]
+    valid = (dates.notna() & tickers.isin(positions.columns)).to_numpy()
+    if not valid.any():
+        return held
+
+    # Long format holdings of the tickers with events, sorted by date. Only the rows where a
+    # position changes are needed, which keeps the table small for slowly changing holdings
+    columns = pd.Index(pd.unique(tickers[valid]))
+    table = positions[columns].sort_index().apply(pd.to_numeric, errors='coerce')
+    values = table.to_numpy(dtype=float)
+    changed = np.ones(values.shape, dtype=bool)
+    changed[1:] = ~((values[1:] == values[:-1]) | (np.isnan(values[1:]) & np.isnan(values[:-1])))
+    rows, cols = np.nonzero(changed)
+    long = pd.DataFrame({
+        '_date': table.index.to_numpy(dtype='datetime64[ns]')[rows],
+        '_ticker': columns.to_numpy(dtype=object)[cols],
+        '_held': values[rows, cols],
+    })
+    lookup = pd.DataFrame({
+        '_date': dates[valid].to_numpy(dtype='datetime64[ns]'),
+        '_ticker': tickers[valid].to_numpy(dtype=object),
+        '_row': np.flatnonzero(valid),
+    }).sort_values('_date', kind='stable')
+
+    joined = pd.merge_asof(lookup, long, on='_date', by='_ticker', direction='backward')
+    result = held.to_numpy(copy=True)
+    result[joined['_row'].to_numpy()] = joined['_held'].fillna(fill_value).to_numpy()
+    return pd.Series(result, index=events.index)
+
+
 def basic_return(val, cash_flows, date=None, use_initial_CF=False):
     '''
     basic return = (V1 - V0 - CF) / (V0 + CF) 
@@ -238,7 +762,7 @@ def basic_total_return(val, cash_flows, div, date=None, use_initial_CF=False):
     return basic_tot_ret
 
 
-def basic_return_annualised(val, cash_flows, date=None, use_initial_CF=False):
+def basic_return_annualised(val, cash_flows, date=None, use_initial_CF=False, calendar_days=False):
     '''
     Annualized Return = (1 + basic_return())**(years held) - 1
     
@@ -260,6 +784,9 @@ def basic_return_annualised(val, cash_flows, date=None, use_initial_CF=False):
         of val. If the first date in the dataframe represents the first purchase date of the 
         portfolio then use_initial_CF should be set to True to give the correct cost base. 
         The default is False.
+    calendar_days : bool, optional
+        Measure the holding period in calendar days (365.25 per year) from the index dates
+        instead of counting 261 business-day rows per year. The default is False.
 
     Returns
     -------
@@ -274,7 +801,7 @@ def basic_return_annualised(val, cash_flows, date=None, use_initial_CF=False):
     cash_flows = cash_flows.loc[date:]
     
     # Find elapsed years from first non-zero point and avoid zero-year exponents.
-    num_years = _elapsed_years_from_first_nonzero(val)
+    num_years = _elapsed_years_from_first_nonzero(val, calendar_days=calendar_days)
     
     basic_ret_ann = np.power(basic_return(val, cash_flows, use_initial_CF=use_initial_CF) + 1, 
                              1 / num_years) - 1
@@ -282,7 +809,7 @@ def basic_return_annualised(val, cash_flows, date=None, use_initial_CF=False):
     return basic_ret_ann    
 
 
-def basic_total_return_annualised(val, cash_flows, div, date=None, use_initial_CF=False):
+def basic_total_return_annualised(val, cash_flows, div, date=None, use_initial_CF=False, calendar_days=False):
     '''
     Annualized Return = (1 + basic_return())**(years held) - 1
     
@@ -304,6 +831,9 @@ def basic_total_return_annualised(val, cash_flows, div, date=None, use_initial_C
         of val. If the first date in the dataframe represents the first purchase date of the 
         portfolio then use_initial_CF should be set to True to give the correct cost base. 
         The default is False.
+    calendar_days : bool, optional
+        Measure the holding period in calendar days (365.25 per year) from the index dates
+        instead of counting 261 business-day rows per year. The default is False.
 
     Returns
     -------
@@ -319,7 +849,7 @@ def basic_total_return_annualised(val, cash_flows, div, date=None, use_initial_C
     div = div.loc[date:]
     
     # Find elapsed years from first non-zero point and avoid zero-year exponents.
-    num_years = _elapsed_years_from_first_nonzero(val)
+    num_years = _elapsed_years_from_first_nonzero(val, calendar_days=calendar_days)
     
     basic_tot_ret_ann = np.power(basic_total_return(val, cash_flows, div, use_initial_CF=use_initial_CF) + 1, 
                              1 / num_years) - 1
@@ -414,52 +944,7 @@ def time_weighted_return(val, cash_flows, date=None, use_initial_CF=False):
     # Prepare the data
     val, cash_flows = prepare_data(val, cash_flows, date=date)
     
-    MDR = pd.DataFrame([])
-    for column in val:
-        
-        vcol = val[column]
-        ccol = cash_flows[column]
-        
-        if (vcol == 0).all():
-            MDR_individual = pd.Series(0, index=vcol.index, name=vcol.name)
-       
-        else:
-            # Intial value of stock holding    
-            initial_val = vcol.iloc[0]
-            
-            # Start from first non-zero row
-            start_index = val[vcol!=0].index[0]
-            vcol = vcol.loc[start_index:]        
-            ccol = ccol.loc[start_index:]        
-            
-            # Only use the val column for intial val/cost base if use_initial_CF == False
-            # and the first row is non-zero (i.e. there are no holdings at the start date)
-            # Otherwise the first cash flow can be used as the intial portfolio val (V0)
-            # This matches the methodology used for Basic Return calc.
-            #if use_initial_CF == False or initial_val == 0:
-            #    V0 = vcol.iloc[0]
-            if use_initial_CF != False or initial_val == 0:
-                V0 = ccol.iloc[0]
-            else:
-                V0 = vcol.iloc[0]
-            #if use_initial_CF == False and vcol[0] != 0:
-            #    V0 = vcol.iloc[0]
-            #else:
-            #    V0 = ccol.iloc[0]
-                
-            CF_sum = ccol.iloc[1:].cumsum()
-            t = vcol.reset_index().index.values
-            CF_time = (-1 * (ccol.iloc[1:] * t[1:]).cumsum() / t[1:] + ccol.iloc[1:].cumsum())
-            MDR_individual = (((vcol - V0 - CF_sum) / (V0 + CF_time))
-                              .fillna(0)
-                              # Treat a 100 % loss as accum = 0 rather than share price = 0
-                              # and Forward fill the previous return
-                              .replace(-1, np.nan)).ffill()
-            
-            # Set return to 0 if val of the holding = 0
-            # MDR_individual[vcol==0] = 0
-    
-        MDR = pd.merge(MDR, MDR_individual, how='outer', left_index=True, right_index=True)
+    MDR = _modified_dietz_returns(val, cash_flows, use_initial_CF=use_initial_CF)
         
     return MDR
 
@@ -505,59 +990,12 @@ def time_weighted_total_return(val, cash_flows, div, date=None, use_initial_CF=F
     # Prepare the data
     val, cash_flows, div = prepare_data(val, cash_flows, div, date=date)
     
-    MDR = pd.DataFrame([])
-    for column in val:
-        
-        vcol = val[column]
-        ccol = cash_flows[column]
-        dcol = div[column]
-        
-        if (vcol == 0).all():
-            MDR_individual = pd.Series(0, index=vcol.index, name=vcol.name)
-       
-        else:
-            # Intial value of stock holding    
-            initial_val = vcol.iloc[0]
-            
-            # Start from first non-zero row
-            start_index = val[vcol!=0].index[0]
-            vcol = vcol.loc[start_index:]        
-            ccol = ccol.loc[start_index:]   
-            dcol = dcol.loc[start_index:]     
-            
-            # Only use the val column for intial val/cost base if use_initial_CF == False
-            # and the first row is non-zero (i.e. there are no holdings at the start date)
-            # Otherwise the first cash flow can be used as the intial portfolio val (V0)
-            # This matches the methodology used for Basic Return calc.
-            #if use_initial_CF == False or initial_val == 0:
-            #    V0 = vcol.iloc[0]
-            if use_initial_CF != False or initial_val == 0:
-                V0 = ccol.iloc[0]
-            else:
-                V0 = vcol.iloc[0]
-            #if use_initial_CF == False and vcol[0] != 0:
-            #    V0 = vcol.iloc[0]
-            #else:
-            #    V0 = ccol.iloc[0]
-                
-            CF_sum = ccol.iloc[1:].cumsum()
-            t = vcol.reset_index().index.values
-            CF_time = (-1 * (ccol.iloc[1:] * t[1:]).cumsum() / t[1:] + ccol.iloc[1:].cumsum())
-            MDR_individual = (((vcol - V0 - CF_sum + dcol.cumsum()) / (V0 + CF_time))
-                              .fillna(0)
-                              # Treat a 100 % loss as accum = 0 rather than share price = 0
-                              # and Forward fill the previous return
-                              .replace(-1, np.nan)).ffill()
-            
-            # Set return to 0 if val of the holding = 0
-            # MDR_individual[vcol==0] = 0
-    
-        MDR = pd.merge(MDR, MDR_individual, how='outer', left_index=True, right_index=True)
+    MDR = _modified_dietz_returns(val, cash_flows, div, use_initial_CF=use_initial_CF)
         
     return MDR
 
 
-def time_weighted_return_annualised(val, cash_flows, date=None, use_initial_CF=False):
+def time_weighted_return_annualised(val, cash_flows, date=None, use_initial_CF=False, calendar_days=False):
     '''
     Annualized Return = (1 + time_weighted_return())**(years held) - 1
     
@@ -579,6 +1017,9 @@ def time_weighted_return_annualised(val, cash_flows, date=None, use_initial_CF=F
         of val. If the first date in the dataframe represents the first purchase date of the 
         portfolio then use_initial_CF should be set to True to give the correct cost base. 
         The default is False.
+    calendar_days : bool, optional
+        Measure the holding period in calendar days (365.25 per year) from the index dates
+        instead of counting 261 business-day rows per year. The default is False.
 
     Returns
     -------
@@ -593,7 +1034,7 @@ def time_weighted_return_annualised(val, cash_flows, date=None, use_initial_CF=F
     val, cash_flows = prepare_data(val, cash_flows, date=date)      
     
     # Find elapsed years from first non-zero point and avoid zero-year exponents.
-    num_years = _elapsed_years_from_first_nonzero(val)
+    num_years = _elapsed_years_from_first_nonzero(val, calendar_days=calendar_days)
        
     MDR_ann = np.power(
         time_weighted_return(val, cash_flows, use_initial_CF=use_initial_CF) + 1,
@@ -603,7 +1044,7 @@ def time_weighted_return_annualised(val, cash_flows, date=None, use_initial_CF=F
     return MDR_ann
 
 
-def time_weighted_total_return_annualised(val, cash_flows, div, date=None, use_initial_CF=False):
+def time_weighted_total_return_annualised(val, cash_flows, div, date=None, use_initial_CF=False, calendar_days=False):
     '''
     Annualized Return = (1 + time_weighted_return())**(years held) - 1
     
@@ -625,6 +1066,9 @@ def time_weighted_total_return_annualised(val, cash_flows, div, date=None, use_i
         of val. If the first date in the dataframe represents the first purchase date of the 
         portfolio then use_initial_CF should be set to True to give the correct cost base. 
         The default is False.
+    calendar_days : bool, optional
+        Measure the holding period in calendar days (365.25 per year) from the index dates
+        instead of counting 261 business-day rows per year. The default is False.
 
     Returns
     -------
@@ -639,7 +1083,7 @@ def time_weighted_total_return_annualised(val, cash_flows, div, date=None, use_i
     val, cash_flows, div = prepare_data(val, cash_flows, div, date=date)
     
     # Find elapsed years from first non-zero point and avoid zero-year exponents.
-    num_years = _elapsed_years_from_first_nonzero(val)
+    num_years = _elapsed_years_from_first_nonzero(val, calendar_days=calendar_days)
        
     MDR_ann = np.power(
         time_weighted_total_return(val, cash_flows, div, use_initial_CF=use_initial_CF) + 1,
@@ -649,7 +1093,304 @@ def time_weighted_total_return_annualised(val, cash_flows, div, date=None, use_i
     return MDR_ann
 
 
-def dollar_weighted_return(val, cash_flows, date=None, use_initial_CF=False, resample_freq='auto'):
+def _seeded_cumsum(seed, values):
+    """Cumulative sum of values (along rows) continuing from a running total."""
+    return np.cumsum(np.vstack([seed, values]), axis=0)[1:]
+
+
+def _seeded_sum(seed, values):
+    """
+    Last row of _seeded_cumsum(). Taken from the cumulative rows (bounded by the block size) as
+    cumsum() adds the rows strictly in order, like DataFrame.cumsum() in the series functions. A
+    sum() reduction may group the additions differently (pairwise or SIMD, depending on the shape
+    and the NumPy build), which changes the last bits of the running totals.
+    """
+    return _seeded_cumsum(seed, values)[-1]
+
+
+def _seeded_ffill(seed, values):
+    """Forward fill values (along rows) continuing from the last filled row."""
+    return pd.DataFrame(np.vstack([seed, values])).ffill().to_numpy()[1:]
+
+
+class ReturnAccumulator:
+    '''
+    Running state for basic_return(), basic_total_return(), time_weighted_return() and
+    time_weighted_total_return(), advanced one block of new rows at a time.
+
+    update() only touches the new rows: the cumulative cash flow, dividend and time-weighted
+    cash flow sums are carried as running totals, so a daily refresh costs O(new rows) instead
+    of reprocessing the full history. Rows returned by update() are identical to the rows the
+    batch functions return for the same dates. State can be saved with to_dict() and restored
+    with from_dict().
+
+    Parameters
+    ----------
+    columns : sequence
+        Column labels (stocks) tracked by the accumulator.
+    use_initial_CF : bool, optional
+        Use the first row of cash_flow as the initial portfolio value instead of the first row
+        of val. Same meaning as in basic_return(). The default is False.
+    periods_per_year : int, optional
+        Business-day rows per year used for the annualised values in snapshot().
+        The default is 261.
+    '''
+
+    METRICS = ("basic", "basic_total", "twr", "twr_total")
+    STATE = ("V0", "cf_sum", "div_sum", "first_row_zero", "start", "twr_V0", "twr_cf_sum", "twr_cf_time",
+             "twr_div_sum")
+
+    def __init__(self, columns, use_initial_CF=False, periods_per_year=261):
+        self.columns = pd.Index(columns)
+        self.use_initial_CF = use_initial_CF
+        self.periods_per_year = periods_per_year
+        n_cols = len(self.columns)
+        self.rows = 0
+        self.last_date = None
+        # basic return state: V0 from the first row, cash flows from the second row onwards
+        self.V0 = np.full(n_cols, np.nan)
+        self.cf_sum = np.zeros(n_cols)
+        self.div_sum = np.zeros(n_cols)
+        # Modified-Dietz state, counted from each column's first non-zero value
+        self.first_row_zero = np.zeros(n_cols, dtype=bool)
+        self.start = np.full(n_cols, -1)
+        self.twr_V0 = np.full(n_cols, np.nan)
+        self.twr_cf_sum = np.zeros(n_cols)
+        self.twr_cf_time = np.zeros(n_cols)
+        self.twr_div_sum = np.zeros(n_cols)
+        # Last (forward filled) value of every metric
+        self.last = {metric: np.full(n_cols, np.nan) for metric in self.METRICS}
+
+    def update(self, val, cash_flows, div=None):
+        '''
+        Advance the accumulator by new rows.
+
+        Parameters
+        ----------
+        val : pandas.DataFrame or pandas.Series
+            Dollar value of each stock holding for the new dates only.
+        cash_flows : pandas.DataFrame or pandas.Series
+            Cash flows for the new dates.
+        div : pandas.DataFrame or pandas.Series, optional
+            Dividend income for the new dates. Zero when omitted.
+
+        Returns
+        -------
+        returns : dict of pandas.DataFrame
+            basic, basic_total, twr and twr_total return rows for the new dates.
+        '''
+        val, cash_flows = prepare_data(val, cash_flows)
+        if self.last_date is not None and len(val.index) and val.index[0] <= self.last_date:
+            raise ValueError("ReturnAccumulator.update() needs rows dated after the last update.")
+        v = val[self.columns].to_numpy(dtype=float)
+        c = cash_flows[self.columns].to_numpy(dtype=float)
+        if div is None:
+            d = np.zeros_like(v)
+        else:
+            d = prepare_data(div)[0][self.columns].to_numpy(dtype=float)
+        if not len(v):
+            return {
+                metric: pd.DataFrame(index=val.index, columns=self.columns, dtype=float)
+                for metric in self.METRICS
+            }
+        values = self._advance(v, c, d)
+        self.last_date = val.index[-1]
+        return {
+            metric: pd.DataFrame(values[metric], index=val.index, columns=self.columns)
+            for metric in self.METRICS
+        }
+
+    def _advance(self, v, c, d, last_only=False):
+        """
+        Advance the running state by 2-D arrays of new rows and return the forward filled metric
+        rows. With last_only=True only the running totals are kept and only the last row is
+        evaluated; it is returned cleaned but not forward filled.
+        """
+        n_rows = len(v)
+        rows = self.rows + np.arange(n_rows)[:, None]
+        if last_only:
+            out = slice(n_rows - 1, None)
+
+            def running(seed, values):
+                return _seeded_sum(seed, values)[None, :]
+        else:
+            out = slice(None)
+            running = _seeded_cumsum
+
+        # Basic return. Cash flows on the first row are part of V0, NaN cash flows or dividends
+        # give NaN on their row (as with DataFrame.cumsum) without breaking the running total.
+        if self.rows == 0:
+            self.V0 = c[0].copy() if self.use_initial_CF != False else v[0].copy()
+            self.first_row_zero = v[0] == 0
+        c_basic = c.copy()
+        if self.rows == 0:
+            c_basic[0] = 0.0
+        cf_cum = running(self.cf_sum, np.nan_to_num(c_basic, nan=0.0))
+        div_cum = running(self.div_sum, np.nan_to_num(d, nan=0.0))
+        self.cf_sum, self.div_sum = cf_cum[-1], div_cum[-1]
+        cf_cum = np.where(np.isnan(c_basic[out]), np.nan, cf_cum)
+        div_cum = np.where(np.isnan(d[out]), np.nan, div_cum)
+        cf_cum[rows[out, 0] == 0] = np.nan
+        with np.errstate(divide='ignore', invalid='ignore'):
+            basic = (v[out] - self.V0 - cf_cum) / (self.V0 + cf_cum)
+            basic_total = (v[out] - self.V0 - cf_cum + div_cum) / (self.V0 + cf_cum)
+
+        # Modified-Dietz (time weighted) return, from each column's first non-zero value
+        new_start = (self.start < 0) & (v != 0).any(axis=0)
+        if new_start.any():
+            first = (v != 0).argmax(axis=0)
+            cols = np.flatnonzero(new_start)
+            self.start[cols] = self.rows + first[cols]
+            if self.use_initial_CF != False:
+                self.twr_V0[cols] = c[first[cols], cols]
+            else:
+                self.twr_V0[cols] = np.where(
+                    self.first_row_zero[cols], c[first[cols], cols], v[first[cols], cols]
+                )
+        t = (rows - np.where(self.start >= 0, self.start, self.rows + n_rows)).astype(float)
+        flows = np.where(t > 0, c, 0.0)
+        CF_sum = running(self.twr_cf_sum, flows)
+        CF_weighted = running(self.twr_cf_time, flows * t)
+        twr_div = running(self.twr_div_sum, np.where(t >= 0, d, 0.0))
+        self.twr_cf_sum, self.twr_cf_time, self.twr_div_sum = CF_sum[-1], CF_weighted[-1], twr_div[-1]
+        t = t[out]
+        numerator = v[out] - self.twr_V0 - CF_sum
+        with np.errstate(divide='ignore', invalid='ignore'):
+            CF_time = -1 * CF_weighted / t + CF_sum
+            twr = numerator / (self.twr_V0 + CF_time)
+            twr_total = (numerator + twr_div) / (self.twr_V0 + CF_time)
+
+        returns = {}
+        metric_values = [("basic", basic), ("basic_total", basic_total), ("twr", twr), ("twr_total", twr_total)]
+        for metric, values in metric_values:
+            if metric.startswith("twr"):
+                values = np.where(t > 0, values, 0.0)
+            values[np.isnan(values)] = 0
+            # Treat a 100 % loss as accum = 0 rather than share price = 0
+            # and Forward fill the previous return
+            values[values == -1] = np.nan
+            if metric.startswith("twr"):
+                values[t < 0] = np.nan
+            if not last_only:
+                values = _seeded_ffill(self.last[metric], values)
+                self.last[metric] = values[-1]
+            returns[metric] = values
+
+        self.rows += n_rows
+        return returns
+
+    def _advance_last(self, v, c, d, end_rows=None):
+        """
+        Advance by a block of rows, updating only the last (forward filled) values. The block is
+        evaluated on its last row; columns whose last row is a 100 % loss (filled from an earlier
+        row) or that end inside the block (end_rows) are replayed row by row.
+        """
+        first_row, last_row = self.rows, self.rows + len(v) - 1
+        end = np.full(v.shape[1], last_row) if end_rows is None else np.asarray(end_rows)
+        before = self._take(np.arange(v.shape[1]))
+        values = self._advance(v, c, d, last_only=True)
+
+        live = end >= first_row
+        lost = np.isnan(values["basic"][0]) | np.isnan(values["basic_total"][0])
+        lost |= (self.start >= 0) & (np.isnan(values["twr"][0]) | np.isnan(values["twr_total"][0]))
+        for metric in self.METRICS:
+            last = values[metric][0]
+            self.last[metric] = np.where(live & ~np.isnan(last), last, self.last[metric])
+
+        cols = np.flatnonzero(live & ((end < last_row) | lost))
+        if cols.size:
+            replayed = before._take(cols)._advance(v[:, cols], c[:, cols], d[:, cols])
+            pick = np.minimum(end[cols], last_row) - first_row
+            for metric in self.METRICS:
+                self.last[metric][cols] = replayed[metric][pick, np.arange(cols.size)]
+
+    def _take(self, cols):
+        """Copy of the accumulator restricted to the column positions cols."""
+        acc = ReturnAccumulator(self.columns[cols], use_initial_CF=self.use_initial_CF,
+                                periods_per_year=self.periods_per_year)
+        acc.rows, acc.last_date = self.rows, self.last_date
+        for name in self.STATE:
+            setattr(acc, name, getattr(self, name)[cols])
+        acc.last = {metric: values[cols] for metric, values in self.last.items()}
+        return acc
+
+    def snapshot(self):
+        '''
+        Latest value of every metric.
+
+        Returns
+        -------
+        snapshot : pandas.DataFrame
+            One row per column with the basic, basic_total, twr and twr_total returns, the
+            elapsed years since the first non-zero value and the annualised returns (_ann).
+            Columns that have never been held report a time weighted return of 0, as
+            time_weighted_return() does.
+        '''
+        held = self.start >= 0
+        steps = self.rows - self.start
+        years = np.where(held & (steps > 0), steps / self.periods_per_year, 1.0)
+        snapshot = pd.DataFrame(
+            {metric: self.last[metric].copy() for metric in self.METRICS}, index=self.columns
+        )
+        snapshot.loc[~held, ["twr", "twr_total"]] = 0.0
+        snapshot["years"] = years
+        for metric in self.METRICS:
+            snapshot[f"{metric}_ann"] = np.power(snapshot[metric] + 1, 1 / years) - 1
+        return snapshot
+
+    def to_dict(self):
+        """JSON-serialisable copy of the accumulator state."""
+        state = {
+            "columns": list(self.columns),
+            "columns_name": self.columns.name,
+            "use_initial_CF": self.use_initial_CF,
+            "periods_per_year": self.periods_per_year,
+            "rows": self.rows,
+            "last_date": None if self.last_date is None else pd.Timestamp(self.last_date).isoformat(),
+        }
+        for name in self.STATE:
+            state[name] = getattr(self, name).tolist()
+        state["last"] = {metric: values.tolist() for metric, values in self.last.items()}
+        return state
+
+    @classmethod
+    def from_dict(cls, state):
+        """Restore an accumulator saved with to_dict()."""
+        acc = cls(pd.Index(state["columns"], name=state.get("columns_name")),
+                  use_initial_CF=state["use_initial_CF"], periods_per_year=state["periods_per_year"])
+        acc.rows = state["rows"]
+        acc.last_date = None if state["last_date"] is None else pd.Timestamp(state["last_date"])
+        for name in ["V0", "cf_sum", "div_sum", "twr_V0", "twr_cf_sum", "twr_cf_time", "twr_div_sum"]:
+            setattr(acc, name, np.array(state[name], dtype=float))
+        acc.first_row_zero = np.array(state["first_row_zero"], dtype=bool)
+        acc.start = np.array(state["start"], dtype=int)
+        acc.last = {metric: np.array(values, dtype=float) for metric, values in state["last"].items()}
+        return acc
+
+
+def _exact_dwr_since_start(irr_series, vcol, name=None):
+    """
+    XIRR-style dollar weighted return since the first row of one column, for every row: nothing
+    is resampled and every cash flow is discounted by its exact day offset. irr_series is the
+    column's IRR cash stream and vcol its value, the terminal value of each prefix.
+    """
+    irr_series = irr_series.fillna(0.0)
+    days = _day_numbers(irr_series.index)
+    irr_values = _prefix_irr(irr_series.to_numpy(), vcol.to_numpy(), times=days)
+    irr_calc = pd.Series(irr_values, index=irr_series.index, name=name)
+
+    # Daily rate compounded over the days since the start
+    return (
+        np.power(1 + irr_calc, days - days[0]) - 1
+    ).replace([np.inf, -np.inf], np.nan).fillna(0).replace(-1, np.nan).ffill()
+
+
+def _day_numbers(index):
+    """Day number (days since the epoch, as float) of every date of a DatetimeIndex."""
+    return pd.DatetimeIndex(index).to_numpy(dtype='datetime64[D]').astype(np.int64).astype(float)
+
+
+def dollar_weighted_return(val, cash_flows, date=None, use_initial_CF=False, resample_freq='auto', workers=None):
     '''
     Calculates the time-weighted return based on the Modified-Dietz formula.
     time weighted return = (V1 - V0 - CF) / (V0 + CF(t)) 
@@ -678,9 +1419,15 @@ def dollar_weighted_return(val, cash_flows, date=None, use_initial_CF=False, res
         portfolio then use_initial_CF should be set to True to give the correct cost base. 
         The default is False.
     resample_freq : str, optional
-        Frequency for resampling the data. Options are 'auto', 'W' (weekly), 'M' (monthly), 'Q' (quarterly).
+        Frequency for resampling the data. Options are 'auto', 'B' (business daily), 'W' (weekly),
+        'M' (monthly), 'Q' (quarterly), or 'exact' for an XIRR-style return that discounts every
+        cash flow by its exact date offset with no resampling.
         If 'auto', the function will automatically choose a frequency to keep the number of rows < 150.
         The default is 'auto'.
+    workers : int, optional
+        Number of processes to split the stocks over (see compute_pool). None uses
+        compute_pool.WORKERS, which is 1 (no pool) unless CALC_WORKERS is set, and 0 uses every
+        core. The default is None.
 
     Returns
     -------
@@ -695,6 +1442,11 @@ def dollar_weighted_return(val, cash_flows, date=None, use_initial_CF=False, res
     val, cash_flows = prepare_data(val, cash_flows, date=date)
 
     resample_freq = _resolve_dwr_resample_freq(val, resample_freq, base_rows=100)
+
+    n_workers = _column_workers(workers, val, cash_flows)
+    if n_workers:
+        return _map_columns(dollar_weighted_return, [val, cash_flows], n_workers,
+                            use_initial_CF=use_initial_CF, resample_freq=resample_freq, workers=1)
     
     DWR = pd.DataFrame([])
     for column in val:
@@ -720,32 +1472,34 @@ def dollar_weighted_return(val, cash_flows, date=None, use_initial_CF=False, res
             if (not use_initial_CF) or (initial_val == 0):
                 irr_series.iloc[0] = -vcol.iloc[0]
 
-            # Resample data
-            irr_series = irr_series.resample(resample_freq).sum()
-            vcol_ = vcol.resample(resample_freq).last()
-            
-            # Calculate IRR for each period
-            irr_values = []
-            for period_end in range(len(irr_series)):
-                cash_stream = np.concatenate(
-                    [irr_series.iloc[: period_end + 1].to_numpy(), [vcol_.iloc[period_end]]]
-                )
-                irr_values.append(npf.irr(cash_stream))
+            if resample_freq == "exact":
+                DWR_individual = _exact_dwr_since_start(irr_series, vcol, name=column)
+            else:
+                # Resample data (a business-day index is already at daily resolution)
+                if vcol.index.freqstr == resample_freq:
+                    irr_series = irr_series.fillna(0.0)
+                    vcol_ = vcol
+                else:
+                    irr_series = irr_series.resample(resample_freq).sum()
+                    vcol_ = vcol.resample(resample_freq).last()
+
+                # Calculate IRR for each period in one batched pass over all prefix cash streams
+                irr_values = _prefix_irr(irr_series.to_numpy(), vcol_.to_numpy())
 
-            irr_calc = pd.Series(irr_values, index=irr_series.index, name=column)
+                irr_calc = pd.Series(irr_values, index=irr_series.index, name=column)
 
-            # Convert periodic IRR to cumulative return since start
-            period_count = np.arange(1, len(irr_calc) + 1)
-            DWR_individual = (
-                np.power(1 + irr_calc, period_count) - 1
-            ).replace([np.inf, -np.inf], np.nan).fillna(0).replace(-1, np.nan).ffill()
+                # Convert periodic IRR to cumulative return since start
+                period_count = np.arange(1, len(irr_calc) + 1)
+                DWR_individual = (
+                    np.power(1 + irr_calc, period_count) - 1
+                ).replace([np.inf, -np.inf], np.nan).fillna(0).replace(-1, np.nan).ffill()
 
         DWR = pd.merge(DWR, DWR_individual, how='outer', left_index=True, right_index=True)
 
     return DWR
 
 
-def dollar_weighted_total_return(val, cash_flows, div, date=None, use_initial_CF=False, resample_freq='auto'):
+def dollar_weighted_total_return(val, cash_flows, div, date=None, use_initial_CF=False, resample_freq='auto', workers=None):
     '''
     Calculates the dollar-weighted total return based on the Modified-Dietz formula, including dividends.
     time weighted return = (V1 - V0 - CF - Div) / (V0 + CF(t) + Div(t)) 
@@ -779,9 +1533,15 @@ def dollar_weighted_total_return(val, cash_flows, div, date=None, use_initial_CF
         portfolio then use_initial_CF should be set to True to give the correct cost base. 
         The default is False.
     resample_freq : str, optional
-        Frequency for resampling the data. Options are 'auto', 'W' (weekly), 'M' (monthly), 'Q' (quarterly).
+        Frequency for resampling the data. Options are 'auto', 'B' (business daily), 'W' (weekly),
+        'M' (monthly), 'Q' (quarterly), or 'exact' for an XIRR-style return that discounts every
+        cash flow by its exact date offset with no resampling.
         If 'auto', the function will automatically choose a frequency to keep the number of rows < 150.
         The default is 'auto'.
+    workers : int, optional
+        Number of processes to split the stocks over (see compute_pool). None uses
+        compute_pool.WORKERS, which is 1 (no pool) unless CALC_WORKERS is set, and 0 uses every
+        core. The default is None.
 
     Returns
     -------
@@ -793,6 +1553,11 @@ def dollar_weighted_total_return(val, cash_flows, div, date=None, use_initial_CF
     val, cash_flows, div = prepare_data(val, cash_flows, div, date=date)
 
     resample_freq = _resolve_dwr_resample_freq(val, resample_freq, base_rows=100)
+
+    n_workers = _column_workers(workers, val, cash_flows, div)
+    if n_workers:
+        return _map_columns(dollar_weighted_total_return, [val, cash_flows, div], n_workers,
+                            use_initial_CF=use_initial_CF, resample_freq=resample_freq, workers=1)
     
     DWR = pd.DataFrame([])
     for column in val:
@@ -822,97 +1587,414 @@ def dollar_weighted_total_return(val, cash_flows, div, date=None, use_initial_CF
             if (not use_initial_CF) or (initial_val == 0):
                 irr_series.iloc[0] = -vcol.iloc[0]
 
-            # Resample data
-            irr_series = irr_series.resample(resample_freq).sum()
-            vcol_ = vcol.resample(resample_freq).last()
-            
-            # Calculate IRR for each period
-            irr_values = []
-            for period_end in range(len(irr_series)):
-                cash_stream = np.concatenate(
-                    [irr_series.iloc[: period_end + 1].to_numpy(), [vcol_.iloc[period_end]]]
-                )
-                irr_values.append(npf.irr(cash_stream))
+            if resample_freq == "exact":
+                DWR_individual = _exact_dwr_since_start(irr_series, vcol, name=column)
+            else:
+                # Resample data (a business-day index is already at daily resolution)
+                if vcol.index.freqstr == resample_freq:
+                    irr_series = irr_series.fillna(0.0)
+                    vcol_ = vcol
+                else:
+                    irr_series = irr_series.resample(resample_freq).sum()
+                    vcol_ = vcol.resample(resample_freq).last()
 
-            irr_calc = pd.Series(irr_values, index=irr_series.index, name=column)
+                # Calculate IRR for each period in one batched pass over all prefix cash streams
+                irr_values = _prefix_irr(irr_series.to_numpy(), vcol_.to_numpy())
 
-            # Convert periodic IRR to cumulative return since start
-            period_count = np.arange(1, len(irr_calc) + 1)
-            DWR_individual = (
-                np.power(1 + irr_calc, period_count) - 1
-            ).replace([np.inf, -np.inf], np.nan).fillna(0).replace(-1, np.nan).ffill()
+                irr_calc = pd.Series(irr_values, index=irr_series.index, name=column)
+
+                # Convert periodic IRR to cumulative return since start
+                period_count = np.arange(1, len(irr_calc) + 1)
+                DWR_individual = (
+                    np.power(1 + irr_calc, period_count) - 1
+                ).replace([np.inf, -np.inf], np.nan).fillna(0).replace(-1, np.nan).ffill()
 
         DWR = pd.merge(DWR, DWR_individual, how='outer', left_index=True, right_index=True)
 
     return DWR
 
 
-def dollar_weighted_return_endpoint(val, cash_flows, date=None, use_initial_CF=False, resample_freq='auto'):
+def _dwr_endpoints(val, cash_flows, divs, use_initial_CF=False, resample_freq='auto', v0_from_first_row=None,
+                   end_rows=None, tol=1e-12):
+    """
+    Endpoint dollar weighted return of every column, one array per entry of divs (None for a
+    price-only return). Each column's cash stream starts at its first non-zero value, all
+    columns are resampled together and the IRRs are then solved together with batched_irr().
+    v0_from_first_row lists, per entry of divs, whether the first-value override is also applied
+    when the first row of the frame is zero (the total-return convention).
+    end_rows optionally gives each column's last row; later rows are ignored as if the column
+    had been truncated there (resample_freq must then already be resolved).
+    """
+    columns = val.columns
+    if end_rows is None:
+        resample_freq = _resolve_dwr_resample_freq(val, resample_freq, base_rows=100)
+    if v0_from_first_row is None:
+        v0_from_first_row = [d is not None for d in divs]
+    v = val.to_numpy(dtype=float)
+    c = cash_flows[columns].to_numpy(dtype=float)
+    n_rows, n_cols = v.shape
+    cols = np.arange(n_cols)
+    rows = np.arange(n_rows)[:, None]
+    end = np.full(n_cols, n_rows - 1) if end_rows is None else np.asarray(end_rows)
+    after_end = rows > end
+
+    nonzero = (v != 0) & ~after_end
+    held = nonzero.any(axis=0)
+    start = nonzero.argmax(axis=0)
+    pre_start = rows < start
+
+    # Resample bins of every column's first and last rows, and the terminal value of the last bin.
+    # Rows after a column's end are NaN, which resample().sum()/last() skip without touching the
+    # running (compensated) sums of the bin. A business-day index is already at daily resolution,
+    # every row is then its own bin. The exact (XIRR-style) mode also keeps every row, and dates
+    # the flows by their day numbers instead of counting periods.
+    exact = resample_freq == "exact"
+    daily = exact or val.index.freqstr == resample_freq
+    if daily:
+        first_bin, end_bin = start, end
+        terminal = v[end, cols]
+    else:
+        positions = pd.Series(np.arange(n_rows), index=val.index).resample(resample_freq).max()
+        bin_rows = positions.ffill().fillna(-1).to_numpy()
+        first_bin = np.searchsorted(bin_rows, start, side='left')
+        end_bin = np.searchsorted(bin_rows, end, side='left')
+        last_values = pd.DataFrame(np.where(after_end, np.nan, v), index=val.index).resample(resample_freq).last()
+        terminal = last_values.to_numpy(dtype=float)[end_bin, cols]
+
+    endpoints = []
+    for d, first_row_rule in zip(divs, v0_from_first_row):
+        stream = -c if d is None else -c + d
+        stream = np.where(pre_start, 0.0, stream).astype(float)
+        replace = np.full(n_cols, not use_initial_CF)
+        if first_row_rule:
+            replace |= v[0] == 0
+        stream[start[replace], cols[replace]] = -v[start[replace], cols[replace]]
+        if daily:
+            binned = np.where(np.isnan(stream), 0.0, stream)
+        else:
+            stream[after_end] = np.nan
+            binned = pd.DataFrame(stream, index=val.index).resample(resample_freq).sum().to_numpy()
+
+        # One stream per held column: its binned flows followed by the terminal value, aligned on
+        # the terminal value and zero-padded at the front, solved together
+        result = np.zeros(n_cols)
+        held_cols = np.flatnonzero(held)
+        if held_cols.size:
+            lengths = end_bin[held_cols] - first_bin[held_cols] + 1
+            offset = np.arange(lengths.max())[None, :] - (lengths.max() - lengths)[:, None]
+            source = np.clip(first_bin[held_cols][:, None] + offset, 0, len(binned) - 1)
+            flows = np.where(offset >= 0, binned[source, held_cols[:, None]], 0.0)
+            if exact:
+                # Daily rates, discounted to the end date and compounded over the days held
+                days = _day_numbers(val.index)
+                end_day = days[end[held_cols]]
+                times = np.column_stack([np.where(offset >= 0, days[source], end_day[:, None]), end_day])
+                irr = batched_irr(np.column_stack([flows, terminal[held_cols]]), tol=tol, times=times)
+                periods = end_day - days[start[held_cols]]
+            else:
+                irr = batched_irr(np.column_stack([flows, terminal[held_cols]]), tol=tol)
+                periods = lengths
+            with np.errstate(invalid='ignore'):
+                result[held_cols] = np.where(np.isnan(irr), 0.0, np.power(1 + irr, periods) - 1)
+        endpoints.append(result)
+    return endpoints
+
+
+def dollar_weighted_return_endpoint(val, cash_flows, date=None, use_initial_CF=False, resample_freq='auto',
+                                    tol=1e-12):
     val, cash_flows = prepare_data(val, cash_flows, date=date)
-    resample_freq = _resolve_dwr_resample_freq(val, resample_freq, base_rows=100)
-    endpoints = {}
+    (endpoints,) = _dwr_endpoints(
+        val, cash_flows, [None], use_initial_CF=use_initial_CF, resample_freq=resample_freq, tol=tol
+    )
+    return pd.Series(endpoints, index=val.columns)
 
-    for column in val:
-        vcol = val[column]
-        ccol = cash_flows[column]
-        if (vcol == 0).all():
-            endpoints[column] = 0.0
-            continue
 
-        start_index = vcol[vcol != 0].index[0]
-        vcol = vcol.loc[start_index:]
-        ccol = ccol.loc[start_index:]
-        irr_series = (-ccol).astype(float)
-
-        initial_val = vcol.iloc[0]
-        if (not use_initial_CF) or (initial_val == 0):
-            irr_series.iloc[0] = -vcol.iloc[0]
-
-        irr_series = irr_series.resample(resample_freq).sum()
-        vcol_ = vcol.resample(resample_freq).last()
-        cash_stream = np.concatenate([irr_series.to_numpy(), [vcol_.iloc[-1]]])
-        irr = npf.irr(cash_stream)
-        if pd.isna(irr):
-            endpoints[column] = 0.0
-        else:
-            endpoints[column] = float(np.power(1 + irr, len(irr_series)) - 1)
+def dollar_weighted_total_return_endpoint(val, cash_flows, div, date=None, use_initial_CF=False, resample_freq='auto',
+                                          tol=1e-12):
+    val, cash_flows, div = prepare_data(val, cash_flows, div, date=date)
+    (endpoints,) = _dwr_endpoints(
+        val, cash_flows, [div[val.columns].to_numpy(dtype=float)],
+        use_initial_CF=use_initial_CF, resample_freq=resample_freq, tol=tol,
+    )
+    return pd.Series(endpoints, index=val.columns)
 
-    return pd.Series(endpoints)
 
+# Rows per block when an endpoint is computed by streaming the history through a
+# ReturnAccumulator. Temporaries are bounded by block x columns instead of the full history.
+ENDPOINT_BLOCK_ROWS = 2048
 
-def dollar_weighted_total_return_endpoint(val, cash_flows, div, date=None, use_initial_CF=False, resample_freq='auto'):
-    val, cash_flows, div = prepare_data(val, cash_flows, div, date=date)
-    resample_freq = _resolve_dwr_resample_freq(val, resample_freq, base_rows=100)
-    endpoints = {}
 
-    for column in val:
-        vcol = val[column]
-        ccol = cash_flows[column]
-        dcol = div[column]
-        if (vcol == 0).all():
-            endpoints[column] = 0.0
-            continue
+def _return_endpoints(val, cash_flows, div=None, use_initial_CF=False, end_rows=None):
+    """
+    ReturnAccumulator advanced over the whole frame in ENDPOINT_BLOCK_ROWS blocks. Its last
+    values are the last rows of the basic and time weighted return series, its start the first
+    non-zero row of each column (-1 if never held). end_rows optionally stops each column at its
+    own row.
+    """
+    columns = val.columns
+    if not cash_flows.columns.equals(columns):
+        cash_flows = cash_flows[columns]
+    if div is not None and not div.columns.equals(columns):
+        div = div[columns]
+    v_all = val.to_numpy(dtype=float)
+    c_all = cash_flows.to_numpy(dtype=float)
+    d_all = None if div is None else div.to_numpy(dtype=float)
+
+    acc = ReturnAccumulator(columns, use_initial_CF=use_initial_CF)
+    end = None if end_rows is None else np.asarray(end_rows)
+    for first in range(0, len(v_all), ENDPOINT_BLOCK_ROWS):
+        block = slice(first, first + ENDPOINT_BLOCK_ROWS)
+        v = v_all[block]
+        d = np.zeros_like(v) if d_all is None else d_all[block]
+        acc._advance_last(v, c_all[block], d, end_rows=end)
+    return acc
+
+
+def _endpoint_years(index, start, end, periods_per_year=261, calendar_days=False):
+    """Elapsed years at each column's end row, as _elapsed_years_from_first_nonzero() gives them."""
+    held = (start >= 0) & (start <= end)
+    if calendar_days:
+        days = pd.DatetimeIndex(index).to_numpy(dtype='datetime64[D]').astype(np.int64)
+        steps = days[end] - days[np.maximum(start, 0)] + 1
+        per_year = 365.25
+    else:
+        steps = end - start + 1
+        per_year = periods_per_year
+    return np.where(held & (steps > 0), steps / per_year, 1.0)
 
-        initial_val = vcol.iloc[0]
-        start_index = vcol[vcol != 0].index[0]
-        vcol = vcol.loc[start_index:]
-        ccol = ccol.loc[start_index:]
-        dcol = dcol.loc[start_index:]
-
-        irr_series = (-ccol + dcol).astype(float)
-        if (not use_initial_CF) or (initial_val == 0):
-            irr_series.iloc[0] = -vcol.iloc[0]
-
-        irr_series = irr_series.resample(resample_freq).sum()
-        vcol_ = vcol.resample(resample_freq).last()
-        cash_stream = np.concatenate([irr_series.to_numpy(), [vcol_.iloc[-1]]])
-        irr = npf.irr(cash_stream)
-        if pd.isna(irr):
-            endpoints[column] = 0.0
-        else:
-            endpoints[column] = float(np.power(1 + irr, len(irr_series)) - 1)
 
-    return pd.Series(endpoints)
+def _metric_endpoint(metric, val, cash_flows, div=None, date=None, use_initial_CF=False, annualised=False,
+                     calendar_days=False):
+    """Last value of a basic/time weighted return series (optionally annualised) for every column."""
+    if div is None:
+        val, cash_flows = prepare_data(val, cash_flows, date=date)
+    else:
+        val, cash_flows, div = prepare_data(val, cash_flows, div, date=date)
+    acc = _return_endpoints(val, cash_flows, div, use_initial_CF=use_initial_CF)
+    values = acc.last[metric]
+    if metric.startswith("twr"):
+        # Columns that are never held report a time weighted return of 0
+        values = np.where(acc.start >= 0, values, 0.0)
+    if annualised:
+        end = np.full(len(val.columns), len(val) - 1)
+        years = _endpoint_years(val.index, acc.start, end, calendar_days=calendar_days)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            values = np.power(values + 1, 1 / years) - 1
+    return pd.Series(values, index=val.columns)
+
+
+def basic_return_endpoint(val, cash_flows, date=None, use_initial_CF=False):
+    '''
+    Last row of basic_return(), computed without building the return series.
+
+    The history is streamed through a ReturnAccumulator in blocks of ENDPOINT_BLOCK_ROWS rows,
+    so the cost is O(rows) with no full-length temporary matrices. Parameters are the same as
+    basic_return().
+
+    Returns
+    -------
+    basic_return : pandas.Series
+        Basic return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint("basic", val, cash_flows, date=date, use_initial_CF=use_initial_CF)
+
+
+def basic_total_return_endpoint(val, cash_flows, div, date=None, use_initial_CF=False):
+    '''
+    Last row of basic_total_return(), computed without building the return series.
+    Parameters are the same as basic_total_return().
+
+    Returns
+    -------
+    basic_return : pandas.Series
+        Basic total return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint("basic_total", val, cash_flows, div, date=date, use_initial_CF=use_initial_CF)
+
+
+def basic_return_annualised_endpoint(val, cash_flows, date=None, use_initial_CF=False, calendar_days=False):
+    '''
+    Last row of basic_return_annualised(), computed without building the return series.
+    Parameters are the same as basic_return_annualised().
+
+    Returns
+    -------
+    basic_ret : pandas.Series
+        Annualised basic return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint(
+        "basic", val, cash_flows, date=date, use_initial_CF=use_initial_CF, annualised=True,
+        calendar_days=calendar_days,
+    )
+
+
+def basic_total_return_annualised_endpoint(val, cash_flows, div, date=None, use_initial_CF=False,
+                                           calendar_days=False):
+    '''
+    Last row of basic_total_return_annualised(), computed without building the return series.
+    Parameters are the same as basic_total_return_annualised().
+
+    Returns
+    -------
+    basic_ret : pandas.Series
+        Annualised basic total return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint(
+        "basic_total", val, cash_flows, div, date=date, use_initial_CF=use_initial_CF, annualised=True,
+        calendar_days=calendar_days,
+    )
+
+
+def time_weighted_return_endpoint(val, cash_flows, date=None, use_initial_CF=False):
+    '''
+    Last row of time_weighted_return(), computed without building the return series.
+    Parameters are the same as time_weighted_return().
+
+    Returns
+    -------
+    time_weighted_return : pandas.Series
+        Time weighted return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint("twr", val, cash_flows, date=date, use_initial_CF=use_initial_CF)
+
+
+def time_weighted_total_return_endpoint(val, cash_flows, div, date=None, use_initial_CF=False):
+    '''
+    Last row of time_weighted_total_return(), computed without building the return series.
+    Parameters are the same as time_weighted_total_return().
+
+    Returns
+    -------
+    time_weighted_return : pandas.Series
+        Time weighted total return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint("twr_total", val, cash_flows, div, date=date, use_initial_CF=use_initial_CF)
+
+
+def time_weighted_return_annualised_endpoint(val, cash_flows, date=None, use_initial_CF=False,
+                                             calendar_days=False):
+    '''
+    Last row of time_weighted_return_annualised(), computed without building the return series.
+    Parameters are the same as time_weighted_return_annualised().
+
+    Returns
+    -------
+    MDR_ann : pandas.Series
+        Annualised time weighted return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint(
+        "twr", val, cash_flows, date=date, use_initial_CF=use_initial_CF, annualised=True,
+        calendar_days=calendar_days,
+    )
+
+
+def time_weighted_total_return_annualised_endpoint(val, cash_flows, div, date=None, use_initial_CF=False,
+                                                   calendar_days=False):
+    '''
+    Last row of time_weighted_total_return_annualised(), computed without building the return
+    series. Parameters are the same as time_weighted_total_return_annualised().
+
+    Returns
+    -------
+    MDR_ann : pandas.Series
+        Annualised time weighted total return (%) at the last date, indexed by stock.
+    '''
+    return _metric_endpoint(
+        "twr_total", val, cash_flows, div, date=date, use_initial_CF=use_initial_CF, annualised=True,
+        calendar_days=calendar_days,
+    )
+
+
+def summary_return_metrics(val, cash_flows, div, use_initial_CF=False, resample_freq='auto', dwr=True,
+                           end_rows=None):
+    '''
+    End-of-period basic, time-weighted and dollar-weighted returns (plus their annualised
+    versions) for every column, for both the price-only and the total (dividend) methods.
+
+    The intermediates shared by the metrics (V0, cumulative cash flows and dividends, first
+    held rows, elapsed years and the resampled IRR cash streams) are computed once for all
+    columns, and the basic and time weighted returns are streamed in blocks like the *_endpoint
+    functions rather than built as full series. The values equal the last row of basic_return(), basic_return_annualised(),
+    time_weighted_return(), time_weighted_return_annualised(), dollar_weighted_return_endpoint()
+    and their total-return counterparts.
+
+    Parameters
+    ----------
+    val : pandas.DataFrame or pandas.Series
+        Cumulative dollar value of each stock holdings. Data should be time series indexed.
+        Each column is assummed to be a different stock in the portfolio.
+    cash_flows : pandas.DataFrame or pandas.Series
+        Dollar value of cash flows into or out of the portfolio. Data should be time series indexed.
+        Each column is assummed to be a different stock in the portfolio
+    div : pandas.DataFrame or pandas.Series
+        Dollar value of Dividend income. Data should be time series indexed.
+        Each column is assummed to be a different stock in the portfolio
+    use_initial_CF : bool, optional
+        Use the first row of cash_flow as the initial portfolio value instead of the first row
+        of val. The default is False.
+    resample_freq : str, optional
+        Resample frequency for the dollar weighted returns, as in dollar_weighted_return().
+        The default is 'auto'.
+    dwr : bool, optional
+        Compute the dollar weighted returns. The default is True; when False the dwr columns
+        are NaN.
+    end_rows : array-like of int, optional
+        Row position at which each column is evaluated, e.g. the last day a position was held.
+        Each column is treated as a separate series truncated after its end row, including the
+        'auto' resample frequency, so the values equal calling this function on val[col].iloc[:end + 1]
+        one column at a time. The default evaluates every column at the last row.
+
+    Returns
+    -------
+    metrics : dict of pandas.DataFrame
+        {"basic": ..., "total": ...}, each indexed by column with the return, return_ann, twr,
+        twr_ann, dwr and dwr_ann endpoint values (fractions, not %).
+    '''
+    val, cash_flows, div = prepare_data(val, cash_flows, div)
+    columns = val.columns
+    d = div[columns].to_numpy(dtype=float)
+
+    n_cols = len(columns)
+    end = np.full(n_cols, len(val) - 1) if end_rows is None else np.asarray(end_rows, dtype=int)
+    acc = _return_endpoints(val, cash_flows, div, use_initial_CF=use_initial_CF, end_rows=end_rows)
+    held = (acc.start >= 0) & (acc.start <= end)
+    years = _endpoint_years(val.index, acc.start, end)
+
+    dwr_basic, dwr_total = np.full(n_cols, np.nan), np.full(n_cols, np.nan)
+    if dwr and end_rows is None:
+        dwr_basic, dwr_total = _dwr_endpoints(
+            val, cash_flows, [None, d], use_initial_CF=use_initial_CF, resample_freq=resample_freq
+        )
+    elif dwr:
+        # Columns are separate series, so 'auto' resolves per column from its truncated length
+        freqs = np.array([
+            _resolve_dwr_resample_freq(val.iloc[:row + 1, [0]], resample_freq, base_rows=100) for row in end
+        ])
+        for freq in np.unique(freqs):
+            group = np.flatnonzero(freqs == freq)
+            dwr_basic[group], dwr_total[group] = _dwr_endpoints(
+                val.iloc[:, group], cash_flows[columns[group]], [None, d[:, group]],
+                use_initial_CF=use_initial_CF, resample_freq=freq, end_rows=end[group],
+            )
+
+    metrics = {}
+    for method, ret, mdr, dw in [("basic", "basic", "twr", dwr_basic), ("total", "basic_total", "twr_total", dwr_total)]:
+        ret_end = acc.last[ret]
+        # Columns that are never held report a time weighted return of 0
+        twr_end = np.where(held, acc.last[mdr], 0.0)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            metrics[method] = pd.DataFrame(
+                {
+                    "return": ret_end,
+                    "return_ann": np.power(ret_end + 1, 1 / years) - 1,
+                    "twr": twr_end,
+                    "twr_ann": np.power(twr_end + 1, 1 / years) - 1,
+                    "dwr": dw,
+                    "dwr_ann": np.power(1 + dw, 1 / years) - 1,
+                },
+                index=columns,
+            )
+    return metrics
 
 
 def contribution_analysis(
@@ -0,0 +1,197 @@
+import json
+import os
+import warnings
+from urllib.parse import quote
+
+import pandas as pd
+
+# Number of business days re-requested before the last cached bar on a top-up. The overlap is
+# compared with the cache to detect history rewritten by splits or yfinance's repair=True.
+OVERLAP_DAYS = 5
+
+# Relative tolerance used when comparing refetched bars with cached bars.
+CONSISTENCY_RTOL = 1e-6
+
+_DISABLED_VALUES = {"", "0", "off", "none", "false"}
+
+
+def get_cache_dir():
+    """
+    Directory used for the on-disk price cache.
+    Set the PRICE_CACHE_DIR environment variable to relocate the cache, or to 'off' to
+    disable it. Defaults to ~/.cache/portfolio_tracker/prices.
+    """
+    cache_dir = os.getenv("PRICE_CACHE_DIR")
+    if cache_dir is None:
+        return os.path.join(os.path.expanduser("~"), ".cache", "portfolio_tracker", "prices")
+    if cache_dir.strip().lower() in _DISABLED_VALUES:
+        return None
+    return cache_dir
+
+
+def _cache_path(ticker, cache_dir):
+    return os.path.join(cache_dir, quote(str(ticker), safe="") + ".parquet")
+
+
+def _atomic_write(path, write):
+    """Write via a temporary file and os.replace so readers never see a partly written file."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    finally:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+
+
+def load_history(ticker, start_date, cache_dir=None):
+    """
+    Load the cached Close/Dividends history for a ticker.
+
+    Parameters
+    ----------
+    ticker : str
+        Stock ticker.
+    start_date : datetime-like
+        First date the caller needs. Caches that start later than this are ignored so the
+        full history is refetched.
+    cache_dir : str, optional
+        Cache directory. The default is get_cache_dir().
+
+    Returns
+    -------
+    history : pandas.DataFrame or None
+        Cached history with fetch metadata in history.attrs["fetch"], or None if there is
+        no usable cache entry.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    if cache_dir is None:
+        return None
+    path = _cache_path(ticker, cache_dir)
+    if not os.path.exists(path):
+        return None
+    try:
+        history = pd.read_parquet(path)
+    except Exception:
+        # Unreadable/corrupt cache entries (or no parquet engine) fall back to a full fetch
+        return None
+
+    meta = history.attrs.get("fetch", {})
+    if history.empty or "start" not in meta or pd.Timestamp(meta["start"]) > pd.Timestamp(start_date):
+        return None
+    return history
+
+
+def save_history(ticker, history, start_date, cache_dir=None):
+    """
+    Write a ticker's Close/Dividends history to the cache, replacing any previous entry.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    if cache_dir is None or history is None or history.empty:
+        return
+    out = history[["Close", "Dividends"]].astype(float)
+    out.index = pd.DatetimeIndex(out.index, name="Date")
+    out.attrs["fetch"] = {
+        "ticker": str(ticker),
+        "start": pd.Timestamp(start_date).strftime("%Y-%m-%d"),
+        "last_bar": out.index.max().strftime("%Y-%m-%d"),
+        "fetched_at": pd.Timestamp.now().isoformat(timespec="seconds"),
+    }
+    try:
+        _atomic_write(_cache_path(ticker, cache_dir), out.to_parquet)
+    except Exception as exc:
+        warnings.warn(
+            f"Could not write price cache for {ticker}: {type(exc).__name__}: {exc}",
+            RuntimeWarning,
+        )
+
+
+def load_currency_map(cache_dir=None):
+    """
+    Persistent ticker -> trading currency map. Returns {} if there is none.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    if cache_dir is None:
+        return {}
+    try:
+        with open(os.path.join(cache_dir, "currencies.json")) as f:
+            currencies = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    return currencies if isinstance(currencies, dict) else {}
+
+
+def save_currency_map(currencies, cache_dir=None):
+    """
+    Write the ticker -> trading currency map, replacing any previous map.
+    """
+    cache_dir = cache_dir or get_cache_dir()
+    if cache_dir is None:
+        return
+
+    def _write(path):
+        with open(path, "w") as f:
+            json.dump(dict(sorted(currencies.items())), f, indent=1)
+
+    try:
+        _atomic_write(os.path.join(cache_dir, "currencies.json"), _write)
+    except Exception as exc:
+        warnings.warn(
+            f"Could not write currency map: {type(exc).__name__}: {exc}",
+            RuntimeWarning,
+        )
+
+
+def is_fresh(history, now=None):
+    """
+    True if no network request is needed: the cache was refreshed earlier today, or it holds
+    a completed bar (fetched after that day) for the last trading day.
+    """
+    now = pd.Timestamp.now() if now is None else pd.Timestamp(now)
+    today = now.normalize()
+    last_bar = history.index.max()
+    fetched_on = pd.Timestamp(history.attrs.get("fetch", {}).get("fetched_at", "1970-01-01")).normalize()
+    if fetched_on >= today:
+        return True
+    return last_bar >= today - pd.offsets.BDay(1) and fetched_on > last_bar
+
+
+def tail_start(history):
+    """
+    Start date for an incremental top-up request, a few business days before the last
+    cached bar so the overlap can be checked for consistency.
+    """
+    return history.index.max() - pd.offsets.BDay(OVERLAP_DAYS)
+
+
+def merge_tail(history, tail):
+    """
+    Append a freshly downloaded tail to a cached history.
+
+    Bars present in both frames are compared, except the last cached bar which may have been
+    an intraday snapshot. If they disagree (a split or repair=True rewrote history) None is
+    returned so the caller refetches the full history.
+
+    Returns
+    -------
+    pandas.DataFrame or None
+        Combined history, with the tail taking precedence from its first date onwards.
+    """
+    tail = tail[["Close", "Dividends"]].astype(float)
+    if tail.empty:
+        return history
+
+    overlap = history.index[(history.index >= tail.index.min()) & (history.index < history.index.max())]
+    overlap = overlap.intersection(tail.index)
+    if len(overlap):
+        cached = history.loc[overlap, ["Close", "Dividends"]].to_numpy()
+        fetched = tail.loc[overlap, ["Close", "Dividends"]].to_numpy()
+        both = ~(pd.isna(cached) | pd.isna(fetched))
+        diff = abs(cached[both] - fetched[both])
+        if (diff > CONSISTENCY_RTOL * abs(cached[both]) + 1e-9).any():
+            return None
+
+    combined = pd.concat([history[history.index < tail.index.min()], tail])
+    combined.attrs = history.attrs
+    return combined
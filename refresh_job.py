@@ -0,0 +1,89 @@
+import threading
+
+import data_provider as dp
+import share_tracking as share
+
+
+class RefreshJob:
+    """
+    Load a portfolio CSV, fetch its market data and process it on a background thread.
+
+    The result is staged on the job (merged_portfolio, and portfolio with the currency
+    conversion's FX messages in attrs["fx_warnings"]) until the caller swaps it in, so the
+    previously loaded portfolio stays usable meanwhile. Nothing here touches Streamlit state or
+    the process-global warning filters. Per-ticker progress is
+    available from progress() while the job runs.
+
+    Parameters
+    ----------
+    file : str or file-like
+        Portfolio CSV, as for share_tracking.get_userdata().
+    index : str
+        Benchmark ticker.
+    target_currency : str
+        Currency the processed portfolio is converted to.
+    """
+
+    def __init__(self, file, index, target_currency):
+        self.file = file
+        self.index = index
+        self.target_currency = target_currency
+        self.tickers = []
+        self.resolved = {}
+        self.stage = "queued"
+        self.merged_portfolio = None
+        self.portfolio = None
+        self.error = None
+        self.error_stage = None
+        self._last_ticker = None
+        self._lock = threading.Lock()
+        self._thread = threading.Thread(target=self._run, name="portfolio-refresh", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def done(self):
+        """True once the job has finished, successfully or not."""
+        return self._thread.ident is not None and not self._thread.is_alive()
+
+    def wait(self, timeout=None):
+        """Block until the job has finished or timeout seconds have passed. Returns done()."""
+        self._thread.join(timeout)
+        return self.done()
+
+    def progress(self):
+        """Snapshot of (stage, resolved ticker count, total ticker count, last resolved ticker)."""
+        with self._lock:
+            return self.stage, len(self.resolved), len(self.tickers), self._last_ticker
+
+    def _on_ticker(self, ticker, status):
+        with self._lock:
+            self.resolved[ticker] = status
+            self._last_ticker = ticker
+
+    def _set_stage(self, stage):
+        with self._lock:
+            self.stage = stage
+
+    def _run(self):
+        try:
+            self._set_stage("reading")
+            user_portfolio = share.get_userdata(self.file)
+            self.tickers = share.portfolio_tickers(user_portfolio, self.index)
+
+            self._set_stage("fetching")
+            merged_portfolio = dp.merge_pricedata(user_portfolio, self.index, progress=self._on_ticker)
+
+            self._set_stage("processing")
+            portfolio = share.process_data(merged_portfolio)
+            portfolio = share.convert_currency(portfolio, target_currency=self.target_currency, warn=False)
+
+            self.merged_portfolio = merged_portfolio
+            # Set last, a job with a portfolio is complete
+            self.portfolio = portfolio
+        except Exception as exc:
+            self.error = exc
+            self.error_stage = self.stage
+        finally:
+            self._set_stage("done")
@@ -1,4 +1,6 @@
 import performance_calcs as calc
+import fetch_pool
+import price_cache
 import pandas as pd
 import numpy as np
 import seaborn as sns
@@ -54,17 +56,21 @@ def _extract_ticker_history(download_df, ticker, single_ticker=False):
     if download_df is None or download_df.empty:
         return pd.DataFrame()
 
-    if single_ticker:
-        return download_df
-
     if isinstance(download_df.columns, pd.MultiIndex):
         if ticker in download_df.columns.get_level_values(0):
             return download_df[ticker]
+        if single_ticker and ticker in download_df.columns.get_level_values(-1):
+            return download_df.xs(ticker, axis=1, level=-1)
+        return pd.DataFrame()
+
+    if single_ticker:
+        return download_df
     return pd.DataFrame()
 
 
 def _download_single_ticker_history(ticker, start_time):
     try:
+        fetch_pool.throttle()
         single = yf.Ticker(ticker).history(
             start=start_time,
             interval="1d",
@@ -85,6 +91,7 @@ def download_price_div_series(ticker, start_date):
     """
     start_time = pd.Timestamp(start_date).strftime("%Y-%m-%d")
     try:
+        fetch_pool.throttle()
         df = yf.download(
             tickers=ticker,
             start=start_time,
@@ -119,8 +126,175 @@ def download_price_div_series(ticker, start_date):
     return out.sort_index().asfreq("B")
 
 
+def download_price_div_series_many(tickers, start_date, max_workers=None):
+    """
+    Download close/dividend history for several tickers concurrently with
+    download_price_div_series(), on the shared bounded fetch pool.
+    Returns a dict of ticker -> DataFrame (empty for tickers that failed or timed out).
+    """
+    results, errors = fetch_pool.fetch_all(
+        lambda t: download_price_div_series(t, start_date), tickers, max_workers=max_workers
+    )
+    return {t: results.get(t, pd.DataFrame()) for t in dict.fromkeys(tickers)}
+
+
+def _grouped_sum(values, starts):
+    """
+    Sum contiguous groups of `values`, group g running from starts[g] to the next start (or
+    the end of the array). Equal to summing each group on its own within float rounding.
+    """
+    if not len(starts):
+        return np.zeros(0)
+    return np.add.reduceat(values, starts)
+
+
+_CSV_ALIASES = {
+    "company": "Company",
+    "ticker": "Company",
+    "symbol": "Company",
+    "date": "Date",
+    "shares": "Shares",
+    "qty": "Shares",
+    "quantity": "Shares",
+    "price": "Price",
+    "brokerage": "Brokerage",
+    "fees": "Brokerage",
+    "fee": "Brokerage",
+    "adjustments": "Adjustments",
+    "adjustment": "Adjustments",
+}
+
+
+def _read_csv_blocks(filename, columns, chunksize=None, dtype=None, engine=None):
+    """
+    Yield the requested raw CSV columns, as one frame or in blocks of about chunksize rows.
+    pandas does not support chunksize with the pyarrow engine, so that combination streams
+    pyarrow record batches instead.
+    """
+    if chunksize is None:
+        yield pd.read_csv(filename, usecols=columns, dtype=dtype, engine=engine)
+    elif engine == "pyarrow":
+        import pyarrow as pa
+        import pyarrow.csv as pa_csv
+
+        # Read as text unless a dtype was given, to_numeric coerces bad values per block
+        column_types = {}
+        for column in columns:
+            try:
+                column_types[column] = pa.from_numpy_dtype(np.dtype(dtype[column]))
+            except (KeyError, TypeError):
+                column_types[column] = pa.string()
+        reader = pa_csv.open_csv(
+            filename,
+            read_options=pa_csv.ReadOptions(block_size=max(1 << 20, chunksize * 64)),
+            convert_options=pa_csv.ConvertOptions(include_columns=columns, column_types=column_types),
+        )
+        empty = True
+        for batch in reader:
+            empty = False
+            yield batch.to_pandas()
+        if empty:
+            # A header-only file has no batches
+            yield reader.schema.empty_table().to_pandas()
+    else:
+        yield from pd.read_csv(
+            filename, usecols=columns, dtype=dtype, engine=engine, chunksize=chunksize
+        )
+
+
+def _clean_transactions(block):
+    """
+    Coerce a block of renamed CSV rows to typed transactions and drop invalid rows.
+    """
+    for optional_col in ["Brokerage", "Adjustments"]:
+        if optional_col not in block.columns:
+            block[optional_col] = 0.0
+
+    import_a = block[["Company", "Date", "Shares", "Price", "Brokerage", "Adjustments"]].copy()
+    # Normalize ticker text and drop invalid placeholders before any str-cast side effects.
+    import_a["Company"] = import_a["Company"].astype("string").str.strip()
+    import_a["Company"] = import_a["Company"].replace(
+        {"": pd.NA, "nan": pd.NA, "NaN": pd.NA, "None": pd.NA, "null": pd.NA}
+    )
+    import_a["Date"] = pd.to_datetime(import_a["Date"], dayfirst=True, errors="coerce")
+    import_a = import_a.dropna(subset=["Company", "Date"]).dropna(how="all")
+
+    for num_col in ["Shares", "Price", "Brokerage", "Adjustments"]:
+        import_a[num_col] = pd.to_numeric(import_a[num_col], errors="coerce")
+    return import_a.dropna(subset=["Shares", "Price"], how="any")
+
+
+def _group_bounds(keys):
+    """First and last offsets of the runs of equal keys in a (stably sorted) key frame."""
+    starts = np.flatnonzero(~keys.duplicated().to_numpy())
+    ends = np.append(starts[1:], len(keys))[: len(starts)] - 1
+    return starts, ends
+
+
+def _aggregate_fills(fills):
+    """
+    Per company/date totals of a block of fills: summed shares, brokerage and adjustments,
+    the share weight and weighted price sums, and the last price of the day. Rows are stably
+    sorted so each company/date group is a contiguous block.
+    """
+    fills = fills.sort_values(["Company", "Date"], kind="stable")
+    keys = fills[["Company", "Date"]]
+    starts, ends = _group_bounds(keys)
+
+    prices = fills["Price"].to_numpy(dtype=float)
+    weight = fills["Shares"].abs().fillna(0).to_numpy(dtype=float)
+    return pd.DataFrame(
+        {
+            "Shares": _grouped_sum(fills["Shares"].to_numpy(dtype=float), starts),
+            "Brokerage": _grouped_sum(fills["Brokerage"].fillna(0).to_numpy(dtype=float), starts),
+            "Adjustments": _grouped_sum(fills["Adjustments"].fillna(0).to_numpy(dtype=float), starts),
+            "Weight": _grouped_sum(weight, starts),
+            "Weighted_price": _grouped_sum(prices * weight, starts),
+            "Last_price": prices[ends],
+        },
+        index=pd.MultiIndex.from_frame(keys.iloc[starts]),
+    )
+
+
+def _merge_fill_totals(partials):
+    """
+    Merge per-block totals from _aggregate_fills into one row per company/date. Later blocks
+    come later in the file, so a stable sort keeps the last price of each day last.
+    """
+    if len(partials) == 1:
+        return partials[0]
+    totals = pd.concat(partials).sort_index(kind="stable")
+    starts, ends = _group_bounds(totals.index.to_frame(index=False))
+    merged = {
+        column: _grouped_sum(totals[column].to_numpy(), starts)
+        for column in ["Shares", "Brokerage", "Adjustments", "Weight", "Weighted_price"]
+    }
+    merged["Last_price"] = totals["Last_price"].to_numpy()[ends]
+    return pd.DataFrame(merged, index=totals.index[starts])
+
+
+def _price_fills(totals):
+    """
+    One transaction row per company/date from merged fill totals. The price is the
+    share-weighted average, or the last price if the fills net to zero weight.
+    """
+    weight_sum = totals["Weight"].to_numpy()
+    with np.errstate(divide="ignore", invalid="ignore"):
+        weighted_price = totals["Weighted_price"].to_numpy() / weight_sum
+    price = np.where(weight_sum > 0, weighted_price, totals["Last_price"].to_numpy())
+    return pd.DataFrame(
+        {
+            "Shares": totals["Shares"],
+            "Price": price,
+            "Brokerage": totals["Brokerage"],
+            "Adjustments": totals["Adjustments"],
+        },
+        index=totals.index,
+    )
+
+
 ###################################################################################################
-def get_userdata(filename):
+def get_userdata(filename, chunksize=None, dtype=None, engine=None):
     """
     Reads a csv file of the users stock portfolio and loads into a dataframe.
     Column headers should be as follows:
@@ -141,6 +315,18 @@ def get_userdata(filename):
     ----------
     filename : string
         filepath of csv file.
+    chunksize : int, optional
+        Read the file in blocks of this many rows. Each block is cleaned and its same-day fills
+        pre-aggregated before the next is read, so memory is bounded by the number of distinct
+        company/date rows rather than the file size. Totals can differ from a single pass in
+        the last bits, as the partial sums are added in a different order. The default is None
+        (read in one pass).
+    dtype : dict, optional
+        Explicit dtypes keyed by the standard column names above, eg {'Shares': 'float64'}.
+        Company and Date are read as text unless given here. The default is None.
+    engine : string, optional
+        CSV parser engine passed to pandas.read_csv, eg 'c' or 'pyarrow'. With chunksize the
+        pyarrow engine streams record batches. The default is None (pandas default).
 
     Returns
     -------
@@ -148,93 +334,56 @@ def get_userdata(filename):
         Time series dataframe containing stock purchase and sale information
     """
 
-    # Read and normalize user CSV headers (case/spacing insensitive).
-    raw = pd.read_csv(filename)
-    raw.columns = [str(c).strip() for c in raw.columns]
-    lower_map = {c.lower(): c for c in raw.columns}
-
-    alias_map = {
-        "company": "Company",
-        "ticker": "Company",
-        "symbol": "Company",
-        "date": "Date",
-        "shares": "Shares",
-        "qty": "Shares",
-        "quantity": "Shares",
-        "price": "Price",
-        "brokerage": "Brokerage",
-        "fees": "Brokerage",
-        "fee": "Brokerage",
-        "adjustments": "Adjustments",
-        "adjustment": "Adjustments",
-    }
+    # Read and normalize user CSV headers once (case/spacing insensitive).
+    header = pd.read_csv(filename, nrows=0).columns
+    lower_map = {str(c).strip().lower(): c for c in header}
     rename_cols = {}
     for low, original in lower_map.items():
-        if low in alias_map:
-            rename_cols[original] = alias_map[low]
-    raw = raw.rename(columns=rename_cols)
+        if low in _CSV_ALIASES:
+            rename_cols[original] = _CSV_ALIASES[low]
+    # One source column per standard name (the last matching header wins)
+    rename_cols = {original: name for name, original in {v: k for k, v in rename_cols.items()}.items()}
 
     required = ["Company", "Date", "Shares", "Price"]
-    missing = [c for c in required if c not in raw.columns]
+    missing = [c for c in required if c not in rename_cols.values()]
     if missing:
         raise ValueError(
             "CSV is missing required column(s): " + ", ".join(missing)
         )
 
-    for optional_col in ["Brokerage", "Adjustments"]:
-        if optional_col not in raw.columns:
-            raw[optional_col] = 0.0
-
-    import_a = raw[["Company", "Date", "Shares", "Price", "Brokerage", "Adjustments"]].copy()
-    # Normalize ticker text and drop invalid placeholders before any str-cast side effects.
-    import_a["Company"] = import_a["Company"].astype("string").str.strip()
-    import_a["Company"] = import_a["Company"].replace(
-        {"": pd.NA, "nan": pd.NA, "NaN": pd.NA, "None": pd.NA, "null": pd.NA}
-    )
-    import_a["Date"] = pd.to_datetime(import_a["Date"], dayfirst=True, errors="coerce")
-    import_a = import_a.dropna(subset=["Company", "Date"]).dropna(how="all")
-
-    for num_col in ["Shares", "Price", "Brokerage", "Adjustments"]:
-        import_a[num_col] = pd.to_numeric(import_a[num_col], errors="coerce")
-    import_a = import_a.dropna(subset=["Shares", "Price"], how="any")
-
-    # Aggregate duplicate company/date rows (multiple fills in one day).
-    def _agg_same_day(group):
-        shares = group["Shares"].sum()
-        brokerage = group["Brokerage"].fillna(0).sum()
-        adjustments = group["Adjustments"].fillna(0).sum()
-        weight = group["Shares"].abs().fillna(0)
-        if weight.sum() > 0:
-            price = (group["Price"] * weight).sum() / weight.sum()
-        else:
-            price = group["Price"].dropna().iloc[-1] if group["Price"].notna().any() else np.nan
-        return pd.Series(
-            {
-                "Shares": shares,
-                "Price": price,
-                "Brokerage": brokerage,
-                "Adjustments": adjustments,
-            }
-        )
-
-    import_a = (
-        import_a.groupby(["Company", "Date"])[["Shares", "Price", "Brokerage", "Adjustments"]]
-        .apply(_agg_same_day)
-        .reset_index()
-    )
-    import_a = import_a.set_index(["Company", "Date"]).sort_index()
+    read_dtype = {
+        original: (dtype or {}).get(name, "string" if name in ("Company", "Date") else None)
+        for original, name in rename_cols.items()
+    }
+    read_dtype = {original: value for original, value in read_dtype.items() if value is not None}
+
+    # Clean each block and aggregate its duplicate company/date rows (multiple fills in one
+    # day) before the next block is read; only the per-day totals are kept. The totals are
+    # merged whenever the rows added since the last merge outnumber the merged rows, so they
+    # stay within about twice the number of distinct company/date rows.
+    partials = []
+    pending = 0
+    for block in _read_csv_blocks(
+        filename, list(rename_cols), chunksize=chunksize, dtype=read_dtype, engine=engine
+    ):
+        totals = _aggregate_fills(_clean_transactions(block.rename(columns=rename_cols)))
+        del block
+        partials.append(totals)
+        pending += len(totals)
+        if len(partials) > 2 and pending > len(partials[0]):
+            partials = [_merge_fill_totals(partials)]
+            pending = 0
+    import_a = _price_fills(_merge_fill_totals(partials))
     import_a = import_a.unstack(level=0)
 
     # Set column names
     import_a.columns.rename(["Params", "Company"], inplace=True)
 
     # Check whether all dates in portfolio are business days. Data may not be captured if not.
-    invalid_dates = []
-    business_days = import_a.sort_index().asfreq(freq="B").index
-    for i in import_a.index:
-        if i not in business_days:
-            invalid_dates.append(i.strftime("%Y-%m-%d"))
-    if invalid_dates:
+    dates = import_a.index
+    valid = np.is_busday(dates.values.astype("datetime64[D]")) & (dates == dates.normalize())
+    if not valid.all():
+        invalid_dates = dates[~valid].strftime("%Y-%m-%d")
         raise ValueError(
             "All transaction dates must be business days. Invalid date(s): "
             + ", ".join(invalid_dates)
@@ -243,56 +392,14 @@ def get_userdata(filename):
     return import_a
 
 
-def merge_pricedata(portfolio, index):
+def _download_histories(tickers, start_time, failed_tickers):
     """
-    Reads portfolio dataframe generated by get_userdata(), and extracts a list of stock tickers in
-    the portfolio. Use API to get time series stock price data for the stocks listed and merge price
-    data with the portfolio dataframe. The returned dataframe is indexed as a time series, with
-    business day frequency.
-
-
-    Parameters
-    ----------
-    portfolio : pandas.DataFrame
-        portfolio dataframe generated by get_userdata().
-    index : string
-        stock ticker to compare portfolio performance. Typically this would be the ticker
-        of an ETF that tracks an index, eg "SPY" which tracks the S&P 500 index.
-
-    Returns
-    -------
-    import_a : pandas.DataFrame
-        Time series dataframe containing stock purchase and sale information, merged with stock
-        price data over the time frame convered by the portfolio
-
+    Download Close/Dividends history for several tickers with one batch request, retrying
+    per ticker if the batch comes back empty. Failure reasons are recorded in failed_tickers.
+    Returns a dict of ticker -> DataFrame with a tz-naive index.
     """
-
-    # Portfolio start and end time for extracting data using API
-    start_date = min(portfolio.index)
-    start_time = start_date.strftime("%Y-%m-%d")
-    # start_time = int(start_date.timestamp())
-    # end_time = datetime.today().replace(second=0, microsecond=0).strftime("%m/%d/%Y")
-
-    # Fetch stock prices using API and merge with trading data
-    print("\nAPI call in progress...\n")
-    fetched_tickers = []
-    failed_tickers = {}
-
-    # Extract and sanitize ticker list (guard against NaN/blank labels leaking from columns).
-    raw_tickers = list(portfolio.columns.get_level_values("Company").unique()) + [index]
-    tickers = []
-    for t in raw_tickers:
-        if pd.isna(t):
-            continue
-        ts = str(t).strip()
-        if not ts or ts.lower() == "nan":
-            continue
-        if ts not in tickers:
-            tickers.append(ts)
-    if not tickers:
-        return portfolio
-
     try:
+        fetch_pool.throttle()
         batch = yf.download(
             tickers=tickers,
             start=start_time,
@@ -311,66 +418,162 @@ def merge_pricedata(portfolio, index):
             failed_tickers[t] = f"batch request error: {type(exc).__name__}"
         batch = pd.DataFrame()
 
-    # If batch is empty, retry per ticker to avoid an all-or-nothing failure.
-    if batch is None or batch.empty:
-        for t in tickers:
-            inputdata = _download_single_ticker_history(t, start_time)
-            if inputdata is None or inputdata.empty:
-                failed_tickers[t] = "no rows returned"
-                continue
-            if isinstance(inputdata.index, pd.DatetimeIndex) and inputdata.index.tz is not None:
-                inputdata.index = inputdata.index.tz_localize(None)
-            if "Close" not in inputdata.columns:
-                failed_tickers[t] = "missing Close column"
+    histories = {}
+    # If batch is empty, retry per ticker (concurrently) to avoid an all-or-nothing failure.
+    fallback = batch is None or batch.empty
+    if fallback:
+        singles, errors = fetch_pool.fetch_all(
+            lambda t: _download_single_ticker_history(t, start_time), tickers
+        )
+    single_ticker = len(tickers) == 1
+    for t in tickers:
+        if fallback:
+            if t in errors:
+                failed_tickers[t] = f"request error: {type(errors[t]).__name__}"
                 continue
-            if "Dividends" not in inputdata.columns:
-                inputdata["Dividends"] = 0
-            cols = pd.MultiIndex.from_arrays([["$", "Div"], [t, t]], names=["Params", "Company"])
-            df = pd.DataFrame(
-                inputdata[["Close", "Dividends"]].values,
-                index=inputdata.index,
-                columns=cols,
-            )
-            portfolio = pd.merge(portfolio, df, how="outer", left_index=True, right_index=True).drop_duplicates()
-            fetched_tickers.append(t)
+            inputdata = singles[t]
+        else:
+            inputdata = _extract_ticker_history(batch, t, single_ticker=single_ticker)
+        if inputdata is None or inputdata.empty:
+            failed_tickers[t] = "no rows returned"
+            if not fallback:
+                print(f"Warning: no data returned for {t}. Skipping...")
+            continue
+        inputdata = inputdata.copy()
 
-        batch = None  # signal that fallback handled merging
+        if "Close" not in inputdata.columns:
+            failed_tickers[t] = "missing Close column"
+            if not fallback:
+                print(f"Warning: missing Close column for {t}. Skipping...")
+            continue
 
-    single_ticker = len(tickers) == 1
-    if batch is not None:
-        for i in tickers:
-            inputdata = _extract_ticker_history(batch, i, single_ticker=single_ticker)
-            if inputdata is None or inputdata.empty:
-                failed_tickers[i] = "no rows returned"
-                print(f"Warning: no data returned for {i}. Skipping...")
-                continue
-            inputdata = inputdata.copy()
+        if isinstance(inputdata.index, pd.DatetimeIndex) and inputdata.index.tz is not None:
+            inputdata.index = inputdata.index.tz_localize(None)
 
-            if "Close" not in inputdata.columns:
-                failed_tickers[i] = "missing Close column"
-                print(f"Warning: missing Close column for {i}. Skipping...")
-                continue
+        if "Dividends" not in inputdata.columns:
+            inputdata["Dividends"] = 0
 
-            if isinstance(inputdata.index, pd.DatetimeIndex) and inputdata.index.tz is not None:
-                inputdata.index = inputdata.index.tz_localize(None)
+        histories[t] = inputdata[["Close", "Dividends"]]
+        failed_tickers.pop(t, None)
 
-            cols = pd.MultiIndex.from_arrays(
-                [["$", "Div"], [i, i]], names=["Params", "Company"]
-            )
+    return histories
 
-            if "Dividends" not in inputdata.columns:
-                inputdata["Dividends"] = 0
 
-            df = pd.DataFrame(
-                inputdata[["Close", "Dividends"]].values,
-                index=inputdata.index,
-                columns=cols,
-            )
+def portfolio_tickers(portfolio, index):
+    """
+    Sanitized, de-duplicated ticker list of a portfolio plus the benchmark index (guards
+    against NaN/blank labels leaking from columns).
+    """
+    raw_tickers = list(portfolio.columns.get_level_values("Company").unique()) + [index]
+    tickers = []
+    for t in raw_tickers:
+        if pd.isna(t):
+            continue
+        ts = str(t).strip()
+        if not ts or ts.lower() == "nan":
+            continue
+        if ts not in tickers:
+            tickers.append(ts)
+    return tickers
 
-            portfolio = pd.merge(
-                portfolio, df, how="outer", left_index=True, right_index=True
-            ).drop_duplicates()
-            fetched_tickers.append(i)
+
+def fetch_price_histories(tickers, start_date, use_cache=True, progress=None):
+    """
+    Fetch Close/Dividends history from start_date for every ticker, through the on-disk price
+    cache. Cached tickers only request bars after the last cached date, and tickers that share
+    a request start date are downloaded together.
+
+    Parameters
+    ----------
+    tickers : list of str
+        Stock tickers, eg the union of several portfolios' tickers.
+    start_date : datetime-like
+        First date needed.
+    use_cache : bool, optional
+        Read and update the on-disk price cache (see price_cache.py). The default is True.
+    progress : callable, optional
+        Called as progress(ticker, status) as each ticker is resolved, with status "cached",
+        "fetched" or "failed". The default is None.
+
+    Returns
+    -------
+    histories : dict
+        ticker -> DataFrame of Close and Dividends. Cached histories may start before start_date.
+    failed_tickers : dict
+        ticker -> reason for tickers with no usable history.
+    cached_tickers : list
+        Tickers served from the cache without a successful download.
+    """
+    start_date = pd.Timestamp(start_date)
+    start_time = start_date.strftime("%Y-%m-%d")
+    print("\nAPI call in progress...\n")
+    failed_tickers = {}
+
+    def _report(ticker, status):
+        if progress is not None:
+            progress(ticker, status)
+
+    # Reuse cached histories and only request the missing tail since the last cached bar
+    histories = {}
+    cached = {}
+    requests = {start_time: []}
+    for t in tickers:
+        history = price_cache.load_history(t, start_date) if use_cache else None
+        if history is None:
+            requests[start_time].append(t)
+        elif price_cache.is_fresh(history):
+            histories[t] = history
+        else:
+            cached[t] = history
+            requests.setdefault(price_cache.tail_start(history).strftime("%Y-%m-%d"), []).append(t)
+    cached_tickers = list(histories)
+    for t in cached_tickers:
+        _report(t, "cached")
+
+    refetch = []
+    for request_start, request_tickers in requests.items():
+        if not request_tickers:
+            continue
+        downloaded = _download_histories(request_tickers, request_start, failed_tickers)
+        for t in request_tickers:
+            if t not in downloaded:
+                if t in cached:
+                    # Serve the stale cache rather than dropping the ticker
+                    histories[t] = cached[t]
+                    cached_tickers.append(t)
+                    failed_tickers.pop(t, None)
+                    print(f"Warning: could not refresh {t}, using cached prices.")
+                    _report(t, "cached")
+                else:
+                    _report(t, "failed")
+                continue
+            history = downloaded[t]
+            history_start = start_date
+            if t in cached:
+                history_start = cached[t].attrs["fetch"]["start"]
+                history = price_cache.merge_tail(cached[t], history)
+                if history is None:
+                    # Refetched bars disagree with the cache (split or repair), rebuild it
+                    refetch.append(t)
+                    continue
+            histories[t] = history
+            if use_cache:
+                price_cache.save_history(t, history, history_start)
+            _report(t, "fetched")
+
+    if refetch:
+        downloaded = _download_histories(refetch, start_time, failed_tickers)
+        for t in refetch:
+            if t in downloaded:
+                histories[t] = downloaded[t]
+                price_cache.save_history(t, downloaded[t], start_date)
+                _report(t, "fetched")
+            else:
+                histories[t] = cached[t]
+                cached_tickers.append(t)
+                failed_tickers.pop(t, None)
+                print(f"Warning: could not refresh {t}, using cached prices.")
+                _report(t, "cached")
 
     print("API call complete\n")
     if failed_tickers:
@@ -378,12 +581,91 @@ def merge_pricedata(portfolio, index):
         for ticker, reason in failed_tickers.items():
             print(f"  - {ticker}: {reason}")
 
+    return histories, failed_tickers, cached_tickers
+
+
+def merge_pricedata(portfolio, index, use_cache=True, price_histories=None, progress=None):
+    """
+    Reads portfolio dataframe generated by get_userdata(), and extracts a list of stock tickers in
+    the portfolio. Use API to get time series stock price data for the stocks listed and merge price
+    data with the portfolio dataframe. The returned dataframe is indexed as a time series, with
+    business day frequency.
+
+
+    Parameters
+    ----------
+    portfolio : pandas.DataFrame
+        portfolio dataframe generated by get_userdata().
+    index : string
+        stock ticker to compare portfolio performance. Typically this would be the ticker
+        of an ETF that tracks an index, eg "SPY" which tracks the S&P 500 index.
+    use_cache : bool, optional
+        Read and update the on-disk price cache (see price_cache.py). Cached tickers only
+        request bars after the last cached date. The default is True.
+    price_histories : tuple, optional
+        Result of fetch_price_histories() for these tickers (or a superset of them) from the
+        portfolio start date or earlier, eg shared by a batch of portfolios. Nothing is
+        downloaded. The default is None (fetch here).
+    progress : callable, optional
+        Per-ticker progress callback, see fetch_price_histories(). The default is None.
+
+    Returns
+    -------
+    import_a : pandas.DataFrame
+        Time series dataframe containing stock purchase and sale information, merged with stock
+        price data over the time frame convered by the portfolio
+
+    """
+
+    # Portfolio start time for extracting data using API
+    start_date = min(portfolio.index)
+    fetched_tickers = []
+
+    tickers = portfolio_tickers(portfolio, index)
+    if not tickers:
+        return portfolio
+
+    if price_histories is None:
+        histories, failed_tickers, cached_tickers = fetch_price_histories(
+            tickers, start_date, use_cache=use_cache, progress=progress
+        )
+    else:
+        histories, failed, cached = price_histories
+        failed_tickers = {
+            t: failed.get(t, "not in the fetched price histories") for t in tickers if t not in histories
+        }
+        cached_tickers = [t for t in cached if t in tickers]
+
+    # Collect every ticker's $/Div block, then align them all onto one business-day index
+    blocks = []
+    for t in tickers:
+        if t not in histories:
+            continue
+        # Cached histories may start before this portfolio
+        inputdata = histories[t].loc[start_date:]
+        cols = pd.MultiIndex.from_arrays([["$", "Div"], [t, t]], names=["Params", "Company"])
+        df = pd.DataFrame(
+            inputdata[["Close", "Dividends"]].values,
+            index=inputdata.index,
+            columns=cols,
+        )
+        blocks.append(df[~df.index.duplicated(keep="last")])
+        fetched_tickers.append(t)
+
+    if blocks:
+        frames = [portfolio] + blocks
+        bday_index = pd.bdate_range(
+            min(f.index.min() for f in frames), max(f.index.max() for f in frames)
+        )
+        portfolio = pd.concat([f.reindex(bday_index) for f in frames], axis=1)
+
     # Set to 'Business day' datetime frequency
     portfolio = portfolio.sort_index().asfreq(freq="B")
     portfolio.attrs["price_fetch"] = {
         "provider": "yfinance",
         "fetched": fetched_tickers,
         "failed": failed_tickers,
+        "cached": cached_tickers,
     }
 
     # Set accumulated shares for the index to 1, to simplify later calculations
@@ -393,7 +675,67 @@ def merge_pricedata(portfolio, index):
 
 
 
-def process_data(portfolio):
+# Transaction fields carried by the event store, in output block order
+EVENT_PARAMS = ("Shares", "Price", "Brokerage", "Adjustments")
+
+
+def transaction_events(portfolio):
+    """
+    Reads the transaction blocks (Shares, Price, Brokerage, Adjustments) of a portfolio dataframe
+    generated by get_userdata() or merge_pricedata(), and returns them as a sparse event list with
+    one row per company and trading day that has a non-zero transaction field.
+
+
+    Parameters
+    ----------
+    portfolio : pandas.DataFrame
+        portfolio dataframe generated by get_userdata() or merge_pricedata().
+
+    Returns
+    -------
+    events : pandas.DataFrame
+        Columns Company (categorical, categories are the portfolio tickers in column order), Date,
+        Shares, Price, Brokerage and Adjustments, sorted by company and date. Missing blocks and
+        NaN values are read as 0.
+    """
+    tickers = portfolio["Shares"].columns
+    available_params = set(portfolio.columns.get_level_values("Params"))
+    values = {
+        param: (
+            np.nan_to_num(portfolio[param].reindex(columns=tickers).to_numpy(dtype=np.float64), nan=0.0)
+            if param in available_params
+            else np.zeros((len(portfolio.index), len(tickers)))
+        )
+        for param in EVENT_PARAMS
+    }
+    mask = np.zeros((len(portfolio.index), len(tickers)), dtype=bool)
+    for param in EVENT_PARAMS:
+        mask |= values[param] != 0
+
+    # Transposed so events come out grouped by company, in date order
+    codes, rows = np.nonzero(mask.T)
+    events = pd.DataFrame(
+        {
+            "Company": pd.Categorical.from_codes(codes, categories=tickers),
+            "Date": portfolio.index[rows],
+        }
+    )
+    for param in EVENT_PARAMS:
+        events[param] = values[param][rows, codes]
+    return events
+
+
+def _event_positions(events, index, tickers):
+    """Row and column positions of each event, sorted by column then row."""
+    rows = index.get_indexer(pd.DatetimeIndex(events["Date"]))
+    cols = pd.Index(tickers).get_indexer(events["Company"])
+    if (rows < 0).any() or (cols < 0).any():
+        raise ValueError("Transaction events fall outside the portfolio dates or tickers.")
+    order = np.lexsort((rows, cols))
+    return rows[order], cols[order], order
+
+
+def process_data(portfolio, events=None):
     """
     Reads portfolio dataframe generated by merge_stockdata(), and performs basic processing of the
     data including handling of NaN values and adding the following time series indexed columns to
@@ -402,11 +744,20 @@ def process_data(portfolio):
         Val: Dollar value of each stock holdings
         Buy_amt: Dollar amount cash folws in and out of portfolio
 
+    Holdings and cash flows are computed from a sparse transaction event list, so the running
+    totals are only evaluated on each ticker's transaction days, and the derived blocks only over
+    the window from each ticker's first transaction.
+
 
     Parameters
     ----------
     portfolio : pandas.DataFrame
         portfolio dataframe generated by get_stockdata().
+    events : pandas.DataFrame, optional
+        Transaction events in the layout returned by transaction_events(), at most one row per
+        Company/Date. When given, the portfolio only needs the "$" and "Div" market blocks and the
+        transaction blocks are rebuilt from the events. The default reads the events from the
+        portfolio's transaction blocks.
 
     Returns
     -------
@@ -415,10 +766,8 @@ def process_data(portfolio):
         price data over the time frame convered by the portfolio
 
     """
-    # Define IndexSlice for dataframe slicing
-    idx = pd.IndexSlice
     available_params = set(portfolio.columns.get_level_values("Params"))
-    required_params = {"$", "Div", "Price", "Shares"}
+    required_params = {"$", "Div"} if events is not None else {"$", "Div", "Price", "Shares"}
     missing_params = sorted(required_params - available_params)
     if missing_params:
         raise ValueError(
@@ -427,196 +776,559 @@ def process_data(portfolio):
             + ". Price provider may have returned no market data."
         )
 
+    if events is None:
+        events = transaction_events(portfolio)
+        has_adjustments = "Adjustments" in available_params
+    else:
+        has_adjustments = bool((events["Adjustments"] != 0).any())
+
     # Tickers from user transactions (do not assume every ticker has fetched price/dividend columns).
-    portfolio_cols = portfolio["Shares"].columns
-    # Align parameter blocks; keep benchmark-only market columns in "$"/"Div".
+    if isinstance(events["Company"].dtype, pd.CategoricalDtype):
+        portfolio_cols = pd.Index(events["Company"].cat.categories)
+    else:
+        portfolio_cols = pd.Index(pd.unique(events["Company"]))
+    portfolio_cols.name = "Company"
+    n_rows = len(portfolio.index)
+
+    # Align market blocks; keep benchmark-only market columns in "$"/"Div".
     market_cols_all = pd.Index(portfolio["$"].columns).union(portfolio_cols)
     price_market_all = portfolio["$"].reindex(columns=market_cols_all).ffill().fillna(0)
     div_all = portfolio["Div"].reindex(columns=market_cols_all).fillna(0)
-    price_market = price_market_all.reindex(columns=portfolio_cols).fillna(0)
-    shares_df = portfolio["Shares"].reindex(columns=portfolio_cols).fillna(0)
-    price_txn = portfolio["Price"].reindex(columns=portfolio_cols).fillna(0)
-    div_df = div_all.reindex(columns=portfolio_cols).fillna(0)
-    brokerage_df = (
-        portfolio["Brokerage"].reindex(columns=portfolio_cols).fillna(0)
-        if "Brokerage" in available_params
-        else pd.DataFrame(0.0, index=portfolio.index, columns=portfolio_cols)
-    )
-    adjustments_df = (
-        portfolio["Adjustments"].reindex(columns=portfolio_cols).fillna(0)
-        if "Adjustments" in available_params
-        else pd.DataFrame(0.0, index=portfolio.index, columns=portfolio_cols)
-    )
 
-    # Replace core parameter blocks with normalized versions to guarantee consistent columns.
-    replace_params = {"$", "Shares", "Price", "Div", "Brokerage", "Adjustments"}
-    keep_mask = ~portfolio.columns.get_level_values("Params").isin(replace_params)
-    portfolio_base = portfolio.loc[:, keep_mask].copy()
-    normalized_blocks = [
-        pd.DataFrame(
-            price_market_all.values,
-            index=portfolio.index,
-            columns=pd.MultiIndex.from_product([["$"], market_cols_all], names=["Params", "Company"]),
-        ),
-        pd.DataFrame(
-            shares_df.values,
-            index=portfolio.index,
-            columns=pd.MultiIndex.from_product([["Shares"], portfolio_cols], names=["Params", "Company"]),
-        ),
-        pd.DataFrame(
-            price_txn.values,
-            index=portfolio.index,
-            columns=pd.MultiIndex.from_product([["Price"], portfolio_cols], names=["Params", "Company"]),
-        ),
-        pd.DataFrame(
-            div_all.values,
-            index=portfolio.index,
-            columns=pd.MultiIndex.from_product([["Div"], market_cols_all], names=["Params", "Company"]),
-        ),
-        pd.DataFrame(
-            brokerage_df.values,
-            index=portfolio.index,
-            columns=pd.MultiIndex.from_product([["Brokerage"], portfolio_cols], names=["Params", "Company"]),
-        ),
-        pd.DataFrame(
-            adjustments_df.values,
-            index=portfolio.index,
-            columns=pd.MultiIndex.from_product([["Adjustments"], portfolio_cols], names=["Params", "Company"]),
-        ),
+    # Allocate the output once, in the established column order, and fill each block in place.
+    # Rows before a ticker's first event stay zero, so only the events and held windows are written.
+    layout = [
+        ("$", market_cols_all), ("Shares", portfolio_cols), ("Price", portfolio_cols),
+        ("Div", market_cols_all), ("Brokerage", portfolio_cols), ("Adjustments", portfolio_cols),
+        ("Buy_amt", portfolio_cols), ("Accum", portfolio_cols), ("Val", portfolio_cols),
+        ("Div_tot", portfolio_cols),
     ]
-    portfolio = pd.concat([portfolio_base] + normalized_blocks, axis=1)
-    # Accumulated shares
-    Accum = (
-        shares_df[~np.isnan(shares_df)].cumsum().ffill().fillna(0)
+    columns = pd.MultiIndex.from_tuples(
+        [(param, company) for param, companies in layout for company in companies],
+        names=["Params", "Company"],
     )
-    Accum.columns = pd.MultiIndex.from_product(
-        [["Accum"], portfolio_cols], names=["Params", "Company"]
-    )
-    # Current val of each stock holding
-    Val = price_market * Accum.droplevel("Params", axis=1)
-    # Cash flows into portfolio
-    Buy_amt = (price_txn * shares_df).fillna(0)
-    Buy_amt = Buy_amt + brokerage_df
-    # Dividend series (used directly when no adjustment column exists)
-    Div = div_df
-
-    if "Adjustments" in available_params:
-
-        # Cash flow adjustments due to demerger/acquisition event.
-        Buy_amt = Buy_amt + adjustments_df * Buy_amt.cumsum()
-        # For use in div_tot calc.
-        Div = (
-            div_df
-            + adjustments_df * div_df.cumsum()
+    values = np.zeros((n_rows, len(columns)))
+    block = {}
+    offset = 0
+    for param, companies in layout:
+        block[param] = values[:, offset:offset + len(companies)]
+        offset += len(companies)
+    block["$"][:] = price_market_all.to_numpy(dtype=np.float64)
+    block["Div"][:] = div_all.to_numpy(dtype=np.float64)
+    market_positions = market_cols_all.get_indexer(portfolio_cols)
+    price_market = block["$"][:, market_positions]
+    div_values = block["Div"][:, market_positions]
+
+    rows, cols, order = _event_positions(events, portfolio.index, portfolio_cols)
+    event_values = {param: events[param].to_numpy(dtype=np.float64)[order] for param in EVENT_PARAMS}
+    for param in EVENT_PARAMS:
+        block[param][rows, cols] = event_values[param]
+
+    # Running totals per ticker, evaluated on transaction days only and held until the next one.
+    # Leading zeros do not change a cumulative sum, so these match cumsums over the full calendar.
+    accum, buy_amt = block["Accum"], block["Buy_amt"]
+    event_buy_amt = event_values["Price"] * event_values["Shares"] + event_values["Brokerage"]
+    bounds = np.flatnonzero(np.diff(cols)) + 1
+    for group in np.split(np.arange(len(rows)), bounds):
+        if not len(group):
+            continue
+        col, group_rows = cols[group[0]], rows[group]
+        first = group_rows[0]
+        held_days = np.diff(np.append(group_rows, n_rows))
+        accum[first:, col] = np.repeat(np.cumsum(event_values["Shares"][group]), held_days)
+        flows = event_buy_amt[group]
+        adjustments = event_values["Adjustments"][group]
+        if has_adjustments:
+            # Cash flow adjustments due to demerger/acquisition event.
+            flows = flows + adjustments * np.cumsum(flows)
+        buy_amt[group_rows, col] = flows
+
+        # Current val of the holding, and total dollar value of dividends, over the held window
+        held = accum[first:, col]
+        block["Val"][first:, col] = price_market[first:, col] * held
+        div_held = div_values[first:, col]
+        if has_adjustments and adjustments.any():
+            # Adjusted dividends for the Div_tot calc, changed on adjustment days only
+            div_held = div_held.copy()
+            div_held[group_rows - first] += adjustments * np.cumsum(div_values[:, col])[group_rows]
+        block["Div_tot"][first:, col] = np.round(div_held * held, 2)
+
+    processed = pd.DataFrame(values, index=portfolio.index, columns=columns)
+
+    # Keep any other parameter blocks ahead of the normalized ones
+    replace_params = {"$", "Div"} | set(EVENT_PARAMS)
+    keep_mask = ~portfolio.columns.get_level_values("Params").isin(replace_params)
+    if keep_mask.any():
+        processed = pd.concat([portfolio.loc[:, keep_mask], processed], axis=1)
+
+    return processed
+
+
+def _replace_events(frames, categories=None):
+    """Concatenate event lists, later rows replacing earlier ones on the same Company/Date."""
+    frames = [frame for frame in frames if frame is not None and len(frame)]
+    if frames:
+        combined = pd.concat(
+            [frame.assign(Company=frame["Company"].astype(object)) for frame in frames], ignore_index=True
         )
+        combined = combined.drop_duplicates(subset=["Company", "Date"], keep="last")
+    else:
+        combined = pd.DataFrame({"Company": pd.Series(dtype=object), "Date": pd.Series(dtype="datetime64[ns]")})
+    combined["Date"] = pd.DatetimeIndex(combined["Date"])
+    combined["Company"] = pd.Categorical(combined["Company"], categories=categories)
+    for param in EVENT_PARAMS:
+        combined[param] = combined[param].astype(np.float64) if param in combined else 0.0
+    return combined[["Company", "Date"] + list(EVENT_PARAMS)].reset_index(drop=True)
+
+
+def append_processed_data(processed_portfolio, market_data=None, events=None):
+    """
+    Incrementally updates a portfolio dataframe generated by process_data() with new market data
+    rows and/or new transactions, recomputing only the rows from the first affected date onwards.
+    Running state (accumulated shares, cumulative cash flows and cumulative dividends) is carried
+    forward from the last unaffected row, and the result is identical to calling process_data()
+    on the full updated history.
 
-    # Keep company-only dividend columns for Div_tot calculation
-    div_base = Div.copy()
+    Apply this to the output of process_data() before convert_currency(). Updates that add new
+    tickers, or a processed frame with extra parameter blocks, fall back to a full rebuild from
+    the processed frame.
 
-    # reset column names
-    for val, val_name in zip([Val, Buy_amt, Div], ["Val", "Buy_amt", "Div"]):
-        val.columns = pd.MultiIndex.from_product(
-            [[val_name], portfolio_cols], names=["Params", "Company"]
+
+    Parameters
+    ----------
+    processed_portfolio : pandas.DataFrame
+        portfolio dataframe generated by process_data().
+    market_data : pandas.DataFrame, optional
+        New rows with "$" and "Div" blocks, in the layout returned by merge_pricedata(). Values
+        replace existing ones on dates already in the processed frame, NaN cells keep them. Any
+        transaction blocks (Shares, Price, Brokerage, Adjustments) are read as new events.
+    events : pandas.DataFrame, optional
+        New transactions in the layout returned by transaction_events(). An event replaces any
+        existing transaction for the same Company/Date.
+
+    Returns
+    -------
+    processed : pandas.DataFrame
+        Updated processed portfolio covering the original dates plus any new business days.
+    """
+    processed = processed_portfolio
+    tickers = processed["Shares"].columns
+    market_cols = processed["$"].columns
+    available_params = set(processed.columns.get_level_values("Params"))
+
+    update_events = []
+    if market_data is not None and "Shares" in set(market_data.columns.get_level_values("Params")):
+        update_events.append(transaction_events(market_data))
+    if events is not None:
+        update_events.append(events)
+    new_events = _replace_events(update_events)
+
+    # Dates touched by the update
+    new_dates = pd.DatetimeIndex(new_events["Date"])
+    if market_data is not None:
+        new_dates = new_dates.append(pd.DatetimeIndex(market_data.index))
+    if not len(new_dates):
+        return processed.copy()
+    if new_dates.min() < processed.index[0]:
+        raise ValueError("Cannot append data dated before the first processed date.")
+
+    # Extend the business-day index past the last processed date
+    index = processed.index.append(pd.bdate_range(processed.index[-1], new_dates.max())[1:])
+    first_row = index.get_indexer([new_dates.min()])[0]
+    if first_row < 0:
+        raise ValueError("Appended data must be dated on business days.")
+
+    # New tickers, new market columns or extra blocks change the layout, so rebuild everything
+    new_tickers = pd.Index(new_events["Company"].astype(object).unique()).difference(tickers)
+    new_market_cols = pd.Index([])
+    if market_data is not None:
+        new_market_cols = pd.Index(market_data["$"].columns).difference(market_cols)
+    extra_params = available_params - {"$", "Div", "Buy_amt", "Accum", "Val", "Div_tot"} - set(EVENT_PARAMS)
+    rebuild = first_row == 0 or len(new_tickers) or len(new_market_cols) or bool(extra_params)
+    start_row = 0 if rebuild else first_row - 1
+    categories = tickers.union(new_tickers) if len(new_tickers) else tickers
+    all_market_cols = market_cols.union(new_market_cols.union(new_tickers)) if rebuild else market_cols
+
+    # Market blocks for the recomputed rows, with the update's values overlaid
+    rows_index = index[start_row:]
+    market_blocks = {}
+    for param in ["$", "Div"]:
+        block = processed[param].iloc[start_row:].reindex(index=rows_index, columns=all_market_cols)
+        if market_data is not None and param in set(market_data.columns.get_level_values("Params")):
+            update = market_data[param].reindex(index=rows_index, columns=all_market_cols)
+            block = update.where(update.notna(), block)
+        market_blocks[param] = block
+
+    # Existing transactions from the first affected row onwards, replaced by the update's events
+    event_rows = processed.iloc[start_row if rebuild else first_row:]
+    tail_events = _replace_events([transaction_events(event_rows), new_events], categories)
+    tail_events = tail_events[tail_events[list(EVENT_PARAMS)].ne(0).any(axis=1)]
+
+    if not rebuild:
+        # Seed row: the last unaffected row carries the running totals as a synthetic event, so
+        # the cumulative sums continue exactly where the processed frame left off.
+        seed_date = index[start_row]
+        seed = pd.DataFrame(
+            {
+                "Company": pd.Categorical(tickers, categories=categories),
+                "Date": seed_date,
+                "Shares": processed["Accum"].iloc[start_row].to_numpy(dtype=np.float64),
+                "Price": 0.0,
+                "Brokerage": 0.0,
+                "Adjustments": 0.0,
+            }
         )
-    # Total dollar value of dividend
-    Div_tot = (div_base * Accum.droplevel("Params", axis=1)).round(2)
-    Div_tot.columns = pd.MultiIndex.from_product(
-        [["Div_tot"], portfolio_cols], names=["Params", "Company"]
+        adjusted = tail_events.loc[tail_events["Adjustments"] != 0, "Company"].astype(object)
+        adjusted = pd.Index(adjusted.unique())
+        if len(adjusted):
+            history = processed.iloc[:first_row]
+            raw_flows = (
+                history["Price"][adjusted].to_numpy(dtype=np.float64)
+                * history["Shares"][adjusted].to_numpy(dtype=np.float64)
+                + history["Brokerage"][adjusted].to_numpy(dtype=np.float64)
+            )
+            seed.loc[tickers.get_indexer(adjusted), "Brokerage"] = np.cumsum(raw_flows, axis=0)[-1]
+            market_blocks["Div"].loc[seed_date, adjusted] = np.cumsum(
+                history["Div"][adjusted].to_numpy(dtype=np.float64), axis=0
+            )[-1]
+        tail_events = pd.concat([seed, tail_events], ignore_index=True)
+
+    frame = pd.concat(market_blocks, axis=1, names=["Params", "Company"])
+    if rebuild and extra_params:
+        extra = processed.loc[:, processed.columns.get_level_values("Params").isin(extra_params)]
+        frame = pd.concat([extra.reindex(rows_index), frame], axis=1)
+    tail = process_data(frame, events=tail_events)
+
+    if rebuild:
+        result = tail
+    else:
+        result = pd.concat([processed.iloc[:first_row], tail.iloc[1:].reindex(columns=processed.columns)])
+    result.index = index
+    result.attrs = dict(processed.attrs)
+    return result
+
+
+def _lookup_currency(ticker):
+    """
+    Trading currency of a ticker from yfinance history metadata, falling back to fast_info.
+    """
+    fetch_pool.throttle()
+    ticker_obj = yf.Ticker(ticker)
+    metadata = ticker_obj.get_history_metadata() or {}
+    currency = metadata.get("currency")
+    if not currency:
+        # fast_info can still provide currency when metadata is incomplete
+        try:
+            currency = ticker_obj.fast_info.get("currency")
+        except Exception:
+            currency = None
+    if not currency:
+        raise ValueError("currency metadata unavailable")
+    return currency
+
+
+def _resolve_currencies(tickers):
+    """
+    Map tickers to their trading currency. Tickers already in the persistent currency map are
+    not looked up again, the rest are resolved concurrently on the fetch pool.
+    Returns (currencies, errors) where errors maps unresolved tickers to their exception.
+    """
+    known = price_cache.load_currency_map()
+    currencies = {t: known[t] for t in tickers if t in known}
+    missing = [t for t in tickers if t not in currencies]
+    errors = {}
+    if missing:
+        # One stderr redirect around the whole batch, redirect_stderr is not thread-safe
+        found, errors = safe_yf_call(fetch_pool.fetch_all, _lookup_currency, missing)
+        if found:
+            currencies.update(found)
+            price_cache.save_currency_map({**known, **found})
+    return currencies, errors
+
+
+def _fetch_ticker_metadata(ticker, currency=None):
+    """
+    Dividends, corporate actions, dividend calendar and (unless given) currency of one ticker
+    from a single yfinance handle. Fields that could not be fetched are None, with the
+    exception type name in "errors".
+    """
+    ticker_obj = yf.Ticker(ticker)
+    metadata = {"currency": currency, "dividends": None, "actions": None, "calendar": None, "errors": {}}
+
+    # dividends loads the ticker's full price history, actions and the history metadata
+    # (currency) are then read from the same handle without another request
+    for field in ("dividends", "actions", "calendar"):
+        try:
+            if field != "actions":
+                fetch_pool.throttle()
+            metadata[field] = getattr(ticker_obj, field)
+        except Exception as exc:
+            metadata["errors"][field] = type(exc).__name__
+        if field == "dividends" and metadata["currency"] is None:
+            try:
+                metadata["currency"] = (ticker_obj.get_history_metadata() or {}).get("currency")
+                if not metadata["currency"]:
+                    metadata["currency"] = ticker_obj.fast_info.get("currency")
+            except Exception as exc:
+                metadata["errors"]["currency"] = type(exc).__name__
+    return metadata
+
+
+def fetch_ticker_metadata(tickers):
+    """
+    Fetch the dividend and corporate-action metadata of several tickers concurrently on the
+    fetch pool, with one yfinance handle (and one price-history request) per ticker.
+
+    Parameters
+    ----------
+    tickers : list of str
+        Stock tickers. Duplicates are fetched once.
+
+    Returns
+    -------
+    metadata : dict
+        ticker -> dict with "currency" (from the persistent currency map when known, newly
+        found currencies are added to it), "dividends" (Series), "actions" (DataFrame),
+        "calendar" (dict or DataFrame) and "errors" (field -> exception type name for
+        fields that could not be fetched, the fields are then None).
+    """
+    tickers = list(dict.fromkeys(tickers))
+    known = price_cache.load_currency_map()
+    # One stderr redirect around the whole batch, redirect_stderr is not thread-safe
+    found, errors = safe_yf_call(
+        fetch_pool.fetch_all, lambda t: _fetch_ticker_metadata(t, currency=known.get(t)), tickers
     )
-    # Concatenate processed data with original dataframe
-    portfolio = pd.concat([portfolio, Buy_amt, Accum, Val, Div_tot], axis=1)
 
-    return portfolio
+    metadata = {}
+    for t in tickers:
+        if t in found:
+            metadata[t] = found[t]
+        else:
+            reason = type(errors[t]).__name__
+            metadata[t] = {
+                "currency": known.get(t),
+                "dividends": None,
+                "actions": None,
+                "calendar": None,
+                "errors": {field: reason for field in ("dividends", "actions", "calendar")},
+            }
 
+    new_currencies = {
+        t: entry["currency"] for t, entry in metadata.items() if entry["currency"] and t not in known
+    }
+    if new_currencies:
+        price_cache.save_currency_map({**known, **new_currencies})
+    return metadata
 
-def convert_currency(merged_portfolio, target_currency):
-    
-    # Avoid in-place modification of the 
-    converted_portfolio = merged_portfolio.copy()
-    # Extract tickers from the merged portfolio
-    tickers = converted_portfolio.columns.get_level_values('Company').unique()
-    fx_cache = {}
+
+def _fx_rate_from_history(fx_df, index):
+    """
+    Exchange rate series forward filled onto `index` from a yfinance FX history frame.
+    Raises ValueError if no usable rates are present.
+    """
+    if fx_df is None or "Close" not in fx_df.columns:
+        raise ValueError("missing Close column")
+
+    close_col = fx_df["Close"]
+    if isinstance(close_col, pd.DataFrame):
+        if close_col.shape[1] == 0:
+            raise ValueError("empty FX close matrix")
+        close_col = close_col.iloc[:, 0]
+
+    if isinstance(close_col.index, pd.DatetimeIndex) and close_col.index.tz is not None:
+        close_col.index = close_col.index.tz_localize(None)
+    exchange_rate = close_col.dropna().asfreq(freq="B").ffill().reindex(index).ffill()
+    if exchange_rate.isna().all():
+        raise ValueError("empty FX rate series")
+    return exchange_rate
+
+
+def _download_fx_rate(base_currency, target_currency, start_date, index):
+    """
+    Download the base->target exchange rate from yfinance, forward filled onto `index`.
+    """
+    fetch_pool.throttle()
+    fx_df = yf.download(
+        f"{base_currency}{target_currency}=X",
+        start=start_date,
+        progress=False,
+        threads=False,
+        auto_adjust=False,
+        multi_level_index=False,
+        timeout=20,
+    )
+    return _fx_rate_from_history(fx_df, index)
+
+
+def _download_fx_rates(pairs, start_date, index):
+    """
+    Download exchange rates for several (base, target) currency pairs with one multi-symbol
+    request. Pairs missing from the batch are retried individually on the fetch pool.
+    Returns (rates, errors) keyed by pair.
+    """
+    symbols = {pair: f"{pair[0]}{pair[1]}=X" for pair in pairs}
+    rates = {}
+    if not symbols:
+        return rates, {}
+
+    try:
+        fetch_pool.throttle()
+        batch = yf.download(
+            tickers=list(symbols.values()),
+            start=start_date,
+            progress=False,
+            threads=False,
+            auto_adjust=False,
+            timeout=20,
+            group_by="ticker",
+            multi_level_index=True,
+        )
+    except Exception:
+        batch = pd.DataFrame()
+
+    for pair, symbol in symbols.items():
+        fx_df = _extract_ticker_history(batch, symbol, single_ticker=len(symbols) == 1)
+        try:
+            rates[pair] = _fx_rate_from_history(fx_df, index)
+        except ValueError:
+            continue
+
+    missing = [pair for pair in symbols if pair not in rates]
+    retried, errors = fetch_pool.fetch_all(
+        lambda pair: _download_fx_rate(pair[0], pair[1], start_date, index), missing
+    )
+    rates.update(retried)
+    return rates, errors
+
+
+def fetch_fx_rates(tickers, target_currency, index):
+    """
+    Exchange rates from each ticker's trading currency to target_currency, forward filled onto
+    `index`. Tickers already traded in target_currency, or whose currency or rate could not be
+    fetched, are left out.
+    Returns (rates, messages): a dict of ticker -> rate Series and a list with one message for
+    every ticker left out because of a failed lookup or download.
+    """
     fx_rates_by_ticker = {}
-    
+    messages = []
+
     # Get currencies for each ticker
-    currencies = {}
+    currencies, currency_errors = _resolve_currencies(list(tickers))
     for ticker in tickers:
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            metadata = safe_yf_call(ticker_obj.get_history_metadata) or {}
-            currency = metadata.get("currency")
-            if not currency:
-                # fast_info can still provide currency when metadata is incomplete
-                try:
-                    currency = safe_yf_call(lambda: ticker_obj.fast_info.get("currency"))
-                except Exception:
-                    currency = None
-            if not currency:
-                raise ValueError("currency metadata unavailable")
-            currencies[ticker] = currency
-        except Exception as exc:
-            warnings.warn(
-                f"Could not determine currency for {ticker}; leaving unchanged. ({type(exc).__name__})",
-                RuntimeWarning,
+        if ticker in currency_errors:
+            messages.append(
+                f"Could not determine currency for {ticker}; leaving unchanged. ({type(currency_errors[ticker]).__name__})"
             )
+
+    # Fetch exchange rate data for the entire date range, all currency pairs in one
+    # multi-symbol request
+    pairs = sorted({(base, target_currency) for base in currencies.values() if base != target_currency})
+    fx_cache, fx_errors = _download_fx_rates(pairs, index.min(), index)
+
+    for ticker in tickers:
+        base_currency = currencies.get(ticker)
+        if base_currency is None or base_currency == target_currency:
             continue
-    
-    # Get the start and end date for the entire portfolio
-    start_date = converted_portfolio.index.min()
-    
-    for ticker, base_currency in currencies.items():
-        if base_currency != target_currency:
-            # Fetch exchange rate data for the entire portfolio date range
-            try:
-                pair = (base_currency, target_currency)
-                if pair not in fx_cache:
-                    fx_df = yf.download(
-                        f"{base_currency}{target_currency}=X",
-                        start=start_date,
-                        progress=False,
-                        threads=False,
-                        auto_adjust=False,
-                        multi_level_index=False,
-                        timeout=20,
-                    )
-                    if "Close" not in fx_df.columns:
-                        raise ValueError("missing Close column")
-
-                    close_col = fx_df["Close"]
-                    if isinstance(close_col, pd.DataFrame):
-                        if close_col.shape[1] == 0:
-                            raise ValueError("empty FX close matrix")
-                        close_col = close_col.iloc[:, 0]
-
-                    exchange_rate = (
-                        close_col.asfreq(freq="B").ffill().reindex(converted_portfolio.index).ffill()
-                    )
-                    if exchange_rate.isna().all():
-                        raise ValueError("empty FX rate series")
-                    fx_cache[pair] = exchange_rate
-                exchange_rate = fx_cache[pair]
-            except Exception as exc:
-                warnings.warn(
-                    f"FX download failed for {base_currency}->{target_currency}; leaving {ticker} unchanged. ({type(exc).__name__})",
-                    RuntimeWarning,
-                )
-                continue
-            
-            # Apply exchange rate to relevant columns for this ticker
-            for param in ['$', 'Price', 'Val', 'Buy_amt', 'Div_tot', 'Div']:
-                column = (param, ticker)
-                if column in converted_portfolio.columns:
-                    converted_portfolio.loc[:, column] = converted_portfolio.loc[:, column] * exchange_rate
-            fx_rates_by_ticker[ticker] = exchange_rate.copy()
+        pair = (base_currency, target_currency)
+        if pair not in fx_cache:
+            messages.append(
+                f"FX download failed for {base_currency}->{target_currency}; leaving {ticker} unchanged. ({type(fx_errors.get(pair, ValueError())).__name__})"
+            )
+            continue
+        fx_rates_by_ticker[ticker] = fx_cache[pair]
+    return fx_rates_by_ticker, messages
+
+
+def convert_currency(merged_portfolio, target_currency, fx_rates=None, warn=True):
+    """
+    Convert the price and value blocks of every foreign-currency ticker to target_currency.
+    fx_rates (ticker -> rate Series, eg from fetch_fx_rates() over a longer index) skips the
+    currency lookups and FX downloads; tickers missing from it are left unchanged.
+    The rates used are kept in attrs["fx_rates"] and the fetch_fx_rates() messages about
+    tickers left unchanged in attrs["fx_warnings"]. With warn=True (the default) the messages
+    are also raised as RuntimeWarnings; background threads should pass False and read attrs,
+    as the warning filters are process-global.
+    """
+    # Avoid in-place modification of the 
+    converted_portfolio = merged_portfolio.copy()
+    # Extract tickers from the merged portfolio
+    tickers = converted_portfolio.columns.get_level_values('Company').unique()
+    if fx_rates is None:
+        fx_rates_by_ticker, fx_warnings = fetch_fx_rates(tickers, target_currency, converted_portfolio.index)
+    else:
+        fx_rates_by_ticker = {ticker: fx_rates[ticker] for ticker in tickers if ticker in fx_rates}
+        fx_warnings = []
+    if warn:
+        for message in fx_warnings:
+            warnings.warn(message, RuntimeWarning, stacklevel=2)
+
     if fx_rates_by_ticker:
         fx_rates_df = pd.DataFrame(fx_rates_by_ticker).reindex(converted_portfolio.index).ffill()
+
+        # Apply exchange rates to the relevant columns of every converted ticker in one multiply
+        columns = [
+            column for column in converted_portfolio.columns
+            if column[0] in ('$', 'Price', 'Val', 'Buy_amt', 'Div_tot', 'Div')
+            and column[1] in fx_rates_by_ticker
+        ]
+        converted_portfolio[columns] = (
+            converted_portfolio[columns].to_numpy(dtype=float)
+            * fx_rates_df[[column[1] for column in columns]].to_numpy(dtype=float)
+        )
     else:
         fx_rates_df = pd.DataFrame(index=converted_portfolio.index)
     converted_portfolio.attrs["fx_rates"] = fx_rates_df
+    converted_portfolio.attrs["fx_warnings"] = fx_warnings
     converted_portfolio.attrs["target_currency"] = target_currency
     return converted_portfolio
 
 
+# Parameter blocks that compact_portfolio() stores sparsely: transaction and dividend blocks that
+# are zero on almost every business day.
+COMPACT_SPARSE_PARAMS = ("Shares", "Price", "Brokerage", "Adjustments", "Buy_amt", "Div", "Div_tot")
+
+
+def compact_portfolio(processed_portfolio, dtype="float32"):
+    """
+    Opt-in compact copy of a processed portfolio for large books. Market blocks ($, Accum, Val)
+    are stored as float32, and the transaction and dividend blocks, which are zero on almost
+    every day, are stored as sparse float32 arrays. Column layout, index and attrs are unchanged,
+    so the result can be passed to extract_parameters() and stock_summary() like the original.
+
+    Values are rounded to single precision (about 7 significant digits). Compact after
+    convert_currency(), and keep the float64 frame if exact cents matter.
+
+
+    Parameters
+    ----------
+    processed_portfolio : pandas.DataFrame
+        portfolio dataframe generated by process_data() (optionally converted by convert_currency()).
+    dtype : str or numpy.dtype, optional
+        Storage dtype for every block. The default is "float32".
+
+    Returns
+    -------
+    compact : pandas.DataFrame
+        Copy of processed_portfolio with typed per-block storage.
+    """
+    sparse_dtype = pd.SparseDtype(dtype, 0.0)
+    compact = processed_portfolio.astype(
+        {
+            column: sparse_dtype if column[0] in COMPACT_SPARSE_PARAMS else dtype
+            for column in processed_portfolio.columns
+        }
+    )
+    compact.attrs = dict(processed_portfolio.attrs)
+    return compact
+
+
+def _dense_block(block):
+    """Return a parameter block as dense float64, converting compact (float32/sparse) storage."""
+    if all(dtype == np.float64 for dtype in block.dtypes):
+        return block
+    return pd.DataFrame(block.to_numpy(dtype=np.float64), index=block.index, columns=block.columns)
+
+
 def extract_parameters(processed_portfolio):
     """
     Reads portfolio dataframe generated by process_data() and extracts separate time series
@@ -639,13 +1351,14 @@ def extract_parameters(processed_portfolio):
         shares: number of shares bought or sold
     """
 
-    val = processed_portfolio["Val"]
-    cash_flows = processed_portfolio["Buy_amt"]
-    price = processed_portfolio["$"]
-    accum = processed_portfolio["Accum"]
-    shares = processed_portfolio["Shares"]
-    div_tot = processed_portfolio["Div_tot"]
-    div = processed_portfolio["Div"]
+    # Blocks stored by compact_portfolio() are expanded to dense float64 for the metric functions
+    val = _dense_block(processed_portfolio["Val"])
+    cash_flows = _dense_block(processed_portfolio["Buy_amt"])
+    price = _dense_block(processed_portfolio["$"])
+    accum = _dense_block(processed_portfolio["Accum"])
+    shares = _dense_block(processed_portfolio["Shares"])
+    div_tot = _dense_block(processed_portfolio["Div_tot"])
+    div = _dense_block(processed_portfolio["Div"])
 
     return val, cash_flows, price, accum, shares, div_tot, div
 
@@ -709,7 +1422,36 @@ def stock_summary(portfolio, index, date=None, styles=True, calc_method="basic",
     di : pandas.DataFrame
         Dataframe containing the summary metrics.
     """
-        
+    if calc_method not in ("basic", "total"):
+        raise ValueError('Invalid calculation method. Please choose "basic" or "total".')
+    return stock_summaries(portfolio, index, date=date, styles=styles, currency=currency)[calc_method]
+
+
+def stock_summaries(portfolio, index, date=None, styles=True, currency=None):
+    """
+    Generates the stock_summary() tables for both calculation methods ('basic' and 'total') from
+    a single pass over the portfolio. The shared intermediates (cumulative cash flows, first
+    holding dates, elapsed years, resampled IRR cash streams) are computed once for both tables.
+
+    Parameters
+    ----------
+    portfolio : pandas.DataFrame
+        Dataframe containing portfolio data.
+    index : str
+        Ticker symbol of the benchmark index to compare portfolio performance against.
+    date : str, optional
+        Date to truncate the data. Defaults to None.
+    styles : bool, optional
+        Flag to include dataframe styles. Defaults to True.
+    currency : str, optional
+        Currency to use for calculations. Defaults to None. If specified, metrics that 
+        are currency-dependent will be reported in this currency.
+
+    Returns
+    -------
+    summaries : dict of pandas.DataFrame
+        {"basic": ..., "total": ...}, each as returned by stock_summary() for that method.
+    """
     if currency:
         portfolio = convert_currency(portfolio, target_currency=currency)
 
@@ -744,109 +1486,50 @@ def stock_summary(portfolio, index, date=None, styles=True, calc_method="basic",
     div_tot = div_tot_full.loc[start_date:].ffill()
     div = div_full.loc[start_date:].ffill()
 
-    def _last_scalar(result):
-        if isinstance(result, pd.DataFrame):
-            return float(result.iloc[-1, 0])
-        if isinstance(result, pd.Series):
-            return float(result.iloc[-1])
-        return float(result)
-
-    df = pd.DataFrame()
-    df.index.name = "Company"
+    base = pd.DataFrame()
+    base.index.name = "Company"
     benchmark_available = index in price.columns
 
     avg_price = calc.average_price(cash_flows_full, shares_full).ffill().reindex(val.index).ffill().fillna(0)
-    df["Average Price"] = avg_price.iloc[-1]
-    df["Current Price"] = price.iloc[-1]
-    df["Current Holdings"] = accum.iloc[-1]
-    df["Current Value"] = val.iloc[-1]
+    base["Average Price"] = avg_price.iloc[-1]
+    base["Current Price"] = price.iloc[-1]
+    base["Current Holdings"] = accum.iloc[-1]
+    base["Current Value"] = val.iloc[-1]
     # Keep daily returns for all held tickers, even if one is also selected as benchmark.
     daily_base = calc.daily_pct_gain(price_all).ffill()
     if isinstance(daily_base, pd.DataFrame) and not daily_base.empty:
-        df["Daily Return (%)"] = daily_base.iloc[-1] * 100
+        base["Daily Return (%)"] = daily_base.iloc[-1] * 100
     elif isinstance(daily_base, pd.Series) and not daily_base.empty:
-        df["Daily Return (%)"] = daily_base.iloc[-1] * 100
-    else:
-        df["Daily Return (%)"] = 0.0
-    df.loc[df["Current Holdings"] == 0, "Daily Return (%)"] = 0
-
-    if calc_method == "basic":
-        total_ret = calc.basic_return(val, cash_flows, use_initial_CF=init_CF)
-        ann_ret = calc.basic_return_annualised(val, cash_flows, use_initial_CF=init_CF)
-        twr = calc.time_weighted_return(val, cash_flows, use_initial_CF=init_CF)
-        ann_twr = calc.time_weighted_return_annualised(val, cash_flows, use_initial_CF=init_CF)
-        dwr_last = calc.dollar_weighted_return_endpoint(val, cash_flows, use_initial_CF=init_CF)
-    elif calc_method == "total":
-        total_ret = calc.basic_total_return(val, cash_flows, div_tot, use_initial_CF=init_CF)
-        ann_ret = calc.basic_total_return_annualised(val, cash_flows, div_tot, use_initial_CF=init_CF)
-        twr = calc.time_weighted_total_return(val, cash_flows, div_tot, use_initial_CF=init_CF)
-        ann_twr = calc.time_weighted_total_return_annualised(val, cash_flows, div_tot, use_initial_CF=init_CF)
-        dwr_last = calc.dollar_weighted_total_return_endpoint(val, cash_flows, div_tot, use_initial_CF=init_CF)
+        base["Daily Return (%)"] = daily_base.iloc[-1] * 100
     else:
-        raise ValueError('Invalid calculation method. Please choose "basic" or "total".')
-
-    dwr_last = dwr_last.reindex(val.columns).fillna(0)
-    years_last = calc._elapsed_years_from_first_nonzero(val).iloc[-1].reindex(val.columns).replace(0, np.nan)
-    ann_dwr_last = (np.power(1 + dwr_last, 1 / years_last) - 1).replace([np.inf, -np.inf], np.nan).fillna(0)
-
-    end_total = total_ret.iloc[-1].reindex(val.columns).copy()
-    end_ann = ann_ret.iloc[-1].reindex(val.columns).copy()
-    end_twr = twr.iloc[-1].reindex(val.columns).copy()
-    end_ann_twr = ann_twr.iloc[-1].reindex(val.columns).copy()
-    end_dwr = dwr_last.reindex(val.columns).copy()
-    end_ann_dwr = ann_dwr_last.reindex(val.columns).copy()
-
-    def _series_return_metrics(vs, cfs, dvs, method, use_initial_cf):
-        if method == "basic":
-            t = calc.basic_return(vs, cfs, use_initial_CF=use_initial_cf)
-            a = calc.basic_return_annualised(vs, cfs, use_initial_CF=use_initial_cf)
-            tw = calc.time_weighted_return(vs, cfs, use_initial_CF=use_initial_cf)
-            atw = calc.time_weighted_return_annualised(vs, cfs, use_initial_CF=use_initial_cf)
-            dw = float(calc.dollar_weighted_return_endpoint(vs, cfs, use_initial_CF=use_initial_cf).iloc[0])
-        else:
-            t = calc.basic_total_return(vs, cfs, dvs, use_initial_CF=use_initial_cf)
-            a = calc.basic_total_return_annualised(vs, cfs, dvs, use_initial_CF=use_initial_cf)
-            tw = calc.time_weighted_total_return(vs, cfs, dvs, use_initial_CF=use_initial_cf)
-            atw = calc.time_weighted_total_return_annualised(vs, cfs, dvs, use_initial_CF=use_initial_cf)
-            dw = float(calc.dollar_weighted_total_return_endpoint(vs, cfs, dvs, use_initial_CF=use_initial_cf).iloc[0])
-        years = calc._elapsed_years_from_first_nonzero(vs).iloc[-1]
-        adw = (np.power(1 + dw, 1 / years) - 1) if years > 0 else 0.0
-        return (
-            _last_scalar(t),
-            _last_scalar(a),
-            _last_scalar(tw),
-            _last_scalar(atw),
-            float(dw),
-            float(adw),
+        base["Daily Return (%)"] = 0.0
+    base.loc[base["Current Holdings"] == 0, "Daily Return (%)"] = 0
+
+    # End-of-period metrics for every stock, both methods in one pass
+    methods = ("basic", "total")
+    metrics = calc.summary_return_metrics(val, cash_flows, div_tot, use_initial_CF=init_CF)
+    for method in methods:
+        metrics[method]["dwr"] = metrics[method]["dwr"].fillna(0)
+        metrics[method]["dwr_ann"] = (
+            metrics[method]["dwr_ann"].replace([np.inf, -np.inf], np.nan).fillna(0)
         )
 
-    # Freeze per-stock returns for positions that are currently closed.
-    for col in val.columns:
-        col_acc = accum[col]
-        active_idx = col_acc[col_acc > 0].index
-        if len(active_idx) == 0:
-            continue
-        last_active = active_idx[-1]
-        if col_acc.iloc[-1] == 0 and last_active < val.index[-1]:
-            v = val[col].loc[:last_active].ffill()
-            cf = cash_flows[col].loc[:last_active].fillna(0)
-            dv = div_tot[col].loc[:last_active].fillna(0)
-            metrics = _series_return_metrics(v, cf, dv, calc_method, init_CF)
-            end_total[col], end_ann[col], end_twr[col], end_ann_twr[col], end_dwr[col], end_ann_dwr[col] = metrics
-
-    df["Total Return (%)"] = end_total.values * 100
-    df["Ann. Return (%)"] = end_ann.values * 100
-    df["TWR (%)"] = end_twr.values * 100
-    df["Ann. TWR (%)"] = end_ann_twr.values * 100
-    df["DWR (%)"] = end_dwr.values * 100
-    df["Ann. DWR (%)"] = end_ann_dwr.values * 100
-
-    df = df.sort_index().reset_index()
-
-    end_idx = len(df.index)
-    df.loc[end_idx, "Company"] = "TOTAL"
-    df.loc[end_idx, "Current Value"] = df["Current Value"].sum()
-    df.loc[end_idx, "Daily Return (%)"] = calc.daily_portfolio_pct_gain(val, price).iloc[-1] * 100
+    # Freeze per-stock returns for positions that are currently closed, evaluating every closed
+    # position at its last active day in one batched pass.
+    active = accum[val.columns].to_numpy() > 0
+    last_active = len(active) - 1 - active[::-1].argmax(axis=0)
+    closed = active.any(axis=0) & (accum[val.columns].to_numpy()[-1] == 0) & (last_active < len(active) - 1)
+    if closed.any():
+        closed_cols = val.columns[closed]
+        frozen = calc.summary_return_metrics(
+            val[closed_cols],
+            cash_flows[closed_cols].fillna(0),
+            div_tot[closed_cols].fillna(0),
+            use_initial_CF=init_CF,
+            end_rows=last_active[closed],
+        )
+        for method in methods:
+            metrics[method].loc[closed_cols] = frozen[method]
 
     total_val = val.sum(axis=1)
     total_cf = cash_flows.sum(axis=1)
@@ -863,77 +1546,90 @@ def stock_summary(portfolio, index, date=None, styles=True, calc_method="basic",
         total_val_eval = total_val
         total_cf_eval = total_cf
         total_div_eval = total_div
-
-    total_ret_s, ann_ret_s, twr_s, ann_twr_s, dwr_s, ann_dwr_s = _series_return_metrics(
-        total_val_eval, total_cf_eval, total_div_eval, calc_method, init_CF
-    )
-
-    df.loc[end_idx, "Total Return (%)"] = total_ret_s * 100
-    df.loc[end_idx, "Ann. Return (%)"] = ann_ret_s * 100
-    df.loc[end_idx, "TWR (%)"] = twr_s * 100
-    df.loc[end_idx, "Ann. TWR (%)"] = ann_twr_s * 100
-    df.loc[end_idx, "DWR (%)"] = dwr_s * 100
-    df.loc[end_idx, "Ann. DWR (%)"] = ann_dwr_s * 100
-
-    df.loc[len(df.index)] = np.nan
-    df.loc[len(df.index) - 1, "Company"] = ""
+    total_metrics = calc.summary_return_metrics(total_val_eval, total_cf_eval, total_div_eval, use_initial_CF=init_CF)
+    total_daily = calc.daily_portfolio_pct_gain(val, price).iloc[-1] * 100
 
     if benchmark_available:
-        end_idx = len(df.index)
         benchmark_cf = pd.Series(0, index=price[index].index, name=price[index].name)
-        df.loc[end_idx, "Company"] = "BENCHMARK (" + index + ")"
-        df.loc[end_idx, "Daily Return (%)"] = calc.daily_pct_gain(price[index]).iloc[-1] * 100
+        # Benchmark TWR/DWR fields are left blank, so only the basic returns are needed
+        bench_metrics = calc.summary_return_metrics(price[index], benchmark_cf, div[index], dwr=False)
+        bench_daily = calc.daily_pct_gain(price[index]).iloc[-1] * 100
+
+    metric_columns = {
+        "Total Return (%)": "return",
+        "Ann. Return (%)": "return_ann",
+        "TWR (%)": "twr",
+        "Ann. TWR (%)": "twr_ann",
+        "DWR (%)": "dwr",
+        "Ann. DWR (%)": "dwr_ann",
+    }
+    summaries = {}
+    for method in methods:
+        df = base.copy()
+        for column, metric in metric_columns.items():
+            df[column] = metrics[method][metric].reindex(val.columns).values * 100
 
-        if calc_method == "basic":
-            bench_total = calc.basic_return(price[index], benchmark_cf)
-            bench_ann = calc.basic_return_annualised(price[index], benchmark_cf)
-            bench_dwr = float(calc.dollar_weighted_return_endpoint(price[index], benchmark_cf).iloc[0])
-        else:
-            bench_total = calc.basic_total_return(price[index], benchmark_cf, div[index])
-            bench_ann = calc.basic_total_return_annualised(price[index], benchmark_cf, div[index])
-            bench_dwr = float(calc.dollar_weighted_total_return_endpoint(price[index], benchmark_cf, div[index]).iloc[0])
-        years_bench = calc._elapsed_years_from_first_nonzero(price[index]).iloc[-1]
-        bench_ann_dwr = (np.power(1 + bench_dwr, 1 / years_bench) - 1) if years_bench > 0 else 0.0
-        df.loc[end_idx, "Total Return (%)"] = _last_scalar(bench_total) * 100
-        df.loc[end_idx, "Ann. Return (%)"] = _last_scalar(bench_ann) * 100
-        # Leave benchmark TWR/DWR fields blank for clearer benchmark reporting semantics.
-        df.loc[end_idx, "TWR (%)"] = np.nan
-        df.loc[end_idx, "Ann. TWR (%)"] = np.nan
-        df.loc[end_idx, "DWR (%)"] = np.nan
-        df.loc[end_idx, "Ann. DWR (%)"] = np.nan
-
-    # Normalize explicit None values so tables render blanks.
-    df = df.replace({None: np.nan, "None": np.nan})
-
-    if styles:
-        cmap = sns.diverging_palette(20, 145, s=60, as_cmap=True)
-        pct_cols = ["Total Return (%)", "TWR (%)", "DWR (%)"]
-        ann_cols = ["Ann. Return (%)", "Ann. TWR (%)", "Ann. DWR (%)"]
-        benchmark_row = len(df) - 1
-
-        df = (
-            df.style.format(
-                na_rep="",
-                formatter={
-                    "Average Price": "{:.4f}",
-                    "Current Price": "{:.2f}",
-                    "Current Holdings": "{:.0f}",
-                    "Current Value": "{:.2f}",
-                    "Daily Return (%)": "{:.2f}",
-                    "Total Return (%)": "{:.2f}",
-                    "Ann. Return (%)": "{:.2f}",
-                    "TWR (%)": "{:.2f}",
-                    "Ann. TWR (%)": "{:.2f}",
-                    "DWR (%)": "{:.2f}",
-                    "Ann. DWR (%)": "{:.2f}",
-                },
-            )
-            .background_gradient(cmap=cmap, vmin=-2, vmax=2, subset=(slice(len(df) - 3), "Daily Return (%)"))
-            .background_gradient(cmap=cmap, vmin=-100, vmax=100, subset=(slice(len(df) - 3), pct_cols))
-            .background_gradient(cmap=cmap, vmin=-10, vmax=10, subset=(slice(len(df) - 3), ann_cols))
-            .background_gradient(cmap=cmap, vmin=-2, vmax=2, subset=(benchmark_row, "Daily Return (%)"))
-            .background_gradient(cmap=cmap, vmin=-100, vmax=100, subset=(benchmark_row, ["Total Return (%)"]))
-            .background_gradient(cmap=cmap, vmin=-10, vmax=10, subset=(benchmark_row, ["Ann. Return (%)"]))
+        df = df.sort_index().reset_index()
+
+        end_idx = len(df.index)
+        df.loc[end_idx, "Company"] = "TOTAL"
+        df.loc[end_idx, "Current Value"] = df["Current Value"].sum()
+        df.loc[end_idx, "Daily Return (%)"] = total_daily
+        for column, metric in metric_columns.items():
+            df.loc[end_idx, column] = float(total_metrics[method][metric].iloc[0]) * 100
+
+        df.loc[len(df.index)] = np.nan
+        df.loc[len(df.index) - 1, "Company"] = ""
+
+        if benchmark_available:
+            end_idx = len(df.index)
+            df.loc[end_idx, "Company"] = "BENCHMARK (" + index + ")"
+            df.loc[end_idx, "Daily Return (%)"] = bench_daily
+            df.loc[end_idx, "Total Return (%)"] = float(bench_metrics[method]["return"].iloc[0]) * 100
+            df.loc[end_idx, "Ann. Return (%)"] = float(bench_metrics[method]["return_ann"].iloc[0]) * 100
+            # Leave benchmark TWR/DWR fields blank for clearer benchmark reporting semantics.
+            df.loc[end_idx, "TWR (%)"] = np.nan
+            df.loc[end_idx, "Ann. TWR (%)"] = np.nan
+            df.loc[end_idx, "DWR (%)"] = np.nan
+            df.loc[end_idx, "Ann. DWR (%)"] = np.nan
+
+        # Normalize explicit None values so tables render blanks.
+        df = df.replace({None: np.nan, "None": np.nan})
+        summaries[method] = _style_summary(df) if styles else df.fillna("")
+
+    return summaries
+
+
+def _style_summary(df):
+    """Apply the summary table number formats and colour gradients."""
+    cmap = sns.diverging_palette(20, 145, s=60, as_cmap=True)
+    pct_cols = ["Total Return (%)", "TWR (%)", "DWR (%)"]
+    ann_cols = ["Ann. Return (%)", "Ann. TWR (%)", "Ann. DWR (%)"]
+    benchmark_row = len(df) - 1
+
+    df = (
+        df.style.format(
+            na_rep="",
+            formatter={
+                "Average Price": "{:.4f}",
+                "Current Price": "{:.2f}",
+                "Current Holdings": "{:.0f}",
+                "Current Value": "{:.2f}",
+                "Daily Return (%)": "{:.2f}",
+                "Total Return (%)": "{:.2f}",
+                "Ann. Return (%)": "{:.2f}",
+                "TWR (%)": "{:.2f}",
+                "Ann. TWR (%)": "{:.2f}",
+                "DWR (%)": "{:.2f}",
+                "Ann. DWR (%)": "{:.2f}",
+            },
         )
+        .background_gradient(cmap=cmap, vmin=-2, vmax=2, subset=(slice(len(df) - 3), "Daily Return (%)"))
+        .background_gradient(cmap=cmap, vmin=-100, vmax=100, subset=(slice(len(df) - 3), pct_cols))
+        .background_gradient(cmap=cmap, vmin=-10, vmax=10, subset=(slice(len(df) - 3), ann_cols))
+        .background_gradient(cmap=cmap, vmin=-2, vmax=2, subset=(benchmark_row, "Daily Return (%)"))
+        .background_gradient(cmap=cmap, vmin=-100, vmax=100, subset=(benchmark_row, ["Total Return (%)"]))
+        .background_gradient(cmap=cmap, vmin=-10, vmax=10, subset=(benchmark_row, ["Ann. Return (%)"]))
+    )
 
-    return df.fillna("") if not styles else df
+    return df
@@ -5,13 +5,18 @@ import os
 import pandas as pd
 import numpy as np
 import data_provider as dp
-import warnings
 import re
 from collections import defaultdict
 import seaborn as sns
-import yfinance as yf
 import plotly.graph_objects as go
 import performance_calcs as calc
+import compute_cache
+import copy
+import io
+from refresh_job import RefreshJob
+
+# Seconds between progress updates while market data refreshes in the background
+REFRESH_POLL_SECONDS = 0.5
 
 # Basic webpage setup
 st.set_page_config(
@@ -66,6 +71,13 @@ def get_data(file, index):
         with st.spinner('Collecting share price data'):
             user_portfolio = share.get_userdata(file)
             merged_portfolio = dp.merge_pricedata(user_portfolio, index)
+    _report_price_fetch(merged_portfolio, index)
+    return merged_portfolio
+
+
+def _report_price_fetch(merged_portfolio, index):
+    """Show the outcome of a price fetch in the sidebar and keep it for the Diagnostics tab."""
+    with st.sidebar:
         fetch_meta = merged_portfolio.attrs.get("price_fetch", {})
         fetched = fetch_meta.get("fetched", [])
         failed = fetch_meta.get("failed", {})
@@ -90,8 +102,6 @@ def get_data(file, index):
             "fetched": fetched,
             "failed": failed,
         }
-    
-    return merged_portfolio
             
 
 def process_data(merged_portfolio, target_currency, selected_index=None):
@@ -99,18 +109,21 @@ def process_data(merged_portfolio, target_currency, selected_index=None):
     # Perform initial processing of portfolio data
     try:
         portfolio = share.process_data(merged_portfolio)
-        with warnings.catch_warnings(record=True) as caught:
-            warnings.simplefilter("always", RuntimeWarning)
-            portfolio = share.convert_currency(portfolio, target_currency=target_currency)
+        portfolio = share.convert_currency(portfolio, target_currency=target_currency, warn=False)
     except Exception as exc:
         st.error(f"Data processing failed ({type(exc).__name__}: {exc})")
         return False
 
-    fx_warnings = []
-    for w in caught:
-        msg = str(w.message)
-        if "FX" in msg or "currency" in msg.lower():
-            fx_warnings.append(msg)
+    _commit_portfolio(portfolio, target_currency, selected_index=selected_index)
+    return True
+
+
+def _commit_portfolio(portfolio, target_currency, selected_index=None):
+    """
+    Make a processed portfolio the session's current one: report the FX warnings recorded while
+    converting it, bump portfolio_version and reset the date controls and render cache.
+    """
+    fx_warnings = list(portfolio.attrs.get("fx_warnings", []))
     fx_pair_failures = defaultdict(set)
     unknown_currency_tickers = set()
     other_fx_messages = set()
@@ -162,7 +175,49 @@ def process_data(merged_portfolio, target_currency, selected_index=None):
     st.session_state["reset_start_date_input"] = True
     st.session_state.pop("render_cache", None)
     st.session_state.pop("render_cache_key", None)
-    return True
+
+
+def _apply_refresh(job):
+    """
+    Swap a finished background refresh into the session. This runs in the script thread
+    before anything is rendered, so the new portfolio and its portfolio_version bump appear
+    together; until then the last good portfolio stays in use.
+    """
+    del st.session_state["refresh_job"]
+    if job.error is not None:
+        if job.error_stage == "processing":
+            st.error(f"Data processing failed ({type(job.error).__name__}: {job.error})")
+        else:
+            st.error(f"Refresh failed ({type(job.error).__name__}: {job.error})")
+        if "portfolio" in st.session_state:
+            st.warning("Showing last successfully loaded portfolio.")
+        return
+    _report_price_fetch(job.merged_portfolio, job.index)
+    _commit_portfolio(job.portfolio, job.target_currency, selected_index=job.index)
+
+
+def _refresh_status():
+    """Per-ticker progress of the background refresh, rerunning the app once it has finished."""
+    job = st.session_state.get("refresh_job")
+    if job is None:
+        return
+    if job.done():
+        st.rerun()
+    stage, resolved, total, last_ticker = job.progress()
+    if stage == "fetching" and total:
+        text = f"Collecting share price data: {resolved}/{total} tickers"
+        if last_ticker:
+            text += f" (last: {last_ticker})"
+        st.progress(min(resolved / total, 1.0), text=text)
+    elif stage == "processing":
+        st.progress(1.0, text="Processing portfolio data")
+    else:
+        st.caption("Reading portfolio...")
+
+
+if hasattr(st, "fragment"):
+    # Only the status block reruns while polling, the rest of the page stays interactive
+    _refresh_status = st.fragment(run_every=REFRESH_POLL_SECONDS)(_refresh_status)
 
 
 def display_calc_details():
@@ -238,30 +293,33 @@ def _build_fx_return_series(val, fx_rates, scope=None):
     return (fx_ret * weights).sum(axis=1, min_count=1) * 100.0
 
 
+@st.cache_data(ttl=21600, show_spinner=False)
+def _fetch_ticker_metadata(tickers):
+    """
+    Currency, dividends, actions and calendar of every ticker, fetched once (concurrently) and
+    shared by the dividend schedule, upcoming dividend and corporate action builders.
+    """
+    return share.fetch_ticker_metadata(sorted(set(tickers)))
+
+
 @st.cache_data(ttl=21600, show_spinner=False)
 def _fetch_dividend_schedule(tickers, start_date):
     start_ts = pd.Timestamp(start_date)
     schedule_rows = []
     summary_rows = []
     warnings_out = []
+    metadata = _fetch_ticker_metadata(tuple(sorted(set(tickers))))
 
     for ticker in sorted(set(tickers)):
         try:
-            ticker_obj = yf.Ticker(ticker)
-            ticker_currency = None
-            try:
-                meta = share.safe_yf_call(ticker_obj.get_history_metadata) or {}
-                ticker_currency = meta.get("currency")
-            except Exception:
-                ticker_currency = None
-            if not ticker_currency:
-                try:
-                    ticker_currency = share.safe_yf_call(
-                        lambda: ticker_obj.fast_info.get("currency")
-                    )
-                except Exception:
-                    ticker_currency = None
-            div_series = share.safe_yf_call(lambda: ticker_obj.dividends)
+            meta = metadata[ticker]
+            if "dividends" in meta["errors"]:
+                warnings_out.append(
+                    f"{ticker}: dividend schedule fetch failed ({meta['errors']['dividends']})."
+                )
+                continue
+            ticker_currency = meta["currency"]
+            div_series = meta["dividends"]
             if div_series is None or len(div_series) == 0:
                 warnings_out.append(f"No dividend history returned for {ticker}.")
                 continue
@@ -280,7 +338,7 @@ def _fetch_dividend_schedule(tickers, start_date):
 
             payment_date_map = {}
             try:
-                cal = share.safe_yf_call(lambda: ticker_obj.calendar)
+                cal = meta["calendar"]
                 if isinstance(cal, pd.DataFrame) and not cal.empty:
                     cal_row = cal.iloc[0].to_dict()
                 elif isinstance(cal, dict):
@@ -346,24 +404,18 @@ def _fetch_upcoming_dividends(tickers):
     today = pd.Timestamp.today().normalize()
     rows = []
     warnings_out = []
+    metadata = _fetch_ticker_metadata(tuple(sorted(set(tickers))))
 
     for ticker in sorted(set(tickers)):
         try:
-            ticker_obj = yf.Ticker(ticker)
-            ticker_currency = None
-            try:
-                meta = share.safe_yf_call(ticker_obj.get_history_metadata) or {}
-                ticker_currency = meta.get("currency")
-            except Exception:
-                ticker_currency = None
-            if not ticker_currency:
-                try:
-                    ticker_currency = share.safe_yf_call(
-                        lambda: ticker_obj.fast_info.get("currency")
-                    )
-                except Exception:
-                    ticker_currency = None
-            cal = share.safe_yf_call(lambda: ticker_obj.calendar)
+            meta = metadata[ticker]
+            if "calendar" in meta["errors"]:
+                warnings_out.append(
+                    f"{ticker}: upcoming dividend calendar fetch failed ({meta['errors']['calendar']})."
+                )
+                continue
+            ticker_currency = meta["currency"]
+            cal = meta["calendar"]
             if isinstance(cal, pd.DataFrame) and not cal.empty:
                 cal_row = cal.iloc[0].to_dict()
             elif isinstance(cal, dict):
@@ -429,12 +481,13 @@ def _fetch_corporate_actions(tickers, start_date):
     start_ts = pd.Timestamp(start_date)
     rows = []
     warnings_out = []
+    metadata = _fetch_ticker_metadata(tuple(sorted(set(tickers))))
 
     for ticker in sorted(set(tickers)):
+        failure = metadata[ticker]["errors"].get("actions")
         try:
-            ticker_obj = yf.Ticker(ticker)
-            actions = share.safe_yf_call(lambda: ticker_obj.actions)
-            if not isinstance(actions, pd.DataFrame) or actions.empty:
+            actions = metadata[ticker]["actions"]
+            if failure or not isinstance(actions, pd.DataFrame) or actions.empty:
                 continue
 
             actions = actions.copy()
@@ -460,19 +513,20 @@ def _fetch_corporate_actions(tickers, start_date):
                         }
                     )
         except Exception as exc:
-            warnings_out.append(
-                f"{ticker}: corporate actions fetch failed ({type(exc).__name__})."
-            )
-            rows.append(
-                {
-                    "Ticker": ticker,
-                    "Event Type": "Provider",
-                    "Event Date": pd.NaT,
-                    "Details": f"Corporate actions fetch failed ({type(exc).__name__})",
-                    "Action Needed": "Provider check",
-                    "Status": "Open",
-                }
-            )
+            failure = type(exc).__name__
+        finally:
+            if failure:
+                warnings_out.append(f"{ticker}: corporate actions fetch failed ({failure}).")
+                rows.append(
+                    {
+                        "Ticker": ticker,
+                        "Event Type": "Provider",
+                        "Event Date": pd.NaT,
+                        "Details": f"Corporate actions fetch failed ({failure})",
+                        "Action Needed": "Provider check",
+                        "Status": "Open",
+                    }
+                )
 
     actions_df = pd.DataFrame(rows)
     if not actions_df.empty and "Event Date" in actions_df.columns:
@@ -537,6 +591,49 @@ def _ticker_diagnostics(price_df, div_df, start_date):
     return pd.DataFrame(rows)
 
 
+def _portfolio_fingerprint():
+    """Content hash of the loaded portfolio and its FX rates, computed once per portfolio_version."""
+    version = st.session_state.get("portfolio_version", 0)
+    cached = st.session_state.get("portfolio_fingerprint")
+    if cached is None or cached[0] != version:
+        portfolio = st.session_state["portfolio"]
+        cached = (version, compute_cache.fingerprint(portfolio, portfolio.attrs.get("fx_rates")))
+        st.session_state["portfolio_fingerprint"] = cached
+    return cached[1]
+
+
+def _shared_result(kind, params, compute):
+    """
+    compute() through the process-wide compute cache, keyed by the loaded portfolio's content
+    hash plus params, so every session and rerun with the same data shares one result.
+    """
+    return compute_cache.get_or_compute((kind, _portfolio_fingerprint(), *params), compute)
+
+
+def _render_artifact(cache, name, compute):
+    """compute() once per render cache: later reruns with the same render key reuse the result."""
+    artifacts = cache.setdefault("artifacts", {})
+    if name not in artifacts:
+        artifacts[name] = compute()
+    return artifacts[name]
+
+
+def _tabs(labels, key):
+    """
+    st.tabs() that tracks the selected tab so only its body has to run (see _tab_open()).
+    Streamlit versions without lazy tabs run every tab as before.
+    """
+    try:
+        return st.tabs(labels, key=key, on_change="rerun")
+    except TypeError:
+        return st.tabs(labels)
+
+
+def _tab_open(tab):
+    """False only for a tab known to be hidden."""
+    return getattr(tab, "open", None) is not False
+
+
 def display_data():
     
     if 'portfolio' in st.session_state:     
@@ -548,7 +645,7 @@ def display_data():
         benchmark_ticker = st.session_state.get("loaded_benchmark", index)
         portfolio_version = st.session_state.get("portfolio_version", 0)
         render_key = (
-            "subtitle_v2",
+            "lazy_tabs_v1",
             portfolio_version,
             str(st.session_state['start_date']),
             benchmark_ticker,
@@ -578,53 +675,6 @@ def display_data():
                         "Benchmark comparisons are temporarily disabled for this render."
                     )
 
-                summary_basic = share.stock_summary(
-                    st.session_state['portfolio'],
-                    benchmark_ticker,
-                    date=st.session_state['start_date'],
-                    calc_method='basic',
-                )
-                summary_total = share.stock_summary(
-                    st.session_state['portfolio'],
-                    benchmark_ticker,
-                    date=st.session_state['start_date'],
-                    calc_method='total',
-                )
-
-                fig1 = graph.plot_portfolio_gain_plotly(
-                    val, cash_flows, benchmark_price,
-                    div=div, index_div=benchmark_div,
-                    date=st.session_state['start_date'],
-                    calc_method='basic',
-                    fx_return=fx_return_total,
-                    subtitle_text=subtitle_text,
-                )
-                fig2 = graph.plot_portfolio_gain_plotly(
-                    val, cash_flows, benchmark_price,
-                    div=div, index_div=benchmark_div,
-                    date=st.session_state['start_date'],
-                    calc_method='total',
-                    fx_return=fx_return_total,
-                    subtitle_text=subtitle_text,
-                )
-                fig3 = graph.plot_stock_gain_plotly(
-                    val,
-                    cash_flows,
-                    date=st.session_state['start_date'],
-                    accum=accum,
-                    subtitle_text=subtitle_text,
-                )
-                fig4 = graph.plot_stock_holdings_plotly(
-                    val, date=st.session_state['start_date']
-                )
-                fig5 = graph.plot_annualised_return_plotly_(
-                    val,
-                    cash_flows,
-                    benchmark_price,
-                    date=st.session_state['start_date'],
-                    subtitle_text=subtitle_text,
-                )
-
                 st.session_state["render_cache"] = {
                     "val": val,
                     "cash_flows": cash_flows,
@@ -636,17 +686,16 @@ def display_data():
                     "div": div,
                     "div_": div_,
                     "fx_rates": fx_rates,
-                    "summary_basic": summary_basic,
-                    "summary_total": summary_total,
-                    "fig1": fig1,
-                    "fig2": fig2,
-                    "fig3": fig3,
-                    "fig4": fig4,
-                    "fig5": fig5,
+                    "fx_return_total": fx_return_total,
+                    "start_date": st.session_state['start_date'],
+                    "benchmark_ticker": benchmark_ticker,
+                    "subtitle_text": subtitle_text,
                     "benchmark_status": {
                         "selected": benchmark_ticker,
                         "available": bool(benchmark_available),
                     },
+                    # Summaries and figures, built by _render_artifact() when a tab first needs them
+                    "artifacts": {},
                     "scope_figs": {},
                 }
                 st.session_state["render_cache_key"] = render_key
@@ -673,20 +722,53 @@ def display_data():
         div_ = cache["div_"]
         accum = cache["accum"]
         fx_rates = cache.get("fx_rates")
-        fig1 = cache["fig1"]
-        fig2 = cache["fig2"]
-        fig3 = cache["fig3"]
-        fig4 = cache["fig4"]
-        fig5 = cache["fig5"]
         benchmark_status = cache.get("benchmark_status", {"selected": benchmark_ticker, "available": False})
-        summary_basic = cache["summary_basic"]
-        summary_total = cache["summary_total"]
         tickers = sorted(list(val.columns))
-        actions_df, actions_warnings = _fetch_corporate_actions(
-            tuple(tickers), st.session_state['start_date']
-        )
-        
-        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = st.tabs(
+
+        # Inputs of the render key the cache was built for (the last good view if a refresh failed)
+        render_date = cache["start_date"]
+        render_benchmark = cache["benchmark_ticker"]
+        render_subtitle = cache["subtitle_text"]
+
+        def _summaries():
+            summaries = _shared_result(
+                "stock_summaries",
+                (str(render_date), render_benchmark),
+                lambda: share.stock_summaries(st.session_state['portfolio'], render_benchmark, date=render_date),
+            )
+            # Rendering a Styler updates its state, give this session its own (the data is shared)
+            return {method: copy.deepcopy(styler) for method, styler in summaries.items()}
+
+        def _portfolio_gain(calc_method):
+            return graph.plot_portfolio_gain_plotly(
+                val, cash_flows, benchmark_price,
+                div=div, index_div=benchmark_div,
+                date=render_date,
+                calc_method=calc_method,
+                fx_return=cache["fx_return_total"],
+                subtitle_text=render_subtitle,
+            )
+
+        figures = {
+            "portfolio_gain_basic": lambda: _portfolio_gain("basic"),
+            "portfolio_gain_total": lambda: _portfolio_gain("total"),
+            "stock_gain": lambda: graph.plot_stock_gain_plotly(
+                val, cash_flows, date=render_date, accum=accum, subtitle_text=render_subtitle
+            ),
+            "stock_holdings": lambda: graph.plot_stock_holdings_plotly(val, date=render_date),
+            "annualised_return": lambda: graph.plot_annualised_return_plotly_(
+                val, cash_flows, benchmark_price, date=render_date, subtitle_text=render_subtitle
+            ),
+        }
+
+        def _figure(name):
+            return _render_artifact(
+                cache,
+                name,
+                lambda: _shared_result(name, (str(render_date), render_benchmark), figures[name]),
+            )
+
+        tab1, tab2, tab3, tab4, tab5, tab6, tab7, tab8 = _tabs(
             [
                 'Portfolio Returns',
                 'Stock Returns',
@@ -696,761 +778,761 @@ def display_data():
                 'Attribution',
                 'Rolling Returns',
                 'Diagnostics',
-            ]
+            ],
+            key="display_tab",
         )
         
-        with tab1:
-            chart_scope_options = ["TOTAL"] + sorted(list(val.columns))
-            if (
-                "portfolio_chart_scope" in st.session_state
-                and st.session_state["portfolio_chart_scope"] not in chart_scope_options
-            ):
-                st.session_state["portfolio_chart_scope"] = "TOTAL"
-            chart_scope = st.selectbox(
-                "Chart scope",
-                options=chart_scope_options,
-                index=0,
-                key="portfolio_chart_scope",
-                help="Select TOTAL portfolio or an individual stock for the return chart.",
-            )
+        if _tab_open(tab1):
+            with tab1:
+                chart_scope_options = ["TOTAL"] + sorted(list(val.columns))
+                if (
+                    "portfolio_chart_scope" in st.session_state
+                    and st.session_state["portfolio_chart_scope"] not in chart_scope_options
+                ):
+                    st.session_state["portfolio_chart_scope"] = "TOTAL"
+                chart_scope = st.selectbox(
+                    "Chart scope",
+                    options=chart_scope_options,
+                    index=0,
+                    key="portfolio_chart_scope",
+                    help="Select TOTAL portfolio or an individual stock for the return chart.",
+                )
 
-            show_total_return = st.toggle(
-                "Total Return View",
-                value=False,
-                help="Off = Price Return, On = Total Return (includes dividends).",
-            )
+                show_total_return = st.toggle(
+                    "Total Return View",
+                    value=False,
+                    help="Off = Price Return, On = Total Return (includes dividends).",
+                )
 
-            if chart_scope == "TOTAL":
-                scope_fig_basic = fig1
-                scope_fig_total = fig2
-            else:
-                scope_key = (chart_scope, str(st.session_state['start_date']), benchmark_ticker)
-                scope_figs = cache.get("scope_figs", {})
-                if scope_key not in scope_figs:
-                    val_scope = val[[chart_scope]]
-                    cf_scope = cash_flows[[chart_scope]]
-                    div_scope = div[[chart_scope]] if chart_scope in div.columns else pd.DataFrame(
-                        {chart_scope: 0.0}, index=val_scope.index
-                    )
-                    # For closed positions, stop plotting after final active holding date.
-                    acc_series = accum[chart_scope] if chart_scope in accum.columns else pd.Series(0.0, index=val_scope.index)
-                    active_idx = acc_series[acc_series > 0].index
-                    if len(active_idx) > 0 and float(acc_series.iloc[-1]) <= 1e-12:
-                        cutoff = active_idx[-1]
-                        val_scope = val_scope.loc[:cutoff]
-                        cf_scope = cf_scope.loc[:cutoff]
-                        div_scope = div_scope.loc[:cutoff]
-                    benchmark_price = (
-                        price[benchmark_ticker]
-                        if benchmark_ticker in price.columns
-                        else pd.Series(1.0, index=price.index, name=benchmark_ticker)
-                    )
-                    benchmark_div = (
-                        div_[benchmark_ticker]
-                        if benchmark_ticker in div_.columns
-                        else pd.Series(0.0, index=price.index, name=benchmark_ticker)
-                    )
-                    if len(active_idx) > 0 and float(acc_series.iloc[-1]) <= 1e-12:
-                        benchmark_price = benchmark_price.loc[:cutoff]
-                        benchmark_div = benchmark_div.loc[:cutoff]
-                    scope_figs[scope_key] = {
-                        "basic": graph.plot_portfolio_gain_plotly(
-                            val_scope,
-                            cf_scope,
-                            benchmark_price,
-                            div=div_scope,
-                            index_div=benchmark_div,
-                            date=st.session_state['start_date'],
-                            calc_method='basic',
-                            fx_return=_build_fx_return_series(val_scope, fx_rates, scope=chart_scope),
-                            subtitle_text=subtitle_text,
-                        ),
-                        "total": graph.plot_portfolio_gain_plotly(
-                            val_scope,
-                            cf_scope,
-                            benchmark_price,
-                            div=div_scope,
-                            index_div=benchmark_div,
-                            date=st.session_state['start_date'],
-                            calc_method='total',
-                            fx_return=_build_fx_return_series(val_scope, fx_rates, scope=chart_scope),
-                            subtitle_text=subtitle_text,
-                        ),
-                    }
-                    cache["scope_figs"] = scope_figs
-                scope_fig_basic = scope_figs[scope_key]["basic"]
-                scope_fig_total = scope_figs[scope_key]["total"]
+                if chart_scope == "TOTAL":
+                    scope_fig_basic = _figure("portfolio_gain_basic")
+                    scope_fig_total = _figure("portfolio_gain_total")
+                else:
+                    scope_key = (chart_scope, str(render_date), render_benchmark)
+                    scope_figs = cache.get("scope_figs", {})
+                    if scope_key not in scope_figs:
+                        def _scope_figs():
+                            val_scope = val[[chart_scope]]
+                            cf_scope = cash_flows[[chart_scope]]
+                            div_scope = div[[chart_scope]] if chart_scope in div.columns else pd.DataFrame(
+                                {chart_scope: 0.0}, index=val_scope.index
+                            )
+                            # For closed positions, stop plotting after final active holding date.
+                            acc_series = accum[chart_scope] if chart_scope in accum.columns else pd.Series(0.0, index=val_scope.index)
+                            active_idx = acc_series[acc_series > 0].index
+                            if len(active_idx) > 0 and float(acc_series.iloc[-1]) <= 1e-12:
+                                cutoff = active_idx[-1]
+                                val_scope = val_scope.loc[:cutoff]
+                                cf_scope = cf_scope.loc[:cutoff]
+                                div_scope = div_scope.loc[:cutoff]
+                            benchmark_price = (
+                                price[render_benchmark]
+                                if render_benchmark in price.columns
+                                else pd.Series(1.0, index=price.index, name=render_benchmark)
+                            )
+                            benchmark_div = (
+                                div_[render_benchmark]
+                                if render_benchmark in div_.columns
+                                else pd.Series(0.0, index=price.index, name=render_benchmark)
+                            )
+                            if len(active_idx) > 0 and float(acc_series.iloc[-1]) <= 1e-12:
+                                benchmark_price = benchmark_price.loc[:cutoff]
+                                benchmark_div = benchmark_div.loc[:cutoff]
+                            return {
+                                "basic": graph.plot_portfolio_gain_plotly(
+                                    val_scope,
+                                    cf_scope,
+                                    benchmark_price,
+                                    div=div_scope,
+                                    index_div=benchmark_div,
+                                    date=render_date,
+                                    calc_method='basic',
+                                    fx_return=_build_fx_return_series(val_scope, fx_rates, scope=chart_scope),
+                                    subtitle_text=render_subtitle,
+                                ),
+                                "total": graph.plot_portfolio_gain_plotly(
+                                    val_scope,
+                                    cf_scope,
+                                    benchmark_price,
+                                    div=div_scope,
+                                    index_div=benchmark_div,
+                                    date=render_date,
+                                    calc_method='total',
+                                    fx_return=_build_fx_return_series(val_scope, fx_rates, scope=chart_scope),
+                                    subtitle_text=render_subtitle,
+                                ),
+                            }
 
-            if show_total_return:
-                _render_plotly(scope_fig_total)
-                st.markdown("##### Summary Table")
-                st.caption(subtitle_text)
-                _render_dataframe(summary_total)
-            else:
-                _render_plotly(scope_fig_basic)
-                st.markdown("##### Summary Table")
-                st.caption(subtitle_text)
-                _render_dataframe(summary_basic)
+                        scope_figs[scope_key] = _shared_result("scope_figs", scope_key, _scope_figs)
+                        cache["scope_figs"] = scope_figs
+                    scope_fig_basic = scope_figs[scope_key]["basic"]
+                    scope_fig_total = scope_figs[scope_key]["total"]
+
+                summaries = _render_artifact(cache, "stock_summaries", _summaries)
+                if show_total_return:
+                    _render_plotly(scope_fig_total)
+                    st.markdown("##### Summary Table")
+                    st.caption(render_subtitle)
+                    _render_dataframe(summaries["total"])
+                else:
+                    _render_plotly(scope_fig_basic)
+                    st.markdown("##### Summary Table")
+                    st.caption(render_subtitle)
+                    _render_dataframe(summaries["basic"])
         
-        with tab2:
-            _render_plotly(fig3)
+        if _tab_open(tab2):
+            with tab2:
+                _render_plotly(_figure("stock_gain"))
         
-        with tab3:
-            col1, col2 = st.columns([1, 1])
-            with col1:
-                _render_plotly(fig4)
-            with col2:    
-                _render_plotly(fig5)
-
-        with tab4:
-            div_cash = div.loc[st.session_state['start_date']:].fillna(0)
-            cf_sel = cash_flows.loc[st.session_state['start_date']:].fillna(0)
-            cum_div = div_cash.cumsum()
-
-            if div_cash.empty:
-                st.info("No dividend data available for the selected period.")
-            else:
-                col_cum_div = "Cumulative Dividends ($)"
-                col_ttm_div = "Trailing 12M Dividends ($)"
-                col_div_yield = "Dividend Yield (%)"
-                col_ttm_yoc = "TTM Yield on Cost (%)"
-                col_life_yoc = "Lifetime Div/Cost (%)"
-
-                ttm_cutoff = div_cash.index.max() - pd.Timedelta(days=365)
-                ttm_div = div_cash.loc[ttm_cutoff:].sum()
-                invested = cf_sel.clip(lower=0).sum()
-                current_value = val.loc[st.session_state['start_date']:].ffill().iloc[-1]
-                current_value_safe = pd.to_numeric(current_value, errors="coerce").where(
-                    pd.to_numeric(current_value, errors="coerce") != 0, np.nan
-                )
-                invested_safe = pd.to_numeric(invested, errors="coerce").where(
-                    pd.to_numeric(invested, errors="coerce") != 0, np.nan
-                )
-                def _safe_pct(numerator, denominator):
-                    den = pd.to_numeric(denominator, errors="coerce")
-                    num = pd.to_numeric(numerator, errors="coerce")
-
-                    if np.isscalar(den):
-                        if pd.isna(den) or den <= 0:
-                            return np.nan
-                        return (num / den) * 100
-
-                    den = den.where(den > 0, np.nan)
-                    return (num / den) * 100
-
-                dividend_yield = _safe_pct(ttm_div, current_value_safe)
-                yield_on_cost_ttm = _safe_pct(ttm_div, invested_safe)
-                lifetime_div_to_cost = _safe_pct(cum_div.iloc[-1], invested_safe)
-
-                div_summary = pd.DataFrame(
-                    {
-                        col_cum_div: cum_div.iloc[-1],
-                        col_ttm_div: ttm_div,
-                        col_div_yield: dividend_yield,
-                        col_ttm_yoc: yield_on_cost_ttm,
-                        col_life_yoc: lifetime_div_to_cost,
-                    }
-                ).sort_index()
-                div_summary = div_summary.replace({None: np.nan})
-                total_dividend_yield = _safe_pct(ttm_div.sum(), current_value.sum())
-                total_ttm_yoc = _safe_pct(ttm_div.sum(), invested.sum())
-                total_life_yoc = _safe_pct(cum_div.iloc[-1].sum(), invested.sum())
-
-                div_summary.loc["TOTAL"] = [
-                    div_summary[col_cum_div].sum(),
-                    div_summary[col_ttm_div].sum(),
-                    float(total_dividend_yield) if pd.notna(total_dividend_yield) else np.nan,
-                    float(total_ttm_yoc) if pd.notna(total_ttm_yoc) else np.nan,
-                    float(total_life_yoc) if pd.notna(total_life_yoc) else np.nan,
-                ]
-
-                styled_div_summary = (
-                    div_summary.style.format(
-                        {
-                            col_cum_div: "{:.2f}",
-                            col_ttm_div: "{:.2f}",
-                            col_div_yield: "{:.2f}",
-                            col_ttm_yoc: "{:.2f}",
-                            col_life_yoc: "{:.2f}",
-                        },
-                        na_rep="",
-                    )
-                    .background_gradient(
-                        cmap=sns.diverging_palette(20, 145, s=60, as_cmap=True),
-                        vmin=-10,
-                        vmax=10,
-                        subset=[
-                            col_div_yield,
-                            col_ttm_yoc,
-                        ],
+        if _tab_open(tab3):
+            with tab3:
+                col1, col2 = st.columns([1, 1])
+                with col1:
+                    _render_plotly(_figure("stock_holdings"))
+                with col2:    
+                    _render_plotly(_figure("annualised_return"))
+
+        if _tab_open(tab4):
+            with tab4:
+                div_cash = div.loc[st.session_state['start_date']:].fillna(0)
+                cf_sel = cash_flows.loc[st.session_state['start_date']:].fillna(0)
+                cum_div = div_cash.cumsum()
+
+                if div_cash.empty:
+                    st.info("No dividend data available for the selected period.")
+                else:
+                    col_cum_div = "Cumulative Dividends ($)"
+                    col_ttm_div = "Trailing 12M Dividends ($)"
+                    col_div_yield = "Dividend Yield (%)"
+                    col_ttm_yoc = "TTM Yield on Cost (%)"
+                    col_life_yoc = "Lifetime Div/Cost (%)"
+
+                    ttm_cutoff = div_cash.index.max() - pd.Timedelta(days=365)
+                    ttm_div = div_cash.loc[ttm_cutoff:].sum()
+                    invested = cf_sel.clip(lower=0).sum()
+                    current_value = val.loc[st.session_state['start_date']:].ffill().iloc[-1]
+                    current_value_safe = pd.to_numeric(current_value, errors="coerce").where(
+                        pd.to_numeric(current_value, errors="coerce") != 0, np.nan
                     )
-                    .background_gradient(
-                        cmap=sns.diverging_palette(20, 145, s=60, as_cmap=True),
-                        vmin=-100,
-                        vmax=100,
-                        subset=[col_life_yoc],
+                    invested_safe = pd.to_numeric(invested, errors="coerce").where(
+                        pd.to_numeric(invested, errors="coerce") != 0, np.nan
                     )
-                    .highlight_null(props="background-color: transparent; color: inherit;")
-                )
-                st.markdown("##### Summary Table")
-                st.caption(subtitle_text)
-                _render_dataframe(styled_div_summary)
+                    def _safe_pct(numerator, denominator):
+                        den = pd.to_numeric(denominator, errors="coerce")
+                        num = pd.to_numeric(numerator, errors="coerce")
 
-                div_options = ["TOTAL"] + sorted(list(div_cash.columns))
-                if (
-                    "div_chart_scope" in st.session_state
-                    and st.session_state["div_chart_scope"] not in div_options
-                ):
-                    st.session_state["div_chart_scope"] = "TOTAL"
-                div_selection = st.selectbox(
-                    "Dividend chart scope",
-                    options=div_options,
-                    index=0,
-                    key="div_chart_scope",
-                )
+                        if np.isscalar(den):
+                            if pd.isna(den) or den <= 0:
+                                return np.nan
+                            return (num / den) * 100
 
-                try:
-                    fig_div_cum, fig_div_annual = graph.plot_dividend_metrics_plotly(
-                        div_cash, selection=div_selection, subtitle_text=subtitle_text
-                    )
-                except Exception as exc:
-                    st.error(
-                        f"Dividend chart render failed for selection '{div_selection}': "
-                        f"{type(exc).__name__}: {exc}"
-                    )
-                    fig_div_cum, fig_div_annual = graph.plot_dividend_metrics_plotly(
-                        div_cash, selection="TOTAL", subtitle_text=subtitle_text
-                    )
+                        den = den.where(den > 0, np.nan)
+                        return (num / den) * 100
 
-                c1, c2 = st.columns(2)
-                with c1:
-                    _render_plotly(fig_div_cum)
-                with c2:
-                    _render_plotly(fig_div_annual)
+                    dividend_yield = _safe_pct(ttm_div, current_value_safe)
+                    yield_on_cost_ttm = _safe_pct(ttm_div, invested_safe)
+                    lifetime_div_to_cost = _safe_pct(cum_div.iloc[-1], invested_safe)
 
-        with tab5:
-            summary_df, schedule_df, sched_warnings = _fetch_dividend_schedule(
-                tuple(tickers),
-                st.session_state['start_date'],
-            )
-            upcoming_df, upcoming_warnings = _fetch_upcoming_dividends(tuple(tickers))
-
-            provider_notes = list(sched_warnings) + list(upcoming_warnings) + list(actions_warnings)
-            if provider_notes:
-                with st.expander("Provider notes", expanded=False):
-                    for msg in provider_notes:
-                        st.warning(msg)
-
-            if summary_df.empty and schedule_df.empty:
-                st.info(
-                    "No dividend schedule data available from Yahoo Finance for the selected "
-                    "tickers/date range."
-                )
-            else:
-                schedule_work = pd.DataFrame()
-                has_payment_dates = False
-                if not schedule_df.empty:
-                    schedule_work = schedule_df.copy()
-                    schedule_work["Ex-Dividend Date"] = pd.to_datetime(schedule_work["Ex-Dividend Date"])
-                    schedule_work["Payment Date"] = pd.to_datetime(schedule_work["Payment Date"], errors="coerce")
-                    has_payment_dates = schedule_work["Payment Date"].notna().any()
-                    schedule_work["FY"] = np.where(
-                        schedule_work["Ex-Dividend Date"].dt.month >= 7,
-                        schedule_work["Ex-Dividend Date"].dt.year + 1,
-                        schedule_work["Ex-Dividend Date"].dt.year,
-                    )
-                    schedule_work["Shares Held (Ex-Date)"] = 0.0
-                    for ticker in schedule_work["Ticker"].unique():
-                        if ticker in accum.columns:
-                            tmask = schedule_work["Ticker"] == ticker
-                            ex_dates = pd.DatetimeIndex(schedule_work.loc[tmask, "Ex-Dividend Date"])
-                            holdings = (
-                                pd.to_numeric(accum[ticker], errors="coerce")
-                                .reindex(ex_dates, method="ffill")
-                                .fillna(0.0)
-                                .values
-                            )
-                            schedule_work.loc[tmask, "Shares Held (Ex-Date)"] = holdings
-                    schedule_work["Dividend Value ($)"] = (
-                        pd.to_numeric(schedule_work["Dividend ($/share)"], errors="coerce")
-                        * pd.to_numeric(schedule_work["Shares Held (Ex-Date)"], errors="coerce")
-                    )
-
-                if not summary_df.empty:
-                    if not schedule_work.empty:
-                        last_div_value = (
-                            schedule_work.sort_values(["Ticker", "Ex-Dividend Date"])
-                            .groupby("Ticker", as_index=False)
-                            .tail(1)[["Ticker", "Dividend Value ($)"]]
-                            .rename(columns={"Dividend Value ($)": "Last Dividend ($)"})
-                        )
-                        summary_df = summary_df.merge(last_div_value, on="Ticker", how="left")
-                    ordered_cols = [
-                        "Ticker",
-                        "Currency",
-                        "Events",
-                        "Last Ex-Dividend Date",
-                        "Last Payment Date",
-                        "Last Dividend ($/share)",
-                        "Last Dividend ($)",
-                        "TTM Dividends ($/share)",
-                    ]
-                    if (
-                        "Last Payment Date" in summary_df.columns
-                        and summary_df["Last Payment Date"].isna().all()
-                    ):
-                        summary_df = summary_df.drop(columns=["Last Payment Date"])
-                    summary_df = summary_df[
-                        [c for c in ordered_cols if c in summary_df.columns]
-                    ]
-                    styled_schedule_summary = summary_df.style.format(
+                    div_summary = pd.DataFrame(
                         {
-                            "Last Dividend ($/share)": "{:.4f}",
-                            "Last Dividend ($)": "{:.2f}",
-                            "TTM Dividends ($/share)": "{:.4f}",
+                            col_cum_div: cum_div.iloc[-1],
+                            col_ttm_div: ttm_div,
+                            col_div_yield: dividend_yield,
+                            col_ttm_yoc: yield_on_cost_ttm,
+                            col_life_yoc: lifetime_div_to_cost,
                         }
+                    ).sort_index()
+                    div_summary = div_summary.replace({None: np.nan})
+                    total_dividend_yield = _safe_pct(ttm_div.sum(), current_value.sum())
+                    total_ttm_yoc = _safe_pct(ttm_div.sum(), invested.sum())
+                    total_life_yoc = _safe_pct(cum_div.iloc[-1].sum(), invested.sum())
+
+                    div_summary.loc["TOTAL"] = [
+                        div_summary[col_cum_div].sum(),
+                        div_summary[col_ttm_div].sum(),
+                        float(total_dividend_yield) if pd.notna(total_dividend_yield) else np.nan,
+                        float(total_ttm_yoc) if pd.notna(total_ttm_yoc) else np.nan,
+                        float(total_life_yoc) if pd.notna(total_life_yoc) else np.nan,
+                    ]
+
+                    styled_div_summary = (
+                        div_summary.style.format(
+                            {
+                                col_cum_div: "{:.2f}",
+                                col_ttm_div: "{:.2f}",
+                                col_div_yield: "{:.2f}",
+                                col_ttm_yoc: "{:.2f}",
+                                col_life_yoc: "{:.2f}",
+                            },
+                            na_rep="",
+                        )
+                        .background_gradient(
+                            cmap=sns.diverging_palette(20, 145, s=60, as_cmap=True),
+                            vmin=-10,
+                            vmax=10,
+                            subset=[
+                                col_div_yield,
+                                col_ttm_yoc,
+                            ],
+                        )
+                        .background_gradient(
+                            cmap=sns.diverging_palette(20, 145, s=60, as_cmap=True),
+                            vmin=-100,
+                            vmax=100,
+                            subset=[col_life_yoc],
+                        )
+                        .highlight_null(props="background-color: transparent; color: inherit;")
                     )
-                    st.markdown("##### Dividend Schedule Summary")
+                    st.markdown("##### Summary Table")
                     st.caption(subtitle_text)
-                    _render_dataframe(styled_schedule_summary)
+                    _render_dataframe(styled_div_summary)
 
-                if not upcoming_df.empty:
-                    upcoming_view = upcoming_df.copy()
+                    div_options = ["TOTAL"] + sorted(list(div_cash.columns))
                     if (
-                        "Upcoming Payment Date" in upcoming_view.columns
-                        and upcoming_view["Upcoming Payment Date"].isna().all()
+                        "div_chart_scope" in st.session_state
+                        and st.session_state["div_chart_scope"] not in div_options
                     ):
-                        upcoming_view = upcoming_view.drop(columns=["Upcoming Payment Date"])
-                    upcoming_view["Upcoming Ex-Dividend Date"] = pd.to_datetime(
-                        upcoming_view["Upcoming Ex-Dividend Date"], errors="coerce"
-                    ).dt.date
-                    if "Upcoming Payment Date" in upcoming_view.columns:
-                        upcoming_view["Upcoming Payment Date"] = pd.to_datetime(
-                            upcoming_view["Upcoming Payment Date"], errors="coerce"
-                        ).dt.date
-                    upcoming_view["Shares Held (Ex-Date)"] = 0.0
-                    for ticker in upcoming_view["Ticker"].unique():
-                        if ticker in accum.columns:
-                            tmask = upcoming_view["Ticker"] == ticker
-                            ex_dates = pd.to_datetime(
-                                upcoming_view.loc[tmask, "Upcoming Ex-Dividend Date"], errors="coerce"
-                            )
-                            holdings = (
-                                pd.to_numeric(accum[ticker], errors="coerce")
-                                .reindex(ex_dates, method="ffill")
-                                .fillna(0.0)
-                                .values
-                            )
-                            upcoming_view.loc[tmask, "Shares Held (Ex-Date)"] = holdings
-                    if "Upcoming Dividend ($/share)" in upcoming_view.columns:
-                        upcoming_view["Expected Dividend Cash ($)"] = (
-                            pd.to_numeric(upcoming_view["Upcoming Dividend ($/share)"], errors="coerce")
-                            * pd.to_numeric(upcoming_view["Shares Held (Ex-Date)"], errors="coerce")
+                        st.session_state["div_chart_scope"] = "TOTAL"
+                    div_selection = st.selectbox(
+                        "Dividend chart scope",
+                        options=div_options,
+                        index=0,
+                        key="div_chart_scope",
+                    )
+
+                    try:
+                        fig_div_cum, fig_div_annual = graph.plot_dividend_metrics_plotly(
+                            div_cash, selection=div_selection, subtitle_text=subtitle_text
                         )
-                    st.markdown("##### Upcoming Dividends")
-                    st.caption(subtitle_text)
-                    upcoming_view = upcoming_view.replace({None: np.nan})
-                    display_cols = [
-                        c
-                        for c in ["Upcoming Dividend ($/share)", "Expected Dividend Cash ($)"]
-                        if c in upcoming_view.columns
-                    ]
-                    for c in display_cols:
-                        upcoming_view[c] = pd.to_numeric(upcoming_view[c], errors="coerce")
-                        upcoming_view[c] = upcoming_view[c].map(
-                            lambda x: "Missing from provider" if pd.isna(x) else x
+                    except Exception as exc:
+                        st.error(
+                            f"Dividend chart render failed for selection '{div_selection}': "
+                            f"{type(exc).__name__}: {exc}"
                         )
-                    _render_dataframe(
-                        upcoming_view.style.format(
+                        fig_div_cum, fig_div_annual = graph.plot_dividend_metrics_plotly(
+                            div_cash, selection="TOTAL", subtitle_text=subtitle_text
+                        )
+
+                    c1, c2 = st.columns(2)
+                    with c1:
+                        _render_plotly(fig_div_cum)
+                    with c2:
+                        _render_plotly(fig_div_annual)
+
+        if _tab_open(tab5):
+            with tab5:
+                summary_df, schedule_df, sched_warnings = _fetch_dividend_schedule(
+                    tuple(tickers),
+                    st.session_state['start_date'],
+                )
+                upcoming_df, upcoming_warnings = _fetch_upcoming_dividends(tuple(tickers))
+                _, actions_warnings = _fetch_corporate_actions(tuple(tickers), st.session_state['start_date'])
+
+                provider_notes = list(sched_warnings) + list(upcoming_warnings) + list(actions_warnings)
+                if provider_notes:
+                    with st.expander("Provider notes", expanded=False):
+                        for msg in provider_notes:
+                            st.warning(msg)
+
+                if summary_df.empty and schedule_df.empty:
+                    st.info(
+                        "No dividend schedule data available from Yahoo Finance for the selected "
+                        "tickers/date range."
+                    )
+                else:
+                    schedule_work = pd.DataFrame()
+                    has_payment_dates = False
+                    if not schedule_df.empty:
+                        schedule_work = schedule_df.copy()
+                        schedule_work["Ex-Dividend Date"] = pd.to_datetime(schedule_work["Ex-Dividend Date"])
+                        schedule_work["Payment Date"] = pd.to_datetime(schedule_work["Payment Date"], errors="coerce")
+                        has_payment_dates = schedule_work["Payment Date"].notna().any()
+                        schedule_work["FY"] = np.where(
+                            schedule_work["Ex-Dividend Date"].dt.month >= 7,
+                            schedule_work["Ex-Dividend Date"].dt.year + 1,
+                            schedule_work["Ex-Dividend Date"].dt.year,
+                        )
+                        schedule_work["Shares Held (Ex-Date)"] = calc.positions_asof(
+                            accum, schedule_work, date_col="Ex-Dividend Date"
+                        )
+                        schedule_work["Dividend Value ($)"] = (
+                            pd.to_numeric(schedule_work["Dividend ($/share)"], errors="coerce")
+                            * pd.to_numeric(schedule_work["Shares Held (Ex-Date)"], errors="coerce")
+                        )
+
+                    if not summary_df.empty:
+                        if not schedule_work.empty:
+                            last_div_value = (
+                                schedule_work.sort_values(["Ticker", "Ex-Dividend Date"])
+                                .groupby("Ticker", as_index=False)
+                                .tail(1)[["Ticker", "Dividend Value ($)"]]
+                                .rename(columns={"Dividend Value ($)": "Last Dividend ($)"})
+                            )
+                            summary_df = summary_df.merge(last_div_value, on="Ticker", how="left")
+                        ordered_cols = [
+                            "Ticker",
+                            "Currency",
+                            "Events",
+                            "Last Ex-Dividend Date",
+                            "Last Payment Date",
+                            "Last Dividend ($/share)",
+                            "Last Dividend ($)",
+                            "TTM Dividends ($/share)",
+                        ]
+                        if (
+                            "Last Payment Date" in summary_df.columns
+                            and summary_df["Last Payment Date"].isna().all()
+                        ):
+                            summary_df = summary_df.drop(columns=["Last Payment Date"])
+                        summary_df = summary_df[
+                            [c for c in ordered_cols if c in summary_df.columns]
+                        ]
+                        styled_schedule_summary = summary_df.style.format(
                             {
-                                "Days to Ex-Div": "{:.0f}",
-                                "Shares Held (Ex-Date)": "{:.2f}",
+                                "Last Dividend ($/share)": "{:.4f}",
+                                "Last Dividend ($)": "{:.2f}",
+                                "TTM Dividends ($/share)": "{:.4f}",
                             }
                         )
-                    )
-                    if "Expected Dividend Cash ($)" in upcoming_view.columns:
-                        ex_dates = pd.to_datetime(
+                        st.markdown("##### Dividend Schedule Summary")
+                        st.caption(subtitle_text)
+                        _render_dataframe(styled_schedule_summary)
+
+                    if not upcoming_df.empty:
+                        upcoming_view = upcoming_df.copy()
+                        if (
+                            "Upcoming Payment Date" in upcoming_view.columns
+                            and upcoming_view["Upcoming Payment Date"].isna().all()
+                        ):
+                            upcoming_view = upcoming_view.drop(columns=["Upcoming Payment Date"])
+                        upcoming_view["Upcoming Ex-Dividend Date"] = pd.to_datetime(
                             upcoming_view["Upcoming Ex-Dividend Date"], errors="coerce"
+                        ).dt.date
+                        if "Upcoming Payment Date" in upcoming_view.columns:
+                            upcoming_view["Upcoming Payment Date"] = pd.to_datetime(
+                                upcoming_view["Upcoming Payment Date"], errors="coerce"
+                            ).dt.date
+                        upcoming_view["Shares Held (Ex-Date)"] = calc.positions_asof(
+                            accum, upcoming_view, date_col="Upcoming Ex-Dividend Date"
                         )
-                        expected_cash = pd.to_numeric(
-                            upcoming_view["Expected Dividend Cash ($)"], errors="coerce"
-                        ).fillna(0.0)
-                        now_norm = pd.Timestamp.today().normalize()
-                        next_30 = expected_cash[(ex_dates >= now_norm) & (ex_dates <= now_norm + pd.Timedelta(days=30))].sum()
-                        next_90 = expected_cash[(ex_dates >= now_norm) & (ex_dates <= now_norm + pd.Timedelta(days=90))].sum()
-                        future_income_summary = pd.DataFrame(
-                            [
-                                {
-                                    "Confirmed events": int(len(upcoming_view)),
-                                    "Expected cash next 30d ($)": float(next_30),
-                                    "Expected cash next 90d ($)": float(next_90),
-                                }
-                            ]
-                        )
-                        st.markdown("##### Future Income Summary")
+                        if "Upcoming Dividend ($/share)" in upcoming_view.columns:
+                            upcoming_view["Expected Dividend Cash ($)"] = (
+                                pd.to_numeric(upcoming_view["Upcoming Dividend ($/share)"], errors="coerce")
+                                * pd.to_numeric(upcoming_view["Shares Held (Ex-Date)"], errors="coerce")
+                            )
+                        st.markdown("##### Upcoming Dividends")
+                        st.caption(subtitle_text)
+                        upcoming_view = upcoming_view.replace({None: np.nan})
+                        display_cols = [
+                            c
+                            for c in ["Upcoming Dividend ($/share)", "Expected Dividend Cash ($)"]
+                            if c in upcoming_view.columns
+                        ]
+                        for c in display_cols:
+                            upcoming_view[c] = pd.to_numeric(upcoming_view[c], errors="coerce")
+                            upcoming_view[c] = upcoming_view[c].map(
+                                lambda x: "Missing from provider" if pd.isna(x) else x
+                            )
                         _render_dataframe(
-                            future_income_summary.style.format(
+                            upcoming_view.style.format(
                                 {
-                                    "Expected cash next 30d ($)": "{:.2f}",
-                                    "Expected cash next 90d ($)": "{:.2f}",
+                                    "Days to Ex-Div": "{:.0f}",
+                                    "Shares Held (Ex-Date)": "{:.2f}",
                                 }
                             )
                         )
+                        if "Expected Dividend Cash ($)" in upcoming_view.columns:
+                            ex_dates = pd.to_datetime(
+                                upcoming_view["Upcoming Ex-Dividend Date"], errors="coerce"
+                            )
+                            expected_cash = pd.to_numeric(
+                                upcoming_view["Expected Dividend Cash ($)"], errors="coerce"
+                            ).fillna(0.0)
+                            now_norm = pd.Timestamp.today().normalize()
+                            next_30 = expected_cash[(ex_dates >= now_norm) & (ex_dates <= now_norm + pd.Timedelta(days=30))].sum()
+                            next_90 = expected_cash[(ex_dates >= now_norm) & (ex_dates <= now_norm + pd.Timedelta(days=90))].sum()
+                            future_income_summary = pd.DataFrame(
+                                [
+                                    {
+                                        "Confirmed events": int(len(upcoming_view)),
+                                        "Expected cash next 30d ($)": float(next_30),
+                                        "Expected cash next 90d ($)": float(next_90),
+                                    }
+                                ]
+                            )
+                            st.markdown("##### Future Income Summary")
+                            _render_dataframe(
+                                future_income_summary.style.format(
+                                    {
+                                        "Expected cash next 30d ($)": "{:.2f}",
+                                        "Expected cash next 90d ($)": "{:.2f}",
+                                    }
+                                )
+                            )
 
-                if not schedule_df.empty:
-                    ticker_options = ["ALL"] + sorted(schedule_work["Ticker"].unique().tolist())
-                    selected_ticker = st.selectbox(
-                        "Dividend schedule scope",
-                        options=ticker_options,
-                        index=0,
-                        key="div_schedule_scope",
-                    )
+                    if not schedule_df.empty:
+                        ticker_options = ["ALL"] + sorted(schedule_work["Ticker"].unique().tolist())
+                        selected_ticker = st.selectbox(
+                            "Dividend schedule scope",
+                            options=ticker_options,
+                            index=0,
+                            key="div_schedule_scope",
+                        )
 
-                    fy_options = sorted(schedule_work["FY"].dropna().astype(int).unique().tolist(), reverse=True)
-                    selected_fy = st.selectbox(
-                        "Dividend export financial year",
-                        options=fy_options,
-                        index=0,
-                        key="div_schedule_fy",
-                        format_func=lambda y: f"FY{y} ({y-1}-07-01 to {y}-06-30)",
-                    )
+                        fy_options = sorted(schedule_work["FY"].dropna().astype(int).unique().tolist(), reverse=True)
+                        selected_fy = st.selectbox(
+                            "Dividend export financial year",
+                            options=fy_options,
+                            index=0,
+                            key="div_schedule_fy",
+                            format_func=lambda y: f"FY{y} ({y-1}-07-01 to {y}-06-30)",
+                        )
 
-                    if selected_ticker == "ALL":
-                        schedule_view = schedule_work
-                    else:
-                        schedule_view = schedule_work[schedule_work["Ticker"] == selected_ticker]
-
-                    export_df = schedule_view[schedule_view["FY"] == selected_fy].copy()
-                    export_df = export_df.sort_values(by=["Ex-Dividend Date", "Ticker"], ascending=[True, True])
-                    export_df["Ex-Dividend Date"] = export_df["Ex-Dividend Date"].dt.strftime("%Y-%m-%d")
-                    if has_payment_dates:
-                        export_df["Payment Date"] = export_df["Payment Date"].dt.strftime("%Y-%m-%d").fillna("")
-                    export_df = export_df[
-                        ["Ticker", "Currency", "FY", "Ex-Dividend Date"]
-                        + (["Payment Date"] if has_payment_dates else [])
-                        + [
-                            "Dividend ($/share)",
-                            "Shares Held (Ex-Date)",
-                            "Dividend Value ($)",
-                            "Cumulative Dividends ($/share)",
+                        if selected_ticker == "ALL":
+                            schedule_view = schedule_work
+                        else:
+                            schedule_view = schedule_work[schedule_work["Ticker"] == selected_ticker]
+
+                        export_df = schedule_view[schedule_view["FY"] == selected_fy].copy()
+                        export_df = export_df.sort_values(by=["Ex-Dividend Date", "Ticker"], ascending=[True, True])
+                        export_df["Ex-Dividend Date"] = export_df["Ex-Dividend Date"].dt.strftime("%Y-%m-%d")
+                        if has_payment_dates:
+                            export_df["Payment Date"] = export_df["Payment Date"].dt.strftime("%Y-%m-%d").fillna("")
+                        export_df = export_df[
+                            ["Ticker", "Currency", "FY", "Ex-Dividend Date"]
+                            + (["Payment Date"] if has_payment_dates else [])
+                            + [
+                                "Dividend ($/share)",
+                                "Shares Held (Ex-Date)",
+                                "Dividend Value ($)",
+                                "Cumulative Dividends ($/share)",
+                            ]
                         ]
-                    ]
-
-                    st.download_button(
-                        label="Export selected FY dividend CSV",
-                        data=export_df.to_csv(index=False).encode("utf-8"),
-                        file_name=f"dividend_schedule_FY{selected_fy}_{selected_ticker}.csv",
-                        mime="text/csv",
-                        disabled=export_df.empty,
-                        help="Exports dividend event details for the selected scope and financial year.",
-                    )
-                    if export_df.empty:
-                        st.info("No dividend events found for the selected scope and financial year.")
 
-                    schedule_view = schedule_view.drop(columns=["FY"]).copy()
-                    schedule_view["Ex-Dividend Date"] = schedule_view["Ex-Dividend Date"].dt.date
-                    if has_payment_dates:
-                        schedule_view["Payment Date"] = schedule_view["Payment Date"].dt.date
-                    else:
-                        schedule_view = schedule_view.drop(columns=["Payment Date"])
-                    st.markdown("##### Dividend Events")
-                    st.caption(subtitle_text)
-                    _render_dataframe(
-                        schedule_view.style.format(
-                            {
-                                "Dividend ($/share)": "{:.4f}",
-                                "Shares Held (Ex-Date)": "{:.2f}",
-                                "Dividend Value ($)": "{:.2f}",
-                                "Cumulative Dividends ($/share)": "{:.4f}",
-                            }
+                        st.download_button(
+                            label="Export selected FY dividend CSV",
+                            data=export_df.to_csv(index=False).encode("utf-8"),
+                            file_name=f"dividend_schedule_FY{selected_fy}_{selected_ticker}.csv",
+                            mime="text/csv",
+                            disabled=export_df.empty,
+                            help="Exports dividend event details for the selected scope and financial year.",
+                        )
+                        if export_df.empty:
+                            st.info("No dividend events found for the selected scope and financial year.")
+
+                        schedule_view = schedule_view.drop(columns=["FY"]).copy()
+                        schedule_view["Ex-Dividend Date"] = schedule_view["Ex-Dividend Date"].dt.date
+                        if has_payment_dates:
+                            schedule_view["Payment Date"] = schedule_view["Payment Date"].dt.date
+                        else:
+                            schedule_view = schedule_view.drop(columns=["Payment Date"])
+                        st.markdown("##### Dividend Events")
+                        st.caption(subtitle_text)
+                        _render_dataframe(
+                            schedule_view.style.format(
+                                {
+                                    "Dividend ($/share)": "{:.4f}",
+                                    "Shares Held (Ex-Date)": "{:.2f}",
+                                    "Dividend Value ($)": "{:.2f}",
+                                    "Cumulative Dividends ($/share)": "{:.4f}",
+                                }
+                            )
                         )
-                    )
-
-        with tab6:
-            contrib_scope_options = ["TOTAL"] + sorted(list(val.columns))
-            if (
-                "contrib_scope" in st.session_state
-                and st.session_state["contrib_scope"] not in contrib_scope_options
-            ):
-                st.session_state["contrib_scope"] = "TOTAL"
-            contrib_scope = st.selectbox(
-                "Attribution scope",
-                options=contrib_scope_options,
-                index=0,
-                key="contrib_scope",
-            )
 
-            if contrib_scope == "TOTAL":
-                val_attr = val
-                cf_attr = cash_flows
-                div_attr = div
-                fx_attr = fx_rates
-            else:
-                val_attr = val[[contrib_scope]]
-                cf_attr = cash_flows[[contrib_scope]]
-                div_attr = div[[contrib_scope]] if contrib_scope in div.columns else pd.DataFrame(
-                    {contrib_scope: 0.0}, index=val.index
-                )
-                fx_attr = (
-                    fx_rates[[contrib_scope]]
-                    if isinstance(fx_rates, pd.DataFrame) and contrib_scope in fx_rates.columns
-                    else None
+        if _tab_open(tab6):
+            with tab6:
+                contrib_scope_options = ["TOTAL"] + sorted(list(val.columns))
+                if (
+                    "contrib_scope" in st.session_state
+                    and st.session_state["contrib_scope"] not in contrib_scope_options
+                ):
+                    st.session_state["contrib_scope"] = "TOTAL"
+                contrib_scope = st.selectbox(
+                    "Attribution scope",
+                    options=contrib_scope_options,
+                    index=0,
+                    key="contrib_scope",
                 )
 
-            contrib_df = calc.contribution_analysis(
-                val_attr,
-                cf_attr,
-                div_attr,
-                fx_rates=fx_attr,
-                date=st.session_state["start_date"],
-                include_total=True,
-            )
-            st.markdown("##### Contribution Analysis")
-            st.caption(subtitle_text)
-            _render_dataframe(
-                contrib_df.style.format(
-                    {
-                        "Price ($)": "{:.2f}",
-                        "Dividend ($)": "{:.2f}",
-                        "FX ($)": "{:.2f}",
-                        "Total ($)": "{:.2f}",
-                        "Contribution (%)": "{:.2f}",
-                        "Contribution Share of Total (%)": "{:.2f}",
-                    },
-                    na_rep="",
-                )
-            )
+                if contrib_scope == "TOTAL":
+                    val_attr = val
+                    cf_attr = cash_flows
+                    div_attr = div
+                    fx_attr = fx_rates
+                else:
+                    val_attr = val[[contrib_scope]]
+                    cf_attr = cash_flows[[contrib_scope]]
+                    div_attr = div[[contrib_scope]] if contrib_scope in div.columns else pd.DataFrame(
+                        {contrib_scope: 0.0}, index=val.index
+                    )
+                    fx_attr = (
+                        fx_rates[[contrib_scope]]
+                        if isinstance(fx_rates, pd.DataFrame) and contrib_scope in fx_rates.columns
+                        else None
+                    )
 
-            core = contrib_df.drop(index=["TOTAL"], errors="ignore").copy()
-            if not core.empty:
-                top_n = min(8, len(core))
-                plot_df = pd.concat(
-                    [core.nlargest(top_n, "Total ($)"), core.nsmallest(top_n, "Total ($)")]
-                ).drop_duplicates()
-                plot_df = plot_df.sort_values("Total ($)", ascending=True)
-                bar_colors = np.where(
-                    pd.to_numeric(plot_df["Total ($)"], errors="coerce") >= 0,
-                    "rgb(71, 157, 201)",
-                    "rgb(220, 82, 88)",
+                contrib_df = _shared_result(
+                    "contribution_analysis",
+                    (contrib_scope, str(st.session_state["start_date"])),
+                    lambda: calc.contribution_analysis(
+                        val_attr,
+                        cf_attr,
+                        div_attr,
+                        fx_rates=fx_attr,
+                        date=st.session_state["start_date"],
+                        include_total=True,
+                    ),
                 )
-                fig_attr = go.Figure()
-                fig_attr.add_trace(
-                    go.Bar(
-                        x=plot_df["Total ($)"],
-                        y=plot_df.index.astype(str),
-                        name="Total Contribution ($)",
-                        marker_color=bar_colors,
-                        orientation="h",
+                st.markdown("##### Contribution Analysis")
+                st.caption(subtitle_text)
+                _render_dataframe(
+                    contrib_df.style.format(
+                        {
+                            "Price ($)": "{:.2f}",
+                            "Dividend ($)": "{:.2f}",
+                            "FX ($)": "{:.2f}",
+                            "Total ($)": "{:.2f}",
+                            "Contribution (%)": "{:.2f}",
+                            "Contribution Share of Total (%)": "{:.2f}",
+                        },
+                        na_rep="",
                     )
                 )
-                fig_attr.update_layout(
-                    title={"text": "Top Contributors / Detractors", "x": 0.5},
-                    xaxis_title="Contribution ($)",
-                    yaxis_title="Ticker",
-                    margin=dict(l=50, r=30, t=70, b=60),
-                )
-                _render_plotly(fig_attr)
-
-        with tab7:
-            rolling_mode = st.toggle(
-                "Use total return for rolling windows",
-                value=True,
-                key="rolling_total_mode",
-            )
-            mode = "total" if rolling_mode else "basic"
-            p_ret, b_ret = _period_return_series(
-                val,
-                cash_flows,
-                div,
-                benchmark_price,
-                benchmark_div,
-                st.session_state["start_date"],
-                mode=mode,
-            )
-            roll_port, roll_bench, roll_summary = calc.rolling_return_comparison(
-                p_ret, b_ret, windows_years=(1, 3, 5), periods_per_year=261
-            )
 
-            st.markdown("##### Rolling Return Summary")
-            st.caption(subtitle_text)
-            if roll_summary.empty:
-                st.info("Not enough history for rolling 1Y/3Y/5Y windows.")
-            else:
-                _render_dataframe(
-                    roll_summary.style.format(
-                        {"Portfolio (%)": "{:.2f}", "Benchmark (%)": "{:.2f}", "Excess (%)": "{:.2f}"}
+                core = contrib_df.drop(index=["TOTAL"], errors="ignore").copy()
+                if not core.empty:
+                    top_n = min(8, len(core))
+                    plot_df = pd.concat(
+                        [core.nlargest(top_n, "Total ($)"), core.nsmallest(top_n, "Total ($)")]
+                    ).drop_duplicates()
+                    plot_df = plot_df.sort_values("Total ($)", ascending=True)
+                    bar_colors = np.where(
+                        pd.to_numeric(plot_df["Total ($)"], errors="coerce") >= 0,
+                        "rgb(71, 157, 201)",
+                        "rgb(220, 82, 88)",
                     )
+                    fig_attr = go.Figure()
+                    fig_attr.add_trace(
+                        go.Bar(
+                            x=plot_df["Total ($)"],
+                            y=plot_df.index.astype(str),
+                            name="Total Contribution ($)",
+                            marker_color=bar_colors,
+                            orientation="h",
+                        )
+                    )
+                    fig_attr.update_layout(
+                        title={"text": "Top Contributors / Detractors", "x": 0.5},
+                        xaxis_title="Contribution ($)",
+                        yaxis_title="Ticker",
+                        margin=dict(l=50, r=30, t=70, b=60),
+                    )
+                    _render_plotly(fig_attr)
+
+        if _tab_open(tab7):
+            with tab7:
+                rolling_mode = st.toggle(
+                    "Use total return for rolling windows",
+                    value=True,
+                    key="rolling_total_mode",
+                )
+                mode = "total" if rolling_mode else "basic"
+                p_ret, b_ret = _period_return_series(
+                    val,
+                    cash_flows,
+                    div,
+                    benchmark_price,
+                    benchmark_div,
+                    st.session_state["start_date"],
+                    mode=mode,
+                )
+                roll_port, roll_bench, roll_summary = calc.rolling_return_comparison(
+                    p_ret, b_ret, windows_years=(1, 3, 5), periods_per_year=261
                 )
 
-            if not roll_port.empty and not roll_bench.empty:
-                fig_roll = go.Figure()
-                for w in roll_port.columns:
-                    fig_roll.add_trace(
-                        go.Scatter(
-                            x=roll_port.index,
-                            y=roll_port[w],
-                            mode="lines",
-                            name=f"Portfolio {w}",
+                st.markdown("##### Rolling Return Summary")
+                st.caption(subtitle_text)
+                if roll_summary.empty:
+                    st.info("Not enough history for rolling 1Y/3Y/5Y windows.")
+                else:
+                    _render_dataframe(
+                        roll_summary.style.format(
+                            {"Portfolio (%)": "{:.2f}", "Benchmark (%)": "{:.2f}", "Excess (%)": "{:.2f}"}
                         )
                     )
-                    fig_roll.add_trace(
-                        go.Scatter(
-                            x=roll_bench.index,
-                            y=roll_bench[w],
-                            mode="lines",
-                            name=f"Benchmark {w}",
-                            line=dict(dash="dot"),
+
+                if not roll_port.empty and not roll_bench.empty:
+                    fig_roll = go.Figure()
+                    for w in roll_port.columns:
+                        fig_roll.add_trace(
+                            go.Scatter(
+                                x=roll_port.index,
+                                y=roll_port[w],
+                                mode="lines",
+                                name=f"Portfolio {w}",
+                            )
+                        )
+                        fig_roll.add_trace(
+                            go.Scatter(
+                                x=roll_bench.index,
+                                y=roll_bench[w],
+                                mode="lines",
+                                name=f"Benchmark {w}",
+                                line=dict(dash="dot"),
+                            )
                         )
+                    fig_roll.update_layout(
+                        title={"text": "Rolling Returns (1Y/3Y/5Y)", "x": 0.5},
+                        xaxis_title="Date",
+                        yaxis_title="Return (%)",
+                        margin=dict(l=50, r=30, t=70, b=50),
                     )
-                fig_roll.update_layout(
-                    title={"text": "Rolling Returns (1Y/3Y/5Y)", "x": 0.5},
-                    xaxis_title="Date",
-                    yaxis_title="Return (%)",
-                    margin=dict(l=50, r=30, t=70, b=50),
-                )
-                _render_plotly(fig_roll)
+                    _render_plotly(fig_roll)
 
-        with tab8:
-            st.markdown("##### Data Provider Status")
-            provider_diag = st.session_state.get("provider_diagnostics", {})
-            provider_rows = [
-                {
-                    "Provider": provider_diag.get("provider", ""),
-                    "Requested Benchmark": provider_diag.get("requested_index", ""),
-                    "Fetched Tickers": len(provider_diag.get("fetched", [])),
-                    "Failed Tickers": len(provider_diag.get("failed", {})),
-                }
-            ]
-            _render_dataframe(pd.DataFrame(provider_rows))
-
-            failed_map = provider_diag.get("failed", {})
-            if failed_map:
-                failed_df = pd.DataFrame(
-                    [{"Ticker": k, "Reason": v} for k, v in failed_map.items()]
-                ).sort_values("Ticker")
-                st.markdown("##### Provider Failures")
-                _render_dataframe(failed_df)
-
-            st.markdown("##### Ticker Data Quality")
-            ticker_diag = _ticker_diagnostics(price, div_, st.session_state["start_date"])
-            _render_dataframe(
-                ticker_diag.style.format(
+        if _tab_open(tab8):
+            with tab8:
+                st.markdown("##### Data Provider Status")
+                provider_diag = st.session_state.get("provider_diagnostics", {})
+                provider_rows = [
                     {
-                        "Stale (business days)": "{:.0f}",
-                        "Price Missing (%)": "{:.2f}",
-                        "Dividend Missing (%)": "{:.2f}",
-                    },
-                    na_rep="",
-                )
-            )
-
-            st.markdown("##### FX Conversion Status")
-            fx_diag = st.session_state.get("fx_diagnostics", {})
-            fx_rows = []
-            for pair, tickers in fx_diag.get("pair_failures", {}).items():
-                fx_rows.append(
-                    {
-                        "FX Pair": pair,
-                        "Status": "FAILED",
-                        "Tickers": ", ".join(tickers),
+                        "Provider": provider_diag.get("provider", ""),
+                        "Requested Benchmark": provider_diag.get("requested_index", ""),
+                        "Fetched Tickers": len(provider_diag.get("fetched", [])),
+                        "Failed Tickers": len(provider_diag.get("failed", {})),
                     }
-                )
-            if not fx_rows:
-                fx_rows = [{"FX Pair": "All attempted pairs", "Status": "OK", "Tickers": ""}]
-            _render_dataframe(pd.DataFrame(fx_rows))
-
-            unknown_tickers = fx_diag.get("unknown_currency_tickers", [])
-            if unknown_tickers:
-                st.warning(
-                    "Currency metadata unavailable for: " + ", ".join(unknown_tickers)
+                ]
+                _render_dataframe(pd.DataFrame(provider_rows))
+
+                failed_map = provider_diag.get("failed", {})
+                if failed_map:
+                    failed_df = pd.DataFrame(
+                        [{"Ticker": k, "Reason": v} for k, v in failed_map.items()]
+                    ).sort_values("Ticker")
+                    st.markdown("##### Provider Failures")
+                    _render_dataframe(failed_df)
+
+                st.markdown("##### Ticker Data Quality")
+                ticker_diag = _ticker_diagnostics(price, div_, st.session_state["start_date"])
+                _render_dataframe(
+                    ticker_diag.style.format(
+                        {
+                            "Stale (business days)": "{:.0f}",
+                            "Price Missing (%)": "{:.2f}",
+                            "Dividend Missing (%)": "{:.2f}",
+                        },
+                        na_rep="",
+                    )
                 )
 
-            st.markdown("##### Benchmark Status")
-            bench_diag = pd.DataFrame(
-                [
-                    {
-                        "Selected Benchmark": benchmark_status.get("selected", index),
-                        "Available in Price Data": benchmark_status.get("available", False),
-                        "Start Date": str(st.session_state['start_date'].date()) if isinstance(st.session_state.get('start_date'), pd.Timestamp) else str(st.session_state.get('start_date')),
-                        "Benchmark Last Date": (
-                            benchmark_price.dropna().index.max().date()
-                            if isinstance(benchmark_price, pd.Series) and not benchmark_price.dropna().empty
-                            else ""
-                        ),
-                        "Benchmark Missing (%)": (
-                            float(pd.to_numeric(benchmark_price, errors="coerce").isna().mean() * 100.0)
-                            if isinstance(benchmark_price, pd.Series) and len(benchmark_price) > 0
-                            else np.nan
-                        ),
-                    }
-                ]
-            )
-            _render_dataframe(
-                bench_diag.style.format({"Benchmark Missing (%)": "{:.2f}"}, na_rep="")
-            )
+                st.markdown("##### FX Conversion Status")
+                fx_diag = st.session_state.get("fx_diagnostics", {})
+                fx_rows = []
+                for pair, tickers in fx_diag.get("pair_failures", {}).items():
+                    fx_rows.append(
+                        {
+                            "FX Pair": pair,
+                            "Status": "FAILED",
+                            "Tickers": ", ".join(tickers),
+                        }
+                    )
+                if not fx_rows:
+                    fx_rows = [{"FX Pair": "All attempted pairs", "Status": "OK", "Tickers": ""}]
+                _render_dataframe(pd.DataFrame(fx_rows))
 
-            action_queue = actions_df.copy() if isinstance(actions_df, pd.DataFrame) else pd.DataFrame()
-            if 'upcoming_df' in locals() and isinstance(upcoming_df, pd.DataFrame) and not upcoming_df.empty:
-                if "Upcoming Payment Date" in upcoming_df.columns:
-                    missing_payment = upcoming_df["Upcoming Payment Date"].isna()
-                else:
-                    missing_payment = pd.Series(True, index=upcoming_df.index)
-                if "Upcoming Dividend ($/share)" in upcoming_df.columns:
-                    missing_amount = upcoming_df["Upcoming Dividend ($/share)"].isna()
-                else:
-                    missing_amount = pd.Series(True, index=upcoming_df.index)
-                missing_mask = missing_payment | missing_amount
-                missing_rows = upcoming_df[missing_mask].copy()
-                if not missing_rows.empty:
-                    missing_rows["Event Type"] = "Upcoming Dividend"
-                    missing_rows["Event Date"] = pd.to_datetime(
-                        missing_rows["Upcoming Ex-Dividend Date"], errors="coerce"
-                    ).dt.date
-                    missing_rows["Details"] = (
-                        "Missing "
-                        + np.where(
-                            (
-                                missing_rows["Upcoming Payment Date"].isna()
-                                if "Upcoming Payment Date" in missing_rows.columns
-                                else True
+                unknown_tickers = fx_diag.get("unknown_currency_tickers", [])
+                if unknown_tickers:
+                    st.warning(
+                        "Currency metadata unavailable for: " + ", ".join(unknown_tickers)
+                    )
+
+                st.markdown("##### Benchmark Status")
+                bench_diag = pd.DataFrame(
+                    [
+                        {
+                            "Selected Benchmark": benchmark_status.get("selected", index),
+                            "Available in Price Data": benchmark_status.get("available", False),
+                            "Start Date": str(st.session_state['start_date'].date()) if isinstance(st.session_state.get('start_date'), pd.Timestamp) else str(st.session_state.get('start_date')),
+                            "Benchmark Last Date": (
+                                benchmark_price.dropna().index.max().date()
+                                if isinstance(benchmark_price, pd.Series) and not benchmark_price.dropna().empty
+                                else ""
                             ),
-                            "payment date",
-                            "",
-                        )
-                        + np.where(
-                            (
-                                missing_rows["Upcoming Dividend ($/share)"].isna()
-                                if "Upcoming Dividend ($/share)" in missing_rows.columns
-                                else True
+                            "Benchmark Missing (%)": (
+                                float(pd.to_numeric(benchmark_price, errors="coerce").isna().mean() * 100.0)
+                                if isinstance(benchmark_price, pd.Series) and len(benchmark_price) > 0
+                                else np.nan
                             ),
-                            np.where(
+                        }
+                    ]
+                )
+                _render_dataframe(
+                    bench_diag.style.format({"Benchmark Missing (%)": "{:.2f}"}, na_rep="")
+                )
+
+                actions_df, _ = _fetch_corporate_actions(tuple(tickers), st.session_state['start_date'])
+                upcoming_df, _ = _fetch_upcoming_dividends(tuple(tickers))
+                action_queue = actions_df.copy() if isinstance(actions_df, pd.DataFrame) else pd.DataFrame()
+                if isinstance(upcoming_df, pd.DataFrame) and not upcoming_df.empty:
+                    if "Upcoming Payment Date" in upcoming_df.columns:
+                        missing_payment = upcoming_df["Upcoming Payment Date"].isna()
+                    else:
+                        missing_payment = pd.Series(True, index=upcoming_df.index)
+                    if "Upcoming Dividend ($/share)" in upcoming_df.columns:
+                        missing_amount = upcoming_df["Upcoming Dividend ($/share)"].isna()
+                    else:
+                        missing_amount = pd.Series(True, index=upcoming_df.index)
+                    missing_mask = missing_payment | missing_amount
+                    missing_rows = upcoming_df[missing_mask].copy()
+                    if not missing_rows.empty:
+                        missing_rows["Event Type"] = "Upcoming Dividend"
+                        missing_rows["Event Date"] = pd.to_datetime(
+                            missing_rows["Upcoming Ex-Dividend Date"], errors="coerce"
+                        ).dt.date
+                        missing_rows["Details"] = (
+                            "Missing "
+                            + np.where(
                                 (
                                     missing_rows["Upcoming Payment Date"].isna()
                                     if "Upcoming Payment Date" in missing_rows.columns
                                     else True
                                 ),
-                                " & amount",
-                                "amount",
-                            ),
-                            "",
+                                "payment date",
+                                "",
+                            )
+                            + np.where(
+                                (
+                                    missing_rows["Upcoming Dividend ($/share)"].isna()
+                                    if "Upcoming Dividend ($/share)" in missing_rows.columns
+                                    else True
+                                ),
+                                np.where(
+                                    (
+                                        missing_rows["Upcoming Payment Date"].isna()
+                                        if "Upcoming Payment Date" in missing_rows.columns
+                                        else True
+                                    ),
+                                    " & amount",
+                                    "amount",
+                                ),
+                                "",
+                            )
+                        )
+                        missing_rows["Action Needed"] = "Verify with broker"
+                        missing_rows["Status"] = "Open"
+                        queue_cols = ["Ticker", "Event Type", "Event Date", "Details", "Action Needed", "Status"]
+                        action_queue = pd.concat(
+                            [action_queue, missing_rows[queue_cols]], ignore_index=True
                         )
-                    )
-                    missing_rows["Action Needed"] = "Verify with broker"
-                    missing_rows["Status"] = "Open"
-                    queue_cols = ["Ticker", "Event Type", "Event Date", "Details", "Action Needed", "Status"]
-                    action_queue = pd.concat(
-                        [action_queue, missing_rows[queue_cols]], ignore_index=True
-                    )
 
-            st.markdown("##### Corporate Action Queue")
-            if action_queue.empty:
-                st.info("No action items detected.")
-            else:
-                if "Event Date" in action_queue.columns:
-                    action_queue = action_queue.sort_values(
-                        by=["Event Date", "Ticker"], ascending=[False, True], na_position="last"
-                    )
-                _render_dataframe(action_queue)
+                st.markdown("##### Corporate Action Queue")
+                if action_queue.empty:
+                    st.info("No action items detected.")
+                else:
+                    if "Event Date" in action_queue.columns:
+                        action_queue = action_queue.sort_values(
+                            by=["Event Date", "Ticker"], ascending=[False, True], na_position="last"
+                        )
+                    _render_dataframe(action_queue)
 
         display_calc_details()
             
@@ -1468,6 +1550,10 @@ def get_and_display_data(file, index, target_currency):
             display_data()
 
 
+# Swap in a finished background refresh before anything reads the portfolio
+if "refresh_job" in st.session_state and st.session_state["refresh_job"].done():
+    _apply_refresh(st.session_state["refresh_job"])
+
 # Get index and csv file
 with st.sidebar:
     default_index_symbol = indices[1].split(":")[0] if len(indices) > 1 else "^GSPC"
@@ -1542,6 +1628,18 @@ with st.sidebar:
             else:
                 st.info('Please select a csv file to continue', icon="ℹ️")  
                 button = None
+
+    if button and "refresh_job" not in st.session_state:
+        # Fetch and process on a background thread, the loaded portfolio stays interactive
+        source = io.BytesIO(file.getvalue()) if hasattr(file, "getvalue") else file
+        st.session_state["refresh_job"] = RefreshJob(source, index, base_currency).start()
+    if "refresh_job" in st.session_state:
+        if hasattr(st, "fragment"):
+            _refresh_status()
+        else:
+            with st.spinner('Collecting share price data'):
+                st.session_state["refresh_job"].wait()
+            st.rerun()
  
                      
     if 'portfolio' in st.session_state:
@@ -1572,37 +1670,6 @@ with st.sidebar:
             st.warning(f"Start-date control unavailable for current session data ({type(exc).__name__}).")
         
 
-# If button clicked, refresh market data into session state.
-if button:
-    previous_portfolio = st.session_state.get("portfolio")
-    previous_version = st.session_state.get("portfolio_version", 0)
-    previous_loaded_benchmark = st.session_state.get("loaded_benchmark")
-    try:
-        merged_portfolio = get_data(file=file, index=index)
-        load_ok = process_data(
-            merged_portfolio=merged_portfolio,
-            target_currency=base_currency,
-            selected_index=index,
-        )
-        if not load_ok:
-            if previous_portfolio is not None:
-                st.session_state["portfolio"] = previous_portfolio
-                st.session_state["portfolio_version"] = previous_version
-                if previous_loaded_benchmark is not None:
-                    st.session_state["loaded_benchmark"] = previous_loaded_benchmark
-                st.warning("Refresh failed. Showing last successfully loaded portfolio.")
-        else:
-            # Rebuild sidebar widgets (especially date_input bounds/value) from new portfolio state.
-            st.rerun()
-    except Exception as exc:
-        st.error(f"Refresh failed ({type(exc).__name__}: {exc})")
-        if previous_portfolio is not None:
-            st.session_state["portfolio"] = previous_portfolio
-            st.session_state["portfolio_version"] = previous_version
-            if previous_loaded_benchmark is not None:
-                st.session_state["loaded_benchmark"] = previous_loaded_benchmark
-            st.warning("Showing last successfully loaded portfolio.")
-
 # Always render portfolio view when already loaded in session state.
 if 'portfolio' in st.session_state:
     try:
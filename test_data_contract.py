@@ -1,3 +1,5 @@
+import os
+import threading
 import unittest
 import warnings
 from unittest.mock import patch
@@ -5,9 +7,25 @@ import tempfile
 
 import pandas as pd
 
+import batch_runner
+import compute_cache
+import data_provider as dp
+from refresh_job import RefreshJob
 import share_tracking as share
 
 
+def setUpModule() -> None:
+    # Keep merge_pricedata tests away from the user's on-disk price cache
+    global _cache_dir
+    _cache_dir = tempfile.TemporaryDirectory()
+    os.environ["PRICE_CACHE_DIR"] = _cache_dir.name
+
+
+def tearDownModule() -> None:
+    os.environ.pop("PRICE_CACHE_DIR", None)
+    _cache_dir.cleanup()
+
+
 def make_portfolio_base() -> pd.DataFrame:
     idx = pd.to_datetime(["2024-01-02", "2024-01-03"])
     cols = pd.MultiIndex.from_tuples(
@@ -43,6 +61,68 @@ AAA,03/01/2024,3,120
         companies = set(user.columns.get_level_values("Company"))
         self.assertEqual(companies, {"AAA"})
 
+    def test_get_userdata_aggregates_same_day_fills_and_rejects_weekends(self) -> None:
+        csv_text = """Company,Date,Shares,Price,Brokerage
+AAA,03/01/2024,10,100,5
+AAA,03/01/2024,30,120,
+BBB,03/01/2024,0,50,1
+BBB,03/01/2024,0,55,1
+AAA,04/01/2024,-5,130,2
+"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tf:
+            tf.write(csv_text)
+            path = tf.name
+        try:
+            user = share.get_userdata(path)
+            with open(path, "a") as f:
+                f.write("AAA,06/01/2024,1,100,0\n")
+            with self.assertRaises(ValueError) as ctx:
+                share.get_userdata(path)
+        finally:
+            os.unlink(path)
+
+        day = pd.Timestamp("2024-01-03")
+        self.assertAlmostEqual(user.loc[day, ("Shares", "AAA")], 40.0, places=12)
+        self.assertAlmostEqual(user.loc[day, ("Price", "AAA")], 115.0, places=12)
+        self.assertAlmostEqual(user.loc[day, ("Brokerage", "AAA")], 5.0, places=12)
+        # Zero-share fills fall back to the last price of the day
+        self.assertAlmostEqual(user.loc[day, ("Price", "BBB")], 55.0, places=12)
+        self.assertAlmostEqual(user.loc[day, ("Brokerage", "BBB")], 2.0, places=12)
+        self.assertIn("2024-01-06", str(ctx.exception))
+
+    def test_get_userdata_chunked_and_pyarrow_ingest_match_single_pass(self) -> None:
+        csv_text = """ Ticker ,date,QTY,Price,Fees
+AAA,03/01/2024,10,100,5
+BBB,03/01/2024,5,20,1
+AAA,03/01/2024,30,120,
+,04/01/2024,1,1,1
+AAA,04/01/2024,-5,130,2
+BBB,04/01/2024,bad,21,1
+AAA,03/01/2024,20,90,1
+BBB,05/01/2024,0,22,0
+CCC,08/01/2024,0.1,3.3,0.1
+CCC,08/01/2024,0.7,3.1,0.2
+CCC,08/01/2024,0.2,2.9,0.3
+CCC,08/01/2024,0.3,3.7,0.1
+CCC,08/01/2024,0.6,1.3,0.7
+CCC,08/01/2024,1.1,3.9,0.3
+"""
+        with tempfile.NamedTemporaryFile(mode="w", suffix=".csv", delete=False) as tf:
+            tf.write(csv_text)
+            path = tf.name
+        try:
+            expected = share.get_userdata(path)
+            chunked = share.get_userdata(path, chunksize=2, dtype={"Price": "float64"})
+            arrow = share.get_userdata(path, engine="pyarrow")
+            arrow_chunked = share.get_userdata(path, chunksize=3, engine="pyarrow")
+        finally:
+            os.unlink(path)
+
+        self.assertAlmostEqual(expected.loc[pd.Timestamp("2024-01-03"), ("Price", "AAA")], 6400 / 60)
+        # Same-day fills split over blocks are summed from per-block partial totals
+        for result in [chunked, arrow, arrow_chunked]:
+            pd.testing.assert_frame_equal(result, expected, check_freq=False, rtol=1e-12)
+
     def test_process_data_raises_if_price_columns_missing(self) -> None:
         idx = pd.to_datetime(["2024-01-02"])
         cols = pd.MultiIndex.from_tuples(
@@ -65,6 +145,108 @@ AAA,03/01/2024,3,120
         self.assertIn(("Div_tot", "AAA"), processed.columns)
         self.assertIn(("Val", "AAA"), processed.columns)
 
+    def test_process_data_consumes_sparse_transaction_events(self) -> None:
+        idx = pd.bdate_range("2024-01-01", periods=6)
+        cols = pd.MultiIndex.from_tuples(
+            [
+                ("Shares", "AAA"), ("Shares", "BBB"),
+                ("Price", "AAA"), ("Price", "BBB"),
+                ("Adjustments", "AAA"), ("Adjustments", "BBB"),
+                ("$", "AAA"), ("$", "BBB"),
+                ("Div", "AAA"), ("Div", "BBB"),
+            ],
+            names=["Params", "Company"],
+        )
+        nan = float("nan")
+        portfolio = pd.DataFrame(
+            [
+                [10, nan, 100.0, nan, nan, nan, 100.0, nan, nan, nan],
+                [nan, nan, nan, nan, nan, nan, 101.0, 50.0, 0.5, nan],
+                [nan, 4, nan, 50.0, nan, nan, 102.0, 51.0, nan, nan],
+                [-5, nan, 103.0, nan, -0.2, nan, 103.0, 52.0, nan, nan],
+                [nan, nan, nan, nan, nan, nan, nan, 53.0, 0.5, 1.0],
+                [nan, -4, nan, 54.0, nan, nan, 104.0, 54.0, nan, nan],
+            ],
+            index=idx,
+            columns=cols,
+        )
+
+        events = share.transaction_events(portfolio)
+        self.assertEqual(list(events["Company"]), ["AAA", "AAA", "BBB", "BBB"])
+        self.assertEqual(list(events["Date"]), [idx[0], idx[3], idx[2], idx[5]])
+        self.assertEqual(list(events["Adjustments"]), [0.0, -0.2, 0.0, 0.0])
+
+        processed = share.process_data(portfolio)
+        self.assertEqual(list(processed[("Accum", "AAA")]), [10, 10, 10, 5, 5, 5])
+        self.assertEqual(list(processed[("Accum", "BBB")]), [0, 0, 4, 4, 4, 0])
+        self.assertEqual(list(processed[("Buy_amt", "AAA")]), [1000.0, 0.0, 0.0, -515.0 - 0.2 * 485.0, 0.0, 0.0])
+        self.assertEqual(list(processed[("Div_tot", "BBB")]), [0.0, 0.0, 0.0, 0.0, 4.0, 0.0])
+        pd.testing.assert_frame_equal(
+            share.process_data(portfolio[["$", "Div"]], events=events), processed, check_dtype=False
+        )
+
+    def test_append_processed_data_matches_full_rebuild(self) -> None:
+        idx = pd.bdate_range("2024-01-01", periods=8)
+        cols = pd.MultiIndex.from_tuples(
+            [
+                ("Shares", "AAA"), ("Shares", "BBB"),
+                ("Price", "AAA"), ("Price", "BBB"),
+                ("Brokerage", "AAA"), ("Brokerage", "BBB"),
+                ("Adjustments", "AAA"), ("Adjustments", "BBB"),
+                ("$", "AAA"), ("$", "BBB"), ("$", "IDX"),
+                ("Div", "AAA"), ("Div", "BBB"), ("Div", "IDX"),
+            ],
+            names=["Params", "Company"],
+        )
+        nan = float("nan")
+        portfolio = pd.DataFrame(
+            [
+                [10, 3, 100.1, 50.3, 9.95, 9.95, nan, nan, 100.1, 50.3, 10.0, nan, nan, nan],
+                [nan, nan, nan, nan, nan, nan, nan, nan, 101.7, 50.9, 10.1, 0.3, nan, nan],
+                [5, nan, 102.2, nan, 9.95, nan, nan, nan, 102.2, nan, 10.2, nan, 0.4, nan],
+                [nan, nan, nan, nan, nan, nan, nan, nan, 103.3, 51.1, nan, nan, nan, nan],
+                [nan, 2, nan, 51.7, nan, 9.95, nan, nan, nan, 51.7, 10.4, 0.3, nan, nan],
+                [nan, nan, nan, nan, nan, nan, -0.1, nan, 104.9, 52.3, 10.5, 0.2, nan, nan],
+                [-7, nan, 105.3, nan, 9.95, nan, nan, nan, 105.3, 52.9, 10.6, nan, 0.4, nan],
+                [nan, nan, nan, nan, nan, nan, nan, nan, 106.1, nan, 10.7, 0.3, nan, nan],
+            ],
+            index=idx,
+            columns=cols,
+        ).asfreq("B")
+        full = share.process_data(portfolio)
+
+        # Append the last three days one row at a time
+        processed = share.process_data(portfolio.iloc[:5])
+        for row in range(5, 8):
+            processed = share.append_processed_data(processed, market_data=portfolio.iloc[[row]])
+        pd.testing.assert_frame_equal(processed, full, check_exact=True)
+
+        # Market rows first, then the transactions for days already in the frame
+        processed = share.process_data(portfolio.iloc[:4])
+        processed = share.append_processed_data(processed, market_data=portfolio.iloc[4:][["$", "Div"]])
+        processed = share.append_processed_data(
+            processed, events=share.transaction_events(portfolio.iloc[4:])
+        )
+        pd.testing.assert_frame_equal(processed, full, check_exact=True)
+
+        backdated = portfolio.iloc[:1].set_axis([idx[0] - pd.Timedelta(days=3)])
+        with self.assertRaises(ValueError):
+            share.append_processed_data(processed, market_data=backdated)
+
+    def test_compact_portfolio_is_typed_and_extracts_like_the_dense_frame(self) -> None:
+        processed = share.process_data(make_portfolio_base())
+        processed.attrs["target_currency"] = "USD"
+        compact = share.compact_portfolio(processed)
+
+        self.assertTrue(compact.columns.equals(processed.columns))
+        self.assertEqual(compact.attrs, processed.attrs)
+        self.assertEqual(str(compact[("Val", "AAA")].dtype), "float32")
+        self.assertIsInstance(compact[("Shares", "AAA")].dtype, pd.SparseDtype)
+
+        for dense, restored in zip(share.extract_parameters(processed), share.extract_parameters(compact)):
+            self.assertTrue((restored.dtypes == "float64").all())
+            pd.testing.assert_frame_equal(restored, dense, check_dtype=False, rtol=1e-6)
+
     def test_stock_summary_daily_return_present_when_benchmark_matches_holding(self) -> None:
         portfolio = make_portfolio_base()
         processed = share.process_data(portfolio)
@@ -74,6 +256,71 @@ AAA,03/01/2024,3,120
         self.assertTrue(pd.notna(aaa_row["Daily Return (%)"]))
         self.assertNotEqual(float(aaa_row["Daily Return (%)"]), 0.0)
 
+    def test_stock_summaries_match_per_method_summaries(self) -> None:
+        portfolio = make_portfolio_base()
+        portfolio.loc[pd.Timestamp("2024-01-04")] = [-10, 103.0, 0.0, 103.0]
+        portfolio.loc[pd.Timestamp("2024-01-05")] = [0, 0.0, 0.0, 104.0]
+        processed = share.process_data(portfolio.asfreq("B"))
+
+        summaries = share.stock_summaries(processed, index="AAA", styles=False)
+        for method in ["basic", "total"]:
+            expected = share.stock_summary(processed, index="AAA", styles=False, calc_method=method)
+            pd.testing.assert_frame_equal(summaries[method], expected)
+        self.assertNotEqual(
+            summaries["basic"].loc[0, "Total Return (%)"], summaries["total"].loc[0, "Total Return (%)"]
+        )
+        with self.assertRaises(ValueError):
+            share.stock_summary(processed, index="AAA", calc_method="twr")
+
+    def test_compute_cache_keys_on_content_and_evicts_to_budget(self) -> None:
+        processed = share.process_data(make_portfolio_base())
+        key = compute_cache.fingerprint(processed, None)
+        self.assertEqual(key, compute_cache.fingerprint(share.process_data(make_portfolio_base()), None))
+        changed = processed.copy()
+        changed.iloc[-1, 0] += 1.0
+        self.assertNotEqual(key, compute_cache.fingerprint(changed, None))
+        self.assertNotEqual(key, compute_cache.fingerprint(processed.rename(columns={"AAA": "BBB"}), None))
+
+        calls = []
+
+        def compute():
+            calls.append(1)
+            return share.stock_summaries(processed, index="AAA", styles=False)
+
+        cache = compute_cache.ComputeCache(max_bytes=10**6)
+        first = cache.get_or_compute(("summaries", key), compute)
+        self.assertIs(cache.get_or_compute(("summaries", key), compute), first)
+        self.assertEqual(len(calls), 1)
+
+        # Two 400 KB frames do not fit in a 1 MB budget with a third, the least recently used goes
+        block = pd.DataFrame(0.0, index=range(5000), columns=range(10))
+        cache.get_or_compute("a", block.copy)
+        cache.get_or_compute("b", block.copy)
+        cache.get_or_compute("a", block.copy)
+        cache.get_or_compute("c", block.copy)
+        stats = cache.stats()
+        self.assertLessEqual(stats["bytes"], 10**6)
+        self.assertEqual(cache._lookup("b"), (False, None))
+        self.assertTrue(cache._lookup("a")[0] and cache._lookup("c")[0])
+        self.assertEqual((stats["hits"], stats["misses"]), (2, 4))
+
+        # Concurrent misses on one key compute it once
+        release = threading.Event()
+
+        def slow():
+            calls.append(1)
+            release.wait(5)
+            return 1
+
+        calls.clear()
+        threads = [threading.Thread(target=cache.get_or_compute, args=("slow", slow)) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        release.set()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(len(calls), 1)
+
     def test_process_data_preserves_benchmark_market_columns(self) -> None:
         idx = pd.to_datetime(["2024-01-02", "2024-01-03"])
         cols = pd.MultiIndex.from_tuples(
@@ -124,6 +371,219 @@ AAA,03/01/2024,3,120
         self.assertIn("price_fetch", merged.attrs)
         self.assertIn("IDX", merged.attrs["price_fetch"]["failed"])
 
+    def test_merge_pricedata_keeps_rows_with_repeated_prices(self) -> None:
+        idx = pd.to_datetime(["2024-01-02"])
+        cols = pd.MultiIndex.from_tuples(
+            [("Shares", "FFF"), ("Price", "FFF")],
+            names=["Params", "Company"],
+        )
+        portfolio = pd.DataFrame([[10, 100.0]], index=idx, columns=cols)
+        dates = pd.bdate_range("2024-01-02", periods=4)
+        batch = pd.concat(
+            {
+                "FFF": pd.DataFrame({"Close": [5.0, 5.0, 5.0, 6.0], "Dividends": 0.0}, index=dates),
+                "IDX": pd.DataFrame({"Close": [1.0, 1.0, 2.0, 2.0], "Dividends": 0.0}, index=dates),
+            },
+            axis=1,
+        )
+
+        with patch.object(share.yf, "download", return_value=batch):
+            merged = share.merge_pricedata(portfolio, "IDX", use_cache=False)
+
+        self.assertTrue(merged.index.equals(dates))
+        self.assertEqual(merged[("$", "FFF")].tolist(), [5.0, 5.0, 5.0, 6.0])
+        self.assertEqual(merged[("$", "IDX")].tolist(), [1.0, 1.0, 2.0, 2.0])
+
+    def test_merge_pricedata_cache_only_requests_missing_tail(self) -> None:
+        idx = pd.to_datetime(["2024-01-02"])
+        cols = pd.MultiIndex.from_tuples(
+            [("Shares", "CCC"), ("Price", "CCC"), ("Div", "CCC")],
+            names=["Params", "Company"],
+        )
+        portfolio = pd.DataFrame([[10, 100.0, 0.0]], index=idx, columns=cols)
+        history = pd.DataFrame(
+            {"Close": range(1, 21), "Dividends": 0.0},
+            index=pd.bdate_range("2024-01-02", periods=20),
+            dtype=float,
+        )
+        requests = []
+
+        def fake_download(tickers, start, **kwargs):
+            requests.append(start)
+            bars = history.loc[start:]
+            return pd.concat({t: bars for t in tickers}, axis=1)
+
+        with patch.object(share.yf, "download", side_effect=fake_download):
+            first = share.merge_pricedata(portfolio, "CCC")
+            self.assertEqual(share.merge_pricedata(portfolio, "CCC").attrs["price_fetch"]["cached"], ["CCC"])
+            with patch.object(share.price_cache, "is_fresh", return_value=False):
+                second = share.merge_pricedata(portfolio, "CCC")
+
+        self.assertEqual(requests[0], "2024-01-02")
+        # The repeat load only asks for a short overlap before the last cached bar
+        self.assertEqual(len(requests), 2)
+        self.assertEqual(
+            pd.Timestamp(requests[1]),
+            history.index[-1] - pd.offsets.BDay(share.price_cache.OVERLAP_DAYS),
+        )
+        self.assertEqual(second.attrs["price_fetch"]["failed"], {})
+        pd.testing.assert_frame_equal(first, second)
+
+    def test_merge_pricedata_fallback_fetches_concurrently_with_deadline(self) -> None:
+        idx = pd.to_datetime(["2024-01-02"])
+        cols = pd.MultiIndex.from_tuples(
+            [("Shares", "DDD"), ("Price", "DDD"), ("Shares", "EEE"), ("Price", "EEE")],
+            names=["Params", "Company"],
+        )
+        portfolio = pd.DataFrame([[10, 100.0, 5, 50.0]], index=idx, columns=cols)
+        release = threading.Event()
+
+        def fake_single(ticker, start_time):
+            if ticker == "HANG":
+                release.wait(5)
+                return pd.DataFrame()
+            return pd.DataFrame(
+                {"Close": [1.0, 2.0], "Dividends": [0.0, 0.0]},
+                index=pd.to_datetime(["2024-01-02", "2024-01-03"]),
+            )
+
+        try:
+            with patch.object(share.yf, "download", return_value=pd.DataFrame()), patch.object(
+                share, "_download_single_ticker_history", side_effect=fake_single
+            ), patch.object(share.fetch_pool, "DEADLINE", 0.5):
+                merged = share.merge_pricedata(portfolio, "HANG", use_cache=False)
+        finally:
+            release.set()
+
+        self.assertEqual(sorted(merged.attrs["price_fetch"]["fetched"]), ["DDD", "EEE"])
+        self.assertIn("TimeoutError", merged.attrs["price_fetch"]["failed"]["HANG"])
+
+    def test_batch_runner_fetches_shared_tickers_once(self) -> None:
+        history = pd.DataFrame(
+            {"Close": [float(i) for i in range(10, 40)], "Dividends": 0.0},
+            index=pd.bdate_range("2024-01-02", periods=30),
+        )
+        requested = []
+
+        def fake_download(tickers, start, **kwargs):
+            requested.extend(tickers)
+            return pd.concat({t: history.loc[start:] for t in tickers}, axis=1)
+
+        csv_files = {
+            "alice.csv": "Company,Date,Shares,Price\nAAA,02/01/2024,10,10\nBBB,05/01/2024,5,12\n",
+            "bob.csv": "Company,Date,Shares,Price\nAAA,03/01/2024,4,11\nCCC,08/01/2024,7,13\n",
+            "broken.csv": "Company,Shares\nAAA,1\n",
+        }
+        with tempfile.TemporaryDirectory() as tmp:
+            source = os.path.join(tmp, "portfolios")
+            os.makedirs(source)
+            for name, text in csv_files.items():
+                with open(os.path.join(source, name), "w") as f:
+                    f.write(text)
+            out_dir = os.path.join(tmp, "out")
+
+            with patch.object(share.yf, "download", side_effect=fake_download):
+                written, errors = batch_runner.run_batch(source, "IDX", out_dir, workers=1, use_cache=False)
+                single = share.merge_pricedata(share.get_userdata(os.path.join(source, "bob.csv")), "IDX", use_cache=False)
+
+            self.assertEqual(sorted(requested[:4]), ["AAA", "BBB", "CCC", "IDX"])
+            self.assertEqual(len(requested), 4 + 3)  # the single-portfolio check fetches its own
+            self.assertEqual(set(written), {"alice", "bob"})
+            self.assertEqual(set(errors), {"broken"})
+            expected = batch_runner.summarise_portfolio(single, "IDX")["total"]
+            written_bob = pd.read_csv(os.path.join(out_dir, "bob_total.csv"), keep_default_na=False)
+            self.assertEqual(list(written_bob["Company"]), list(expected["Company"]))
+            self.assertEqual(
+                list(written_bob["Current Value"].astype(str)), list(expected["Current Value"].astype(str))
+            )
+
+    def test_refresh_job_stages_processed_portfolio_with_ticker_progress(self) -> None:
+        history = pd.DataFrame(
+            {"Close": [float(i) for i in range(10, 40)], "Dividends": 0.0},
+            index=pd.bdate_range("2024-01-02", periods=30),
+        )
+        release = threading.Event()
+
+        def fake_download(tickers, start, **kwargs):
+            release.wait(5)
+            return pd.concat({t: history.loc[start:] for t in tickers}, axis=1)
+
+        def no_fx(portfolio, target_currency, fx_rates=None, warn=True):
+            return portfolio
+
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, "portfolio.csv")
+            with open(path, "w") as f:
+                f.write("Company,Date,Shares,Price\nAAA,02/01/2024,10,10\nBBB,05/01/2024,5,12\n")
+            with patch.object(share.yf, "download", side_effect=fake_download), patch.object(
+                share, "convert_currency", side_effect=no_fx
+            ), patch.object(dp, "get_data_provider", return_value="yfinance"), patch.dict(
+                os.environ, {"PRICE_CACHE_DIR": os.path.join(tmp, "prices")}
+            ):
+                job = RefreshJob(path, "IDX", "USD").start()
+                self.assertFalse(job.done())
+                self.assertIsNone(job.portfolio)
+                release.set()
+                self.assertTrue(job.wait(10))
+                expected = share.process_data(
+                    share.merge_pricedata(share.get_userdata(path), "IDX", use_cache=False)
+                )
+
+                broken = os.path.join(tmp, "broken.csv")
+                with open(broken, "w") as f:
+                    f.write("Company,Shares\nAAA,1\n")
+                failed = RefreshJob(broken, "IDX", "USD").start()
+                failed.wait(10)
+
+        self.assertIsNone(job.error)
+        self.assertEqual(job.progress(), ("done", 3, 3, job._last_ticker))
+        self.assertEqual(set(job.resolved), {"AAA", "BBB", "IDX"})
+        pd.testing.assert_frame_equal(job.portfolio, expected)
+        self.assertIsNone(failed.portfolio)
+        self.assertEqual(failed.error_stage, "reading")
+
+    def test_fetch_ticker_metadata_shares_one_handle_per_ticker(self) -> None:
+        handles = []
+        metadata_calls = []
+
+        class FakeTicker:
+            def __init__(self, ticker):
+                self.ticker = ticker
+                handles.append(ticker)
+
+            @property
+            def dividends(self):
+                return pd.Series([0.5], index=pd.to_datetime(["2024-03-01"]))
+
+            @property
+            def actions(self):
+                return pd.DataFrame({"Dividends": [0.5], "Stock Splits": [0.0]}, index=pd.to_datetime(["2024-03-01"]))
+
+            @property
+            def calendar(self):
+                if self.ticker == "BAD":
+                    raise ConnectionError("calendar unavailable")
+                return {"Ex-Dividend Date": pd.Timestamp("2024-09-02")}
+
+            def get_history_metadata(self):
+                metadata_calls.append(self.ticker)
+                return {"currency": "AUD"}
+
+        with tempfile.TemporaryDirectory() as tmp, patch.object(share.yf, "Ticker", FakeTicker), patch.dict(
+            os.environ, {"PRICE_CACHE_DIR": tmp}
+        ):
+            metadata = share.fetch_ticker_metadata(["AAA", "BAD", "AAA"])
+            again = share.fetch_ticker_metadata(["AAA"])
+
+        self.assertEqual(sorted(handles), ["AAA", "AAA", "BAD"])
+        self.assertEqual(sorted(metadata_calls), ["AAA", "BAD"])  # currencies are remembered
+        self.assertEqual(set(metadata), {"AAA", "BAD"})
+        self.assertEqual(metadata["AAA"]["errors"], {})
+        self.assertEqual(metadata["BAD"]["errors"], {"calendar": "ConnectionError"})
+        self.assertIsNone(metadata["BAD"]["calendar"])
+        self.assertEqual(float(metadata["BAD"]["dividends"].iloc[0]), 0.5)
+        self.assertEqual(again["AAA"]["currency"], "AUD")
+
     def test_convert_currency_unknown_currency_leaves_data_unchanged(self) -> None:
         portfolio = make_portfolio_base()
 
@@ -142,6 +602,52 @@ AAA,03/01/2024,3,120
 
         pd.testing.assert_frame_equal(converted, portfolio)
         self.assertTrue(any("leaving unchanged" in str(w.message) for w in caught))
+        self.assertEqual([str(w.message) for w in caught], converted.attrs["fx_warnings"])
+
+        with patch.object(share.yf, "Ticker", return_value=BadTicker()):
+            with warnings.catch_warnings(record=True) as caught:
+                warnings.simplefilter("always")
+                quiet = share.convert_currency(portfolio, target_currency="AUD", warn=False)
+
+        self.assertEqual(caught, [])
+        self.assertEqual(quiet.attrs["fx_warnings"], converted.attrs["fx_warnings"])
+
+    def test_convert_currency_batches_fx_and_remembers_currencies(self) -> None:
+        idx = pd.to_datetime(["2024-01-02", "2024-01-03"])
+        cols = pd.MultiIndex.from_tuples(
+            [("$", "GGG"), ("Val", "GGG"), ("$", "HHH"), ("Accum", "HHH")],
+            names=["Params", "Company"],
+        )
+        portfolio = pd.DataFrame([[10.0, 100.0, 20.0, 5.0], [11.0, 110.0, 21.0, 5.0]], index=idx, columns=cols)
+        currency = {"GGG": "USD", "HHH": "EUR"}
+        lookups = []
+        downloads = []
+
+        class FakeTicker:
+            def __init__(self, ticker):
+                self.ticker = ticker
+
+            def get_history_metadata(self):
+                lookups.append(self.ticker)
+                return {"currency": currency[self.ticker]}
+
+        def fake_download(tickers, **kwargs):
+            downloads.append(tickers)
+            rates = {"USDAUD=X": [1.5, 1.6], "EURAUD=X": [1.25, 1.5]}
+            return pd.concat({t: pd.DataFrame({"Close": rates[t]}, index=idx) for t in tickers}, axis=1)
+
+        with patch.object(share.yf, "Ticker", side_effect=FakeTicker), patch.object(
+            share.yf, "download", side_effect=fake_download
+        ):
+            first = share.convert_currency(portfolio, target_currency="AUD")
+            second = share.convert_currency(portfolio, target_currency="AUD")
+
+        self.assertEqual(sorted(lookups), ["GGG", "HHH"])
+        self.assertEqual(downloads, [["EURAUD=X", "USDAUD=X"]] * 2)
+        self.assertEqual(first[("Val", "GGG")].tolist(), [150.0, 176.0])
+        self.assertEqual(first[("$", "HHH")].tolist(), [25.0, 31.5])
+        self.assertEqual(first[("Accum", "HHH")].tolist(), [5.0, 5.0])
+        pd.testing.assert_frame_equal(first, second)
 
 
 if __name__ == "__main__":
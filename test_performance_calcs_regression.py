@@ -1,12 +1,29 @@
 import inspect
 import unittest
+from unittest import mock
 
 import numpy as np
+import numpy_financial as npf
 import pandas as pd
 
 import performance_calcs as calc
 
 
+def make_rebuy_book(seed: int, periods: int = 300) -> tuple[pd.DataFrame, pd.DataFrame]:
+    """Volatile single-stock book that is repeatedly sold out and bought back (multi-root IRRs)."""
+    rng = np.random.default_rng(seed)
+    idx = pd.date_range("2022-01-03", periods=periods, freq="B")
+    price = 10 * np.cumprod(1 + rng.normal(0, 0.05, len(idx)))
+    shares = np.zeros(len(idx))
+    shares[0] = 100
+    for day in np.sort(rng.choice(np.arange(1, len(idx)), 12, replace=False)):
+        held = shares.sum()
+        shares[day] = -held if held > 0 and rng.random() < 0.6 else rng.integers(20, 200)
+    val = pd.DataFrame({"A": price * shares.cumsum()}, index=idx)
+    cash_flows = pd.DataFrame({"A": price * shares}, index=idx)
+    return val, cash_flows
+
+
 class PerformanceCalcRegressionTests(unittest.TestCase):
     def setUp(self) -> None:
         self.idx = pd.date_range("2024-01-01", periods=6, freq="B")
@@ -52,6 +69,233 @@ class PerformanceCalcRegressionTests(unittest.TestCase):
         )
         self.assertFalse(twr_tot_false.equals(twr_tot_true))
 
+    def test_time_weighted_return_columns_are_independent(self) -> None:
+        val = pd.DataFrame(
+            {"A": [0, 100, 120, 0, 0, 130], "B": [50, 60, 0, 0, 55, 0], "C": [0] * 6},
+            index=self.idx,
+            dtype=float,
+        )
+        cash_flows = pd.DataFrame(
+            {"A": [0, 100, 0, 0, 0, 0], "B": [50, 0, 0, 0, 0, 0], "C": [0] * 6},
+            index=self.idx,
+            dtype=float,
+        )
+
+        result = calc.time_weighted_return(val, cash_flows)
+        self.assertTrue(np.isnan(result.loc[self.idx[0], "A"]))
+        self.assertTrue((result["C"] == 0).all())
+        # A total loss is not reported as -100 %, the previous return is carried forward
+        self.assertAlmostEqual(float(result.loc[self.idx[3], "A"]), 0.2)
+        for column in ["A", "B"]:
+            single = calc.time_weighted_return(val[[column]], cash_flows[[column]])
+            pd.testing.assert_series_equal(
+                result[column].dropna(), single[column].dropna(), check_freq=False
+            )
+
+    def test_return_accumulator_matches_batch_returns(self) -> None:
+        idx = pd.date_range("2024-01-01", periods=12, freq="B")
+        val = pd.DataFrame(
+            {
+                "A": [0, 0, 100, 104, 98, 210, 215, 220, 0, 0, 0, 0],
+                "B": [50, 51, 52, 50, 49, 48, 60, 62, 61, 63, 64, 66],
+                "C": [0] * 12,
+            },
+            index=idx,
+            dtype=float,
+        )
+        cash_flows = pd.DataFrame(
+            {
+                "A": [0, 0, 100, 0, 0, 102.5, 0, 0, -230, 0, 0, 0],
+                "B": [50, 0, 0, 0, 0, 0, 10.3, 0, 0, 0, 0, 0],
+                "C": [0] * 12,
+            },
+            index=idx,
+            dtype=float,
+        )
+        div = pd.DataFrame(0.0, index=idx, columns=val.columns)
+        div.iloc[4, :2] = [1.2, 0.7]
+        div.iloc[10, 1] = 0.7
+
+        batch = {
+            "basic": calc.basic_return(val, cash_flows),
+            "basic_total": calc.basic_total_return(val, cash_flows, div),
+            "twr": calc.time_weighted_return(val, cash_flows),
+            "twr_total": calc.time_weighted_total_return(val, cash_flows, div),
+        }
+        acc = calc.ReturnAccumulator(val.columns)
+        rows = {metric: [] for metric in batch}
+        for block in [slice(0, 1), slice(1, 5), slice(5, 6), slice(6, 12)]:
+            if block.start == 6:
+                acc = calc.ReturnAccumulator.from_dict(acc.to_dict())
+            for metric, frame in acc.update(val[block], cash_flows[block], div[block]).items():
+                rows[metric].append(frame)
+
+        for metric, expected in batch.items():
+            result = pd.concat(rows[metric])
+            pd.testing.assert_frame_equal(result[["A", "B"]], expected[["A", "B"]].astype(float), check_exact=True)
+
+        snapshot = acc.snapshot()
+        self.assertEqual(snapshot.loc["C", "twr"], 0.0)
+        self.assertEqual(snapshot.loc["A", "basic"], batch["basic"]["A"].iloc[-1])
+        self.assertEqual(
+            snapshot.loc["B", "twr_ann"],
+            calc.time_weighted_return_annualised(val, cash_flows)["B"].iloc[-1],
+        )
+        with self.assertRaises(ValueError):
+            acc.update(val.iloc[-1:], cash_flows.iloc[-1:])
+
+    def test_return_endpoints_match_last_row_of_series(self) -> None:
+        idx = pd.date_range("2024-01-01", periods=12, freq="B")
+        val = pd.DataFrame(
+            {
+                "A": [0, 0, 100, 104, 98, 210, 215, 220, 0, 0, 0, 0],
+                "B": [50, 51, 52, 50, 49, 48, 60, 62, 61, 63, 64, 66],
+                "C": [0] * 12,
+            },
+            index=idx,
+            dtype=float,
+        )
+        cash_flows = pd.DataFrame(
+            {
+                "A": [0, 0, 100, 0, 0, 102.5, 0, 0, -230, 0, 0, 0],
+                "B": [50, 0, 0, 0, 0, 0, 10.3, 0, 0, 0, 0, 0],
+                "C": [0] * 12,
+            },
+            index=idx,
+            dtype=float,
+        )
+        div = pd.DataFrame(0.0, index=idx, columns=val.columns)
+        div.iloc[4, :2] = [1.2, 0.7]
+        div.iloc[10, 1] = 0.7
+
+        pairs = [
+            (calc.basic_return, calc.basic_return_endpoint, False),
+            (calc.basic_total_return, calc.basic_total_return_endpoint, True),
+            (calc.time_weighted_return, calc.time_weighted_return_endpoint, False),
+            (calc.time_weighted_total_return, calc.time_weighted_total_return_endpoint, True),
+        ]
+        annualised = [
+            (calc.basic_return_annualised, calc.basic_return_annualised_endpoint, False),
+            (calc.basic_total_return_annualised, calc.basic_total_return_annualised_endpoint, True),
+            (calc.time_weighted_return_annualised, calc.time_weighted_return_annualised_endpoint, False),
+            (calc.time_weighted_total_return_annualised, calc.time_weighted_total_return_annualised_endpoint, True),
+        ]
+        # Small blocks so the closed position (A) forward fills across a block boundary
+        with mock.patch.object(calc, "ENDPOINT_BLOCK_ROWS", 4):
+            for use_initial_CF in [False, True]:
+                calls = [(series, endpoint, with_div, {}) for series, endpoint, with_div in pairs]
+                calls += [
+                    (series, endpoint, with_div, {"calendar_days": calendar_days})
+                    for series, endpoint, with_div in annualised
+                    for calendar_days in [False, True]
+                ]
+                for series, endpoint, with_div, kwargs in calls:
+                    args = (val, cash_flows, div) if with_div else (val, cash_flows)
+                    expected = series(*args, use_initial_CF=use_initial_CF, **kwargs).iloc[-1].astype(float)
+                    result = endpoint(*args, use_initial_CF=use_initial_CF, **kwargs)
+                    pd.testing.assert_series_equal(result, expected, check_exact=True, check_names=False)
+
+        # Column A ends on a 100 % loss, the endpoint keeps the last return before it
+        self.assertEqual(
+            calc.basic_return_endpoint(val, cash_flows)["A"],
+            calc.basic_return(val, cash_flows)["A"].iloc[7],
+        )
+        self.assertEqual(calc.time_weighted_return_endpoint(val, cash_flows)["C"], 0.0)
+
+    def test_total_return_endpoints_add_dividends_in_series_order(self) -> None:
+        rng = np.random.default_rng(7)
+        idx = pd.date_range("2010-01-01", periods=5000, freq="B")
+        for n_cols in [1, 2, 3, 40]:
+            shares = np.where(rng.random((len(idx), n_cols)) < 0.02, rng.integers(1, 20, (len(idx), n_cols)), 0)
+            shares[0] = 10
+            price = np.cumprod(1 + rng.normal(0, 0.01, shares.shape), axis=0) * 10
+            val = pd.DataFrame(price * shares.cumsum(axis=0), index=idx)
+            cash_flows = pd.DataFrame(price * shares, index=idx)
+            div = pd.DataFrame(np.where(rng.random(shares.shape) < 0.2, rng.random(shares.shape) * 3.7, 0.0), index=idx)
+
+            # The running sums span several blocks and are added row by row, as cumsum() does
+            for series, endpoint in [
+                (calc.basic_total_return, calc.basic_total_return_endpoint),
+                (calc.time_weighted_total_return, calc.time_weighted_total_return_endpoint),
+            ]:
+                expected = series(val, cash_flows, div).iloc[-1]
+                pd.testing.assert_series_equal(endpoint(val, cash_flows, div), expected, check_exact=True,
+                                               check_names=False)
+
+    def test_summary_return_metrics_match_individual_functions(self) -> None:
+        idx = pd.date_range("2024-01-01", periods=30, freq="B")
+        val = pd.DataFrame(
+            {
+                "A": [0.0] * 3 + [100 + 2 * i for i in range(27)],
+                "B": [50 + (i % 5) for i in range(30)],
+                "C": [0.0] * 30,
+            },
+            index=idx,
+        )
+        cash_flows = pd.DataFrame(0.0, index=idx, columns=val.columns)
+        cash_flows.loc[idx[3], "A"] = 100.0
+        cash_flows.loc[idx[0], "B"] = 50.0
+        cash_flows.loc[idx[12], "B"] = 20.0
+        div = pd.DataFrame(0.0, index=idx, columns=val.columns)
+        div.loc[idx[20], ["A", "B"]] = [1.5, 0.8]
+
+        metrics = calc.summary_return_metrics(val, cash_flows, div, use_initial_CF=True)
+        years = calc._elapsed_years_from_first_nonzero(val).iloc[-1]
+        expected = {
+            "basic": {
+                "return": calc.basic_return(val, cash_flows, use_initial_CF=True).iloc[-1],
+                "return_ann": calc.basic_return_annualised(val, cash_flows, use_initial_CF=True).iloc[-1],
+                "twr": calc.time_weighted_return(val, cash_flows, use_initial_CF=True).iloc[-1],
+                "twr_ann": calc.time_weighted_return_annualised(val, cash_flows, use_initial_CF=True).iloc[-1],
+                "dwr": calc.dollar_weighted_return_endpoint(val, cash_flows, use_initial_CF=True),
+            },
+            "total": {
+                "return": calc.basic_total_return(val, cash_flows, div, use_initial_CF=True).iloc[-1],
+                "return_ann": calc.basic_total_return_annualised(val, cash_flows, div, use_initial_CF=True).iloc[-1],
+                "twr": calc.time_weighted_total_return(val, cash_flows, div, use_initial_CF=True).iloc[-1],
+                "twr_ann": calc.time_weighted_total_return_annualised(
+                    val, cash_flows, div, use_initial_CF=True
+                ).iloc[-1],
+                "dwr": calc.dollar_weighted_total_return_endpoint(val, cash_flows, div, use_initial_CF=True),
+            },
+        }
+        for method, columns in expected.items():
+            columns["dwr_ann"] = np.power(1 + columns["dwr"], 1 / years) - 1
+            for metric, values in columns.items():
+                np.testing.assert_array_equal(
+                    metrics[method][metric].to_numpy(), values.reindex(val.columns).to_numpy(dtype=float)
+                )
+        self.assertNotEqual(metrics["basic"].loc["A", "return"], metrics["total"].loc["A", "return"])
+
+    def test_summary_return_metrics_end_rows_match_truncated_columns(self) -> None:
+        idx = pd.date_range("2024-01-01", periods=140, freq="B")
+        steps = np.arange(140)
+        val = pd.DataFrame(
+            {
+                "A": np.where(steps >= 2, 100 + steps * 0.5, 0.0),
+                "B": 50 + np.sin(steps / 7) * 5,
+                "C": np.where(steps < 60, 20 + steps * 0.1, 0.0),
+            },
+            index=idx,
+        )
+        cash_flows = pd.DataFrame(0.0, index=idx, columns=val.columns)
+        cash_flows.loc[idx[2], "A"] = 101.0
+        cash_flows.loc[idx[0], "B"] = 50.0
+        cash_flows.loc[idx[40], "B"] = 12.5
+        cash_flows.loc[idx[0], "C"] = 20.0
+        cash_flows.loc[idx[60], "C"] = -26.1
+        div = pd.DataFrame(0.0, index=idx, columns=val.columns)
+        div.loc[idx[30], ["A", "B", "C"]] = [1.0, 0.5, 0.2]
+
+        end_rows = [139, 90, 59]
+        metrics = calc.summary_return_metrics(val, cash_flows, div, end_rows=end_rows)
+        for col, end in zip(val.columns, end_rows):
+            expected = calc.summary_return_metrics(
+                val[col].iloc[: end + 1], cash_flows[col].iloc[: end + 1], div[col].iloc[: end + 1]
+            )
+            for method in ["basic", "total"]:
+                np.testing.assert_array_equal(metrics[method].loc[col].to_numpy(), expected[method].iloc[0].to_numpy())
+
     def test_daily_portfolio_pct_gain_zero_denominator_returns_zero(self) -> None:
         val = pd.DataFrame({"A": [0, 0, 0, 0, 0, 0]}, index=self.idx)
         price = pd.DataFrame({"A": [10, 11, 12, 13, 14, 15]}, index=self.idx)
@@ -74,6 +318,19 @@ class PerformanceCalcRegressionTests(unittest.TestCase):
         basic_ann = calc.basic_return_annualised(val, cash_flows, use_initial_CF=True)
         self.assertTrue(np.isfinite(basic_ann["A"]).all())
 
+    def test_elapsed_years_business_and_calendar_day_counts(self) -> None:
+        val = pd.DataFrame({"A": [0, 100, 100, 100, 100, 100], "B": [0] * 6}, index=self.idx)
+
+        business = calc._elapsed_years_from_first_nonzero(val)
+        self.assertEqual(business.loc[self.idx[0], "A"], 1.0)
+        self.assertAlmostEqual(business.loc[self.idx[-1], "A"], 5 / 261)
+        self.assertTrue((business["B"] == 1.0).all())
+
+        # 2024-01-02 (Tue) to 2024-01-08 (Mon) spans a weekend
+        calendar = calc._elapsed_years_from_first_nonzero(val, calendar_days=True)
+        self.assertAlmostEqual(calendar.loc[self.idx[-1], "A"], 7 / 365.25)
+        self.assertTrue((calendar["B"] == 1.0).all())
+
     def test_dollar_weighted_return_has_single_resample_step(self) -> None:
         src = inspect.getsource(calc.dollar_weighted_return)
         self.assertEqual(src.count("irr_series = irr_series.resample"), 1)
@@ -110,6 +367,114 @@ class PerformanceCalcRegressionTests(unittest.TestCase):
         endpoint = calc.dollar_weighted_return_endpoint(val, cash_flows, resample_freq="M")
         self.assertAlmostEqual(float(full.iloc[-1, 0]), float(endpoint["A"]), places=10)
 
+    def test_dollar_weighted_endpoint_matches_last_value_with_multiple_roots(self) -> None:
+        for seed, resample_freq in [(21, "W"), (73, "M")]:
+            val, cash_flows = make_rebuy_book(seed)
+            div = cash_flows * 0.0
+            div.iloc[::60] = 5.0
+
+            full = calc.dollar_weighted_return(val, cash_flows, resample_freq=resample_freq)
+            endpoint = calc.dollar_weighted_return_endpoint(val, cash_flows, resample_freq=resample_freq)
+            np.testing.assert_allclose(full.iloc[-1].to_numpy(), endpoint.to_numpy(), rtol=1e-9)
+
+            full = calc.dollar_weighted_total_return(val, cash_flows, div, resample_freq=resample_freq)
+            endpoint = calc.dollar_weighted_total_return_endpoint(val, cash_flows, div, resample_freq=resample_freq)
+            np.testing.assert_allclose(full.iloc[-1].to_numpy(), endpoint.to_numpy(), rtol=1e-9)
+
+    def test_batched_irr_matches_numpy_financial(self) -> None:
+        streams = np.array(
+            [
+                [-100.0, 10.0, 10.0, 110.0],
+                [0.0, -100.0, 0.0, 121.0],
+                [100.0, 50.0, 0.0, 10.0],  # no sign change
+                [-100.0, 230.0, -132.0, 0.0],  # two roots, 10 % and 20 %
+                [-50.0, 0.0, np.nan, 60.0],
+            ]
+        )
+        result = calc.batched_irr(streams, tol=1e-14)
+
+        expected = [npf.irr(stream) for stream in streams[:4]]
+        np.testing.assert_allclose(result[:4], expected, rtol=1e-10, equal_nan=True)
+        # No root and non-finite flows are NaN rather than an error
+        self.assertTrue(np.isnan(result[2]))
+        self.assertTrue(np.isnan(result[4]))
+        self.assertAlmostEqual(result[3], 0.1, places=10)
+        self.assertAlmostEqual(calc.batched_irr(streams[1]), 0.1, places=10)
+
+        rng = np.random.default_rng(0)
+        random_streams = rng.normal(size=(200, 25)) * (rng.random((200, 25)) < 0.4)
+        expected = [npf.irr(stream) for stream in random_streams]
+        np.testing.assert_allclose(calc.batched_irr(random_streams), expected, rtol=1e-8, atol=1e-10, equal_nan=True)
+
+    def test_dollar_weighted_return_daily_matches_per_period_irr(self) -> None:
+        idx = pd.date_range("2024-01-01", periods=40, freq="B")
+        price = np.linspace(10.0, 14.0, len(idx)) + np.sin(np.arange(len(idx)))
+        shares = np.zeros(len(idx))
+        shares[[0, 8, 15, 27]] = [100, 50, -80, 40]
+        val = pd.DataFrame({"A": price * shares.cumsum()}, index=idx)
+        cash_flows = pd.DataFrame({"A": price * shares}, index=idx)
+
+        result = calc.dollar_weighted_return(val, cash_flows, resample_freq="B")
+
+        flows = -cash_flows["A"].to_numpy()
+        flows[0] = -val["A"].iloc[0]
+        expected = []
+        for period_end in range(len(idx)):
+            irr = npf.irr(np.concatenate([flows[: period_end + 1], [val["A"].iloc[period_end]]]))
+            expected.append(np.power(1 + irr, period_end + 1) - 1)
+        np.testing.assert_allclose(result["A"].to_numpy(), expected, rtol=1e-9, atol=1e-12)
+
+    def test_dollar_weighted_return_exact_dates_solves_xirr(self) -> None:
+        idx = pd.DatetimeIndex(["2024-01-02", "2024-01-03", "2024-02-29", "2024-03-01", "2024-07-15", "2025-01-10"])
+        shares = np.array([100.0, 0.0, 40.0, 0.0, -30.0, 0.0])
+        price = np.array([10.0, 10.2, 11.0, 10.9, 12.5, 13.0])
+        val = pd.DataFrame({"A": price * shares.cumsum()}, index=idx)
+        cash_flows = pd.DataFrame({"A": price * shares}, index=idx)
+
+        result = calc.dollar_weighted_return(val, cash_flows, resample_freq="exact")
+        endpoint = calc.dollar_weighted_return_endpoint(val, cash_flows, resample_freq="exact")
+        self.assertAlmostEqual(float(result["A"].iloc[-1]), float(endpoint["A"]), places=12)
+
+        # The daily rate implied by each value makes the dated flows' NPV zero
+        days = (idx - idx[0]).days.to_numpy(dtype=float)
+        for k in range(1, len(idx)):
+            daily = (1 + result["A"].iloc[k]) ** (1 / days[k]) - 1
+            grown = (cash_flows["A"].to_numpy()[: k + 1] * (1 + daily) ** (days[k] - days[: k + 1])).sum()
+            self.assertAlmostEqual(grown / val["A"].iloc[k], 1.0, places=10)
+
+        # Flows on the same date are a single cash flow
+        merged = calc.batched_irr([-60.0, -40.0, 110.0], times=[0.0, 0.0, 1.0])
+        self.assertAlmostEqual(merged, calc.batched_irr([-100.0, 110.0]), places=12)
+
+    def test_dollar_weighted_return_multi_root_matches_per_period_irr(self) -> None:
+        val, cash_flows = make_rebuy_book(seed=21)
+        result = calc.dollar_weighted_return(val, cash_flows, resample_freq="W")
+
+        flows = -cash_flows["A"]
+        flows.iloc[0] = -val["A"].iloc[0]
+        flows = flows.resample("W-FRI").sum().to_numpy()
+        terminal = val["A"].resample("W-FRI").last().to_numpy()
+        expected = []
+        for period_end in range(len(flows)):
+            irr = npf.irr(np.concatenate([flows[: period_end + 1], [terminal[period_end]]]))
+            expected.append(np.power(1 + irr, period_end + 1) - 1)
+        # Prefixes with several roots take the one closest to zero, as npf.irr does. The first
+        # week has no return (npf.irr gives NaN, the series 0).
+        np.testing.assert_allclose(result["A"].to_numpy()[1:], expected[1:], rtol=1e-8, atol=1e-12)
+
+    def test_dollar_weighted_return_exact_dates_matches_endpoint_with_multiple_roots(self) -> None:
+        val, cash_flows = make_rebuy_book(seed=28)
+        result = calc.dollar_weighted_return(val, cash_flows, resample_freq="exact")["A"]
+
+        # Every row is the XIRR return of the book truncated at that date
+        rows = range(240, len(val))
+        expected = [
+            float(calc.dollar_weighted_return_endpoint(val.iloc[: k + 1], cash_flows.iloc[: k + 1],
+                                                       resample_freq="exact")["A"])
+            for k in rows
+        ]
+        np.testing.assert_allclose(result.iloc[list(rows)].to_numpy(), expected, rtol=1e-9, atol=1e-12)
+
     def test_auto_resample_considers_dataframe_width(self) -> None:
         idx = pd.date_range("2024-01-01", periods=50, freq="B")
         wide = pd.DataFrame(
@@ -119,6 +484,59 @@ class PerformanceCalcRegressionTests(unittest.TestCase):
         )
         self.assertEqual(calc._resolve_dwr_resample_freq(wide, "auto", base_rows=100), "W-FRI")
 
+    def test_process_pool_matches_serial_results(self) -> None:
+        idx = pd.date_range("2023-01-02", periods=120, freq="B")
+        rng = np.random.default_rng(3)
+        tickers = ["AAA", "BBB", "CCC", "DDD", "EEE"]
+        shares = np.where(rng.random((len(idx), len(tickers))) < 0.05, rng.integers(-5, 20, (len(idx), len(tickers))), 0)
+        shares[0] = 10
+        shares[:, 4] = 0
+        price = np.cumprod(1 + rng.normal(0, 0.01, shares.shape), axis=0) * 10
+        val = pd.DataFrame(price * shares.cumsum(axis=0), index=idx, columns=tickers)
+        cash_flows = pd.DataFrame(price * shares, index=idx, columns=tickers)
+        div = pd.DataFrame(np.where(rng.random(shares.shape) < 0.03, 1.0, 0.0), index=idx, columns=tickers)
+
+        for metric in [
+            lambda **kw: calc.dollar_weighted_return(val, cash_flows, **kw),
+            lambda **kw: calc.dollar_weighted_total_return(val, cash_flows, div, resample_freq="exact", **kw),
+        ]:
+            pd.testing.assert_frame_equal(metric(workers=2), metric(workers=1), check_freq=False)
+
+    def test_positions_asof_matches_per_ticker_forward_fill(self) -> None:
+        idx = pd.bdate_range("2024-01-01", periods=30)
+        accum = pd.DataFrame({"AAA": 0.0, "BBB": 0.0}, index=idx)
+        accum.loc[idx[3]:, "AAA"] = 10.0
+        accum.loc[idx[12]:, "AAA"] = 4.0
+        accum.loc[idx[5]:, "BBB"] = 7.0
+        accum.loc[idx[20], "BBB"] = np.nan
+        events = pd.DataFrame(
+            {
+                "Ticker": ["BBB", "AAA", "AAA", "CCC", "AAA", "BBB", "BBB", "AAA"],
+                "Ex-Date": pd.to_datetime(
+                    ["2024-02-10", "2023-12-01", "2024-01-04", "2024-01-10", "2024-01-20",
+                     "2024-01-29", "2024-01-05", "2024-03-01"]
+                ),
+            },
+            index=[10, 11, 12, 13, 14, 15, 16, 17],
+        )
+
+        held = calc.positions_asof(accum, events, date_col="Ex-Date")
+
+        expected = []
+        for ticker, date in zip(events["Ticker"], events["Ex-Date"]):
+            if ticker not in accum.columns:
+                expected.append(0.0)
+                continue
+            value = accum[ticker].reindex(pd.DatetimeIndex([date]), method="ffill").fillna(0.0).iloc[0]
+            expected.append(float(value))
+        pd.testing.assert_series_equal(held, pd.Series(expected, index=events.index))
+        # Saturday 2024-01-20 resolves to Friday's position, the NaN on 2024-01-29 to zero
+        self.assertEqual(list(held), [7.0, 0.0, 10.0, 0.0, 4.0, 0.0, 0.0, 4.0])
+
+        dated = events.assign(**{"Ex-Date": events["Ex-Date"].dt.date})
+        pd.testing.assert_series_equal(calc.positions_asof(accum, dated, date_col="Ex-Date"), held)
+        self.assertTrue(calc.positions_asof(accum, events.iloc[:0], date_col="Ex-Date").empty)
+
     def test_contribution_analysis_single_ticker_no_fx(self) -> None:
         idx = pd.date_range("2024-01-01", periods=4, freq="B")
         val = pd.DataFrame({"AAA": [100.0, 105.0, 110.0, 120.0]}, index=idx)